@@ -12,109 +12,73 @@ import speech_recognition as sr
 import tempfile
 import os
 import hashlib
-import math
 import json
 from collections import defaultdict, deque
-import heapq
-from dataclasses import dataclass
 from typing import List, Dict, Tuple, Optional
+from travel_data import Place, Route, road_peak_times, weekend_road_peak_times
+from catalog import default_catalog
+from catalog_compiler import load_or_compile_city
+from routing import find_route
+from travel_matrix import load_or_build_matrix
+from contraction import load_or_build_hierarchy
+from pareto import PARETO_LABEL_LIMIT, pareto_routes
+from alternatives import iter_shortest_routes
+from traffic import TrafficProfile
+from isochrone import Reachability
+from route_cache import RouteCache, RouteStore
+from itinerary import recommend_itinerary
+from spatial import SpatialIndex
 
-# Enhanced data structures for better performance
-@dataclass
-class Place:
-    name: str
-    coords: Tuple[float, float]
-    cost: int
-    rating: float
-    description: str
-    visit_time: float
-    category: str
-    popularity_score: float = 0.0
-
-@dataclass
-class Route:
-    path: List[str]
-    distance: float
-    time: float
-    cost: int
-
-# Binary Search Tree for efficient place searching
-class PlaceBST:
-    def __init__(self):
-        self.root = None
-    
-    class Node:
-        def __init__(self, place: Place):
-            self.place = place
-            self.left = None
-            self.right = None
-    
-    def insert(self, place: Place):
-        if not self.root:
-            self.root = self.Node(place)
-        else:
-            self._insert_recursive(self.root, place)
-    
-    def _insert_recursive(self, node, place):
-        if place.rating < node.place.rating:
-            if node.left is None:
-                node.left = self.Node(place)
-            else:
-                self._insert_recursive(node.left, place)
-        else:
-            if node.right is None:
-                node.right = self.Node(place)
-            else:
-                self._insert_recursive(node.right, place)
-    
-    def search_by_rating_range(self, min_rating: float, max_rating: float) -> List[Place]:
-        result = []
-        self._search_range_recursive(self.root, min_rating, max_rating, result)
-        return result
-    
-    def _search_range_recursive(self, node, min_rating, max_rating, result):
-        if not node:
-            return
-        
-        if min_rating <= node.place.rating <= max_rating:
-            result.append(node.place)
-        
-        if node.place.rating > min_rating:
-            self._search_range_recursive(node.left, min_rating, max_rating, result)
-        if node.place.rating < max_rating:
-            self._search_range_recursive(node.right, min_rating, max_rating, result)
-
-# Places data
-places_data = {
-    "Clock Tower": Place("Clock Tower", (30.3256, 78.0437), 0, 4.2, "Historic landmark in city center", 1.0, "Landmark", 0.9),
-    "Robber's Cave": Place("Robber's Cave", (30.3956, 78.0805), 20, 4.5, "Natural cave formation with stream", 2.5, "Adventure", 0.8),
-    "Sahastradhara": Place("Sahastradhara", (30.3872, 78.1316), 30, 4.3, "Beautiful waterfalls with sulfur springs", 2.0, "Nature", 0.7),
-    "Forest Research Institute": Place("Forest Research Institute", (30.3544, 77.9995), 25, 4.7, "Colonial-era research institute with museum", 2.0, "Cultural", 0.6),
-    "Tapkeshwar Temple": Place("Tapkeshwar Temple", (30.3086, 78.0211), 10, 4.1, "Ancient cave temple dedicated to Lord Shiva", 1.5, "Religious", 0.8),
-    "Indian Military Academy": Place("Indian Military Academy", (30.3417, 77.9913), 100, 5.0, "Prestigious military training academy", 2.5, "Institution", 0.5),
-    "Mindrolling Monastery": Place("Mindrolling Monastery", (30.3131, 77.9814), 0, 4.6, "Beautiful Tibetan Buddhist monastery", 1.5, "Religious", 0.7),
-    "Paltan Bazaar": Place("Paltan Bazaar", (30.3241, 78.0402), 0, 4.0, "Vibrant local market for shopping", 2.0, "Market", 0.95),
-    "Maldevta": Place("Maldevta", (30.3745, 78.1234), 50, 4.4, "Scenic spot for trekking and rafting", 3.0, "Adventure", 0.75),
-    "Buddha Temple": Place("Buddha Temple", (30.3023, 77.9865), 0, 4.5, "Peaceful Tibetan temple with gardens", 1.5, "Religious", 0.7),
-    "Lacchwala": Place("Lacchiwala", (30.2536, 78.1087), 40, 4.2, "Picnic spot with water activities", 2.5, "Adventure", 0.65),
-    "Rajaji National Park": Place("Rajaji National Park", (30.2678, 78.1602), 150, 4.6, "Wildlife sanctuary with jeep safaris", 4.0, "Nature", 0.8)
+# Route Optimizer / planner search mode labels -> routing search modes
+SEARCH_MODE_LABELS = {
+    "A*": "astar",
+    "Bidirectional A*": "bidirectional-astar",
+    "Bidirectional Dijkstra": "bidirectional-dijkstra"
+}
+
+# Planner-only mode that reads routes out of the all-pairs travel matrix
+MATRIX_MODE_LABEL = "Precomputed Matrix"
+TRAFFIC_MODE_LABEL = "Traffic-Aware A*"
+
+# Route Optimizer alternatives: drop routes within 10% of another on every criterion
+ROUTE_ALTERNATIVES_EPSILON = 0.1
+
+# Route Optimizer mode that queries a preprocessed Contraction Hierarchy
+HIERARCHY_MODE_LABEL = "Contraction Hierarchy"
+
+# Interactive Map reachability filter labels -> travel-time budget in minutes
+REACH_BUDGET_LABELS = {
+    "Within 15 min": 15,
+    "Within 30 min": 30,
+    "Within 45 min": 45,
+    "Within 1 hour": 60,
+    "Within 2 hours": 120
+}
+
+# Interactive Map distance filter labels -> straight-line radius in km
+NEAR_RADIUS_LABELS = {
+    "Within 1 km": 1,
+    "Within 2 km": 2,
+    "Within 5 km": 5,
+    "Within 10 km": 10
 }
 
-# Simplified graph 
-graph = {
-    "Clock Tower": {"Robber's Cave": {"dist": 5, "time": 15}, "Forest Research Institute": {"dist": 3, "time": 10}, "Tapkeshwar Temple": {"dist": 3, "time": 10}, "Paltan Bazaar": {"dist": 1, "time": 5}},
-    "Robber's Cave": {"Sahastradhara": {"dist": 4, "time": 12}, "Maldevta": {"dist": 6, "time": 18}},
-    "Sahastradhara": {"Forest Research Institute": {"dist": 6, "time": 18}, "Maldevta": {"dist": 5, "time": 15}},
-    "Forest Research Institute": {"Tapkeshwar Temple": {"dist": 2, "time": 8}, "Indian Military Academy": {"dist": 1, "time": 5}},
-    "Tapkeshwar Temple": {"Clock Tower": {"dist": 3, "time": 10}, "Mindrolling Monastery": {"dist": 4, "time": 12}, "Buddha Temple": {"dist": 3, "time": 10}},
-    "Indian Military Academy": {"Forest Research Institute": {"dist": 1, "time": 5}},
-    "Mindrolling Monastery": {"Tapkeshwar Temple": {"dist": 4, "time": 12}, "Buddha Temple": {"dist": 2, "time": 8}},
-    "Paltan Bazaar": {"Clock Tower": {"dist": 1, "time": 5}, "Buddha Temple": {"dist": 4, "time": 12}},
-    "Maldevta": {"Robber's Cave": {"dist": 6, "time": 18}, "Sahastradhara": {"dist": 5, "time": 15}, "Lacchiwala": {"dist": 7, "time": 20}},
-    "Buddha Temple": {"Mindrolling Monastery": {"dist": 2, "time": 8}, "Tapkeshwar Temple": {"dist": 3, "time": 10}, "Paltan Bazaar": {"dist": 4, "time": 12}},
-    "Lacchiwala": {"Maldevta": {"dist": 7, "time": 20}, "Rajaji National Park": {"dist": 8, "time": 25}},
-    "Rajaji National Park": {"Lacchiwala": {"dist": 8, "time": 25}}
+# Interactive Map rating and cost filter labels -> inclusive (low, high) ranges.
+# Entry fees are whole rupees, so "Under ₹50" is at most ₹49
+MAP_RATING_RANGES = {
+    "4.5+ Stars": (4.5, None),
+    "4.0+ Stars": (4.0, None),
+    "3.5+ Stars": (3.5, None)
 }
+MAP_COST_RANGES = {
+    "Free": (None, 0),
+    "Under ₹50": (None, 49),
+    "Under ₹100": (None, 99),
+    "Under ₹200": (None, 199)
+}
+
+# Places a location combobox lists while the user is typing
+PLACE_SUGGESTIONS = 20
 
 class SimplifiedTravelGuideApp:
     def __init__(self, root):
@@ -128,16 +92,27 @@ class SimplifiedTravelGuideApp:
         self.root.geometry("1400x900")
         self.root.minsize(1200, 800)
         
-        # Initialize data structures
-        self.place_bst = PlaceBST()
-        self.route_cache = {}
+        # Initialize data structures from the city's compiled snapshot, which
+        # is validated and rebuilt only when the catalog data changes
+        self.city = load_or_compile_city(default_catalog())
+        self.place_table = self.city.table
+        self.place_index = self.place_table.spatial()
+        self.compiled_graph = self.city.graph
+        # Built on first use of the matrix mode, and only for small enough graphs
+        self.travel_matrix = None
+        self.hierarchies = {}
+        self.traffic = TrafficProfile.from_peak_times(
+            self.compiled_graph, self.place_table.node_categories(self.compiled_graph),
+            road_peak_times, weekend_road_peak_times
+        )
+        self.reachability = Reachability(self.compiled_graph)
+        # Routes persist across launches; rows are only served for this exact graph
+        self.route_cache = RouteCache(store=RouteStore.open(
+            os.path.join(tempfile.gettempdir(), "dehradun_route_cache.sqlite")
+        ))
         self.weather_cache = {}
         self.recognizer = sr.Recognizer()
         
-        # Populate BST
-        for place in places_data.values():
-            self.place_bst.insert(place)
-        
         # Animation variables
         self.animation_running = False
         
@@ -162,6 +137,34 @@ class SimplifiedTravelGuideApp:
         # Tabbed interface
         self._create_enhanced_tabs()
 
+    def _enable_place_search(self, combobox, fixed: Tuple[str, ...] = ()):
+        """Narrow a location combobox to the places matching what is typed, on every keystroke
+
+        fixed entries (such as "From Anywhere") stay at the top of the list.
+        """
+        all_values = list(fixed) + self.place_table.keys
+
+        def on_key(event):
+            text = combobox.get()
+            if not text.strip() or text in all_values:
+                values = all_values
+            else:
+                rows = self.place_table.search().search(text, PLACE_SUGGESTIONS)
+                values = list(fixed) + [self.place_table.keys[row] for row in rows]
+            combobox.configure(values=values)
+
+        combobox.bind("<KeyRelease>", on_key)
+
+    def _resolve_place(self, combobox) -> str:
+        """The place a location combobox names, taking the best search match for typed text"""
+        text = combobox.get()
+        if text and text not in self.place_table:
+            rows = self.place_table.search().search(text, 1)
+            if len(rows):
+                text = self.place_table.keys[rows[0]]
+                combobox.set(text)
+        return text
+
     def _create_enhanced_header(self):
         header = ctk.CTkFrame(self.main_container, height=100, corner_radius=15)
         header.pack(fill="x", padx=10, pady=10)
@@ -385,6 +388,15 @@ class SimplifiedTravelGuideApp:
         self.planner_date.pack(fill="x", pady=2)
         self.planner_date.insert(0, datetime.now().strftime("%Y-%m-%d"))
         
+        # Departure time input
+        departure_frame = ctk.CTkFrame(left_frame, fg_color="transparent")
+        departure_frame.pack(fill="x", pady=5)
+        
+        ctk.CTkLabel(departure_frame, text="🕘 Departure Time (HH:MM):", font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w")
+        self.planner_departure = ctk.CTkEntry(departure_frame, height=35, corner_radius=8)
+        self.planner_departure.pack(fill="x", pady=2)
+        self.planner_departure.insert(0, "09:00")
+        
         # Location inputs
         start_frame = ctk.CTkFrame(left_frame, fg_color="transparent")
         start_frame.pack(fill="x", pady=5)
@@ -392,12 +404,13 @@ class SimplifiedTravelGuideApp:
         ctk.CTkLabel(start_frame, text="🚀 Start Location:", font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w")
         self.planner_start = ctk.CTkComboBox(
             start_frame, 
-            values=list(places_data.keys()),
+            values=self.place_table.keys,
             height=35,
             corner_radius=8,
             font=ctk.CTkFont(size=12)
         )
         self.planner_start.pack(fill="x", pady=2)
+        self._enable_place_search(self.planner_start)
         
         end_frame = ctk.CTkFrame(left_frame, fg_color="transparent")
         end_frame.pack(fill="x", pady=5)
@@ -405,12 +418,13 @@ class SimplifiedTravelGuideApp:
         ctk.CTkLabel(end_frame, text="🏁 End Location:", font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w")
         self.planner_end = ctk.CTkComboBox(
             end_frame,
-            values=list(places_data.keys()),
+            values=self.place_table.keys,
             height=35,
             corner_radius=8,
             font=ctk.CTkFont(size=12)
         )
         self.planner_end.pack(fill="x", pady=2)
+        self._enable_place_search(self.planner_end)
         
         # Right column
         right_frame = ctk.CTkFrame(parent, fg_color="transparent")
@@ -448,6 +462,20 @@ class SimplifiedTravelGuideApp:
         ctk.CTkCheckBox(options_frame, text="💸 Strict Budget", variable=self.strict_budget_var).pack(anchor="w", pady=2)
         ctk.CTkCheckBox(options_frame, text="⚡ Optimize for Time", variable=self.optimize_time_var).pack(anchor="w", pady=2)
         
+        # Search mode
+        mode_frame = ctk.CTkFrame(right_frame, fg_color="transparent")
+        mode_frame.pack(fill="x", pady=5)
+        
+        ctk.CTkLabel(mode_frame, text="🔀 Search Mode:", font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w")
+        self.planner_search_mode = ctk.CTkComboBox(
+            mode_frame,
+            values=[TRAFFIC_MODE_LABEL, MATRIX_MODE_LABEL] + list(SEARCH_MODE_LABELS.keys()),
+            height=35,
+            corner_radius=8
+        )
+        self.planner_search_mode.pack(fill="x", pady=2)
+        self.planner_search_mode.set(TRAFFIC_MODE_LABEL)
+        
         # Generate button
         generate_btn = ctk.CTkButton(
             parent,
@@ -474,8 +502,8 @@ class SimplifiedTravelGuideApp:
             # Get inputs
             budget = int(self.planner_budget.get())
             date_str = self.planner_date.get()
-            start_loc = self.planner_start.get()
-            end_loc = self.planner_end.get()
+            start_loc = self._resolve_place(self.planner_start)
+            end_loc = self._resolve_place(self.planner_end)
             experience_type = self.planner_experience.get()
             
             if not start_loc or not end_loc:
@@ -483,10 +511,21 @@ class SimplifiedTravelGuideApp:
                 return
             
             # Get weather with caching
-            weather = self._get_cached_weather(date_str, places_data[start_loc].coords[0])
+            weather = self._get_cached_weather(date_str, self.place_table.place(start_loc).coords[0])
             
             # Find optimal route using A* algorithm
-            route_info = self._find_route_astar(start_loc, end_loc)
+            search_mode = self.planner_search_mode.get()
+            if search_mode == TRAFFIC_MODE_LABEL:
+                try:
+                    departure = datetime.strptime(f"{date_str} {self.planner_departure.get()}", "%Y-%m-%d %H:%M")
+                except ValueError:
+                    messagebox.showerror("Error", "Please enter the date as YYYY-MM-DD and departure time as HH:MM")
+                    return
+                route_info = self.traffic.route(start_loc, end_loc, departure)
+            elif search_mode == MATRIX_MODE_LABEL and self._get_travel_matrix() is not None:
+                route_info = self.travel_matrix.route(start_loc, end_loc)
+            else:
+                route_info = self._find_route_astar(start_loc, end_loc, SEARCH_MODE_LABELS.get(search_mode, "astar"))
             
             # Get smart recommendations using BST and heap
             recommendations = self._get_smart_recommendations(
@@ -501,116 +540,20 @@ class SimplifiedTravelGuideApp:
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
-    def _find_route_astar(self, start: str, end: str) -> Route:
+    def _find_route_astar(self, start: str, end: str, mode: str = "astar") -> Route:
         """A* algorithm implementation for optimal pathfinding"""
-        cache_key = f"{start}-{end}"
-        if cache_key in self.route_cache:
-            return self.route_cache[cache_key]
-        
-        def heuristic(a: str, b: str) -> float:
-            """Euclidean distance heuristic"""
-            coord_a = places_data[a].coords
-            coord_b = places_data[b].coords
-            return math.sqrt((coord_a[0] - coord_b[0])**2 + (coord_a[1] - coord_b[1])**2)
-        
-        # Priority queue: (f_score, g_score, node, path)
-        open_set = [(0, 0, start, [start])]
-        closed_set = set()
-        g_scores = {start: 0}
-        
-        while open_set:
-            f_score, g_score, current, path = heapq.heappop(open_set)
-            
-            if current in closed_set:
-                continue
-                
-            if current == end:
-                # Calculate route metrics
-                total_distance = sum(
-                    graph[path[i]][path[i+1]]["dist"] 
-                    for i in range(len(path)-1)
-                )
-                total_time = sum(
-                    graph[path[i]][path[i+1]]["time"] 
-                    for i in range(len(path)-1)
-                )
-                total_cost = sum(places_data[place].cost for place in path)
-                
-                route = Route(path, total_distance, total_time, total_cost)
-                self.route_cache[cache_key] = route
-                return route
-            
-            closed_set.add(current)
-            
-            for neighbor, edge_data in graph.get(current, {}).items():
-                if neighbor in closed_set:
-                    continue
-                
-                tentative_g = g_score + edge_data["dist"] + edge_data["time"] * 0.1
-                
-                if neighbor not in g_scores or tentative_g < g_scores[neighbor]:
-                    g_scores[neighbor] = tentative_g
-                    f_score = tentative_g + heuristic(neighbor, end)
-                    heapq.heappush(open_set, (f_score, tentative_g, neighbor, path + [neighbor]))
-        
-        # Fallback to simple path if A* fails
-        return Route([start, end], 0, 0, 0)
+        return self.route_cache.get_or_compute(
+            self.compiled_graph, start, end, "combined", mode,
+            lambda: find_route(self.compiled_graph, start, end, "combined", mode=mode)
+        )
 
     def _get_smart_recommendations(self, budget: int, experience_type: str, route_info: Route, date_str: str) -> List[Place]:
-        """Enhanced recommendation system using BST and priority queue"""
-        # Get places by rating range using BST
-        high_rated_places = self.place_bst.search_by_rating_range(4.0, 5.0)
-        
-        # Filter by category and budget
-        filtered_places = []
-        for place in high_rated_places:
-            if place.name in route_info.path:
-                continue
-            if experience_type != "Any" and place.category != experience_type:
-                continue
-            if place.cost <= budget:
-                filtered_places.append(place)
-        
-        # Priority queue for recommendations (negative rating for max-heap behavior)
-        recommendations_heap = []
-        
-        for place in filtered_places:
-            # Calculate priority score
-            base_score = place.rating
-            
-            # Boost score for places along the route
-            route_boost = 1.2 if any(
-                neighbor in route_info.path 
-                for neighbor in graph.get(place.name, {})
-            ) else 1.0
-            
-            # Time-based boost
-            time_boost = 1.1 if self._is_good_time(place.name, date_str) else 0.9
-            
-            # Popularity boost
-            popularity_boost = 1.0 + place.popularity_score * 0.2
-            
-            final_score = base_score * route_boost * time_boost * popularity_boost
-            
-            heapq.heappush(recommendations_heap, (-final_score, place))
-        
-        # Extract top recommendations
-        recommendations = []
-        total_cost = 0
-        total_time = 0
-        
-        while recommendations_heap and len(recommendations) < 5:
-            score, place = heapq.heappop(recommendations_heap)
-            
-            if (self.strict_budget_var.get() and total_cost + place.cost > budget):
-                continue
-            if total_time + place.visit_time > 10:
-                continue
-                
-            recommendations.append(place)
-            total_cost += place.cost
-            total_time += place.visit_time
-        
+        """Enhanced recommendation system using a columnar place table and itinerary optimization"""
+        # Score the whole catalog in one pass over its columns and plan the best-scoring places
+        self.planner_itinerary, recommendations = recommend_itinerary(
+            self.place_table, self.compiled_graph, route_info.path, budget, experience_type, date_str,
+            self.strict_budget_var.get()
+        )
         return recommendations
 
     def _display_enhanced_results(self, weather: dict, route_info: Route, recommendations: List[Place], budget: int):
@@ -658,11 +601,19 @@ class SimplifiedTravelGuideApp:
         if recommendations:
             rec_header = ctk.CTkLabel(
                 self.planner_results,
-                text="🎯 Smart Recommendations",
+                text="🎯 Smart Recommendations (in visiting order)",
                 font=ctk.CTkFont(size=18, weight="bold")
             )
             rec_header.pack(pady=15)
             
+            itinerary = self.planner_itinerary
+            ctk.CTkLabel(
+                self.planner_results,
+                text=f"⏱ {itinerary.minutes / 60:.1f} hours including {itinerary.travel_minutes:.0f} min of travel | "
+                     f"Entry fees: ₹{itinerary.cost}",
+                font=ctk.CTkFont(size=12)
+            ).pack(pady=(0, 10))
+            
             for i, place in enumerate(recommendations):
                 self._create_place_card(self.planner_results, place, i+1)
 
@@ -788,7 +739,7 @@ class SimplifiedTravelGuideApp:
         ctk.CTkLabel(loc_frame, text="📍 Location:", font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w")
         self.weather_location = ctk.CTkComboBox(
             loc_frame,
-            values=list(places_data.keys()),
+            values=self.place_table.keys,
             height=35,
             corner_radius=8
         )
@@ -843,7 +794,7 @@ class SimplifiedTravelGuideApp:
             widget.destroy()
         
         try:
-            weather = self._get_cached_weather(date_str, places_data[location].coords[0])
+            weather = self._get_cached_weather(date_str, self.place_table.place(location).coords[0])
             self._create_weather_display(self.weather_results, location, date_str, weather)
             
         except Exception as e:
@@ -937,7 +888,7 @@ class SimplifiedTravelGuideApp:
         for i in range(7):
             date = base_date + timedelta(days=i)
             date_str = date.strftime("%Y-%m-%d")
-            weather = self._get_cached_weather(date_str, places_data[location].coords[0])
+            weather = self._get_cached_weather(date_str, self.place_table.place(location).coords[0])
             forecasts.append((date_str, weather))
         
         # Create forecast display
@@ -1089,7 +1040,7 @@ Lowest Temperature: {min_temp}°C
         
         self.parking_location = ctk.CTkComboBox(
             loc_frame,
-            values=list(places_data.keys()),
+            values=self.place_table.keys,
             height=40,
             corner_radius=10,
             font=ctk.CTkFont(size=14),
@@ -1126,12 +1077,21 @@ Lowest Temperature: {min_temp}°C
         parking_data = self._get_parking_data()
         
         if location not in parking_data:
+            nearest = self._nearest_parking(location, parking_data)
+            if nearest is None:
+                ctk.CTkLabel(
+                    self.parking_results,
+                    text=f"No parking data available for {location}",
+                    font=ctk.CTkFont(size=14)
+                ).pack(pady=20)
+                return
+            lot, km = nearest
             ctk.CTkLabel(
                 self.parking_results,
-                text=f"No parking data available for {location}",
+                text=f"No parking data for {location} - nearest tracked parking is {lot}, {km:.1f} km away",
                 font=ctk.CTkFont(size=14)
-            ).pack(pady=20)
-            return
+            ).pack(pady=(20, 0))
+            location = lot
         
         data = parking_data[location]
         prediction = self._predict_parking_availability(data)
@@ -1139,6 +1099,16 @@ Lowest Temperature: {min_temp}°C
         # Create parking display
         self._create_parking_display(self.parking_results, location, data, prediction)
 
+    def _nearest_parking(self, location: str, parking_data: dict) -> Optional[Tuple[str, float]]:
+        """Closest place with parking data to location, and its straight-line distance in km"""
+        table = self.place_table
+        lots = [lot for lot in parking_data if lot in table]
+        if location not in table or not lots:
+            return None
+        lot_index = SpatialIndex([table.place(lot).coords for lot in lots])
+        rows, km = lot_index.nearest(*table.place(location).coords)
+        return lots[rows[0]], float(km[0])
+
     def _get_parking_data(self):
         """Get parking data"""
         return {
@@ -1622,11 +1592,12 @@ Lowest Temperature: {min_temp}°C
         ctk.CTkLabel(start_frame, text="🚀 Start Location:", font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w")
         self.route_start = ctk.CTkComboBox(
             start_frame,
-            values=list(places_data.keys()),
+            values=self.place_table.keys,
             height=35,
             corner_radius=8
         )
         self.route_start.pack(fill="x", pady=5)
+        self._enable_place_search(self.route_start)
         
         # End location
         end_frame = ctk.CTkFrame(route_grid, fg_color="transparent")
@@ -1635,11 +1606,12 @@ Lowest Temperature: {min_temp}°C
         ctk.CTkLabel(end_frame, text="🏁 End Location:", font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w")
         self.route_end = ctk.CTkComboBox(
             end_frame,
-            values=list(places_data.keys()),
+            values=self.place_table.keys,
             height=35,
             corner_radius=8
         )
         self.route_end.pack(fill="x", pady=5)
+        self._enable_place_search(self.route_end)
         
         # Options (simplified - removed elevation options)
         options_frame = ctk.CTkFrame(input_frame, fg_color="transparent")
@@ -1651,6 +1623,15 @@ Lowest Temperature: {min_temp}°C
         ctk.CTkCheckBox(options_frame, text="📏 Optimize for Distance", variable=self.optimize_distance_var).pack(side="left", padx=10)
         ctk.CTkCheckBox(options_frame, text="⚡ Optimize for Time", variable=self.optimize_time_var).pack(side="left", padx=10)
         
+        self.route_search_mode = ctk.CTkComboBox(
+            options_frame,
+            values=list(SEARCH_MODE_LABELS.keys()) + [HIERARCHY_MODE_LABEL],
+            height=35,
+            corner_radius=8
+        )
+        self.route_search_mode.pack(side="left", padx=10)
+        self.route_search_mode.set("A*")
+        
         # Buttons
         btn_frame = ctk.CTkFrame(input_frame, fg_color="transparent")
         btn_frame.pack(pady=15)
@@ -1684,8 +1665,8 @@ Lowest Temperature: {min_temp}°C
 
     def _find_optimal_route(self):
         """Find optimal route with A* algorithm"""
-        start = self.route_start.get()
-        end = self.route_end.get()
+        start = self._resolve_place(self.route_start)
+        end = self._resolve_place(self.route_end)
         
         if not start or not end:
             messagebox.showerror("Error", "Please select both start and end locations")
@@ -1710,68 +1691,55 @@ Lowest Temperature: {min_temp}°C
             
             # Display results
             self._display_route_results(route_info)
+            self._display_route_alternatives(pareto_routes(
+                self.compiled_graph, start, end, ROUTE_ALTERNATIVES_EPSILON, max_labels=PARETO_LABEL_LIMIT
+            ))
+            self._create_more_routes_section(start, end)
             
         except Exception as e:
             messagebox.showerror("Error", f"Route calculation failed: {str(e)}")
 
     def _find_route_astar_simple(self, start: str, end: str) -> Route:
         """Simplified A* algorithm without elevation"""
-        def heuristic(a: str, b: str) -> float:
-            coord_a = places_data[a].coords
-            coord_b = places_data[b].coords
-            return math.sqrt((coord_a[0] - coord_b[0])**2 + (coord_a[1] - coord_b[1])**2)
+        mode_label = self.route_search_mode.get()
+        profile = self._route_profile()
         
-        def calculate_cost(current: str, neighbor: str, edge_data: dict) -> float:
-            cost = 0
-            
-            if self.optimize_distance_var.get():
-                cost += edge_data["dist"] * 1.0
-            
-            if self.optimize_time_var.get():
-                cost += edge_data["time"] * 0.1
-            
-            return cost if cost > 0 else edge_data["dist"]
-        
-        # A* implementation
-        open_set = [(0, 0, start, [start])]
-        closed_set = set()
-        g_scores = {start: 0}
-        
-        while open_set:
-            f_score, g_score, current, path = heapq.heappop(open_set)
-            
-            if current in closed_set:
-                continue
-            
-            if current == end:
-                # Calculate final metrics
-                total_distance = sum(
-                    graph[path[i]][path[i+1]]["dist"] 
-                    for i in range(len(path)-1)
-                )
-                total_time = sum(
-                    graph[path[i]][path[i+1]]["time"] 
-                    for i in range(len(path)-1)
-                )
-                total_cost = sum(places_data[place].cost for place in path)
-                
-                return Route(path, total_distance, total_time, total_cost)
-            
-            closed_set.add(current)
-            
-            for neighbor, edge_data in graph.get(current, {}).items():
-                if neighbor in closed_set:
-                    continue
-                
-                tentative_g = g_score + calculate_cost(current, neighbor, edge_data)
-                
-                if neighbor not in g_scores or tentative_g < g_scores[neighbor]:
-                    g_scores[neighbor] = tentative_g
-                    f_score = tentative_g + heuristic(neighbor, end)
-                    heapq.heappush(open_set, (f_score, tentative_g, neighbor, path + [neighbor]))
+        if mode_label == HIERARCHY_MODE_LABEL:
+            return self.route_cache.get_or_compute(
+                self.compiled_graph, start, end, profile, HIERARCHY_MODE_LABEL,
+                lambda: self._get_hierarchy(profile).route(start, end)
+            )
         
-        # Fallback
-        return Route([start, end], 0, 0, 0)
+        mode = SEARCH_MODE_LABELS.get(mode_label, "astar")
+        return self.route_cache.get_or_compute(
+            self.compiled_graph, start, end, profile, mode,
+            lambda: find_route(self.compiled_graph, start, end, profile, mode=mode)
+        )
+
+    def _route_profile(self) -> str:
+        """Routing profile selected by the optimization checkboxes"""
+        if self.optimize_distance_var.get() and self.optimize_time_var.get():
+            return "combined"
+        if self.optimize_time_var.get():
+            return "time"
+        # Distance only, or neither box ticked: plain distance
+        return "distance"
+
+    def _get_travel_matrix(self):
+        """Load (or build once) the all-pairs travel matrix; None if the graph is too large for one"""
+        if self.travel_matrix is None:
+            self.travel_matrix = load_or_build_matrix(
+                os.path.join(tempfile.gettempdir(), "dehradun_travel_matrix.bin"),
+                self.compiled_graph
+            )
+        return self.travel_matrix
+
+    def _get_hierarchy(self, profile: str):
+        """Load (or build once) the Contraction Hierarchy for a routing profile"""
+        if profile not in self.hierarchies:
+            path = os.path.join(tempfile.gettempdir(), f"dehradun_ch_{profile}.bin")
+            self.hierarchies[profile] = load_or_build_hierarchy(path, self.compiled_graph, profile)
+        return self.hierarchies[profile]
 
     def _display_route_results(self, route_info: Route):
         """Display route results"""
@@ -1819,6 +1787,87 @@ Lowest Temperature: {min_temp}°C
         # Step-by-step directions
         self._create_step_directions(self.route_results, route_info)
 
+    def _display_route_alternatives(self, routes: List[Route]):
+        """List the routes no other route beats on distance, time and cost"""
+        if len(routes) < 2:
+            return
+        
+        alternatives_frame = ctk.CTkFrame(self.route_results, corner_radius=15)
+        alternatives_frame.pack(fill="x", padx=20, pady=10)
+        
+        ctk.CTkLabel(
+            alternatives_frame,
+            text="⚖ Trade-off Alternatives",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).pack(pady=15)
+        
+        for i, route in enumerate(routes, 1):
+            option_frame = ctk.CTkFrame(alternatives_frame, corner_radius=8)
+            option_frame.pack(fill="x", padx=15, pady=5)
+            
+            option_text = f"{i}. {' → '.join(route.path)}\n"
+            option_text += f"   📏 {route.distance:.1f} km • ⏱ {route.time:.0f} min • 💰 ₹{route.cost}"
+            
+            ctk.CTkLabel(
+                option_frame,
+                text=option_text,
+                font=ctk.CTkFont(size=12),
+                anchor="w",
+                justify="left",
+                wraplength=700
+            ).pack(fill="x", padx=10, pady=8)
+
+    def _create_more_routes_section(self, start: str, end: str):
+        """Next-best loopless routes, computed one at a time on demand"""
+        self.more_routes = iter_shortest_routes(self.compiled_graph, start, end, self._route_profile())
+        # The first one is the route already shown
+        next(self.more_routes, None)
+        self.more_routes_shown = 0
+        
+        more_frame = ctk.CTkFrame(self.route_results, corner_radius=15)
+        more_frame.pack(fill="x", padx=20, pady=10)
+        
+        ctk.CTkLabel(
+            more_frame,
+            text="🔀 Alternative Routes",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).pack(pady=15)
+        
+        self.more_routes_list = ctk.CTkFrame(more_frame, fg_color="transparent")
+        self.more_routes_list.pack(fill="x", padx=15)
+        
+        self.more_routes_button = ctk.CTkButton(
+            more_frame,
+            text="➕ Show More Routes",
+            command=self._show_next_route,
+            height=35,
+            corner_radius=8
+        )
+        self.more_routes_button.pack(pady=10)
+
+    def _show_next_route(self):
+        """Append the next-best route to the alternatives list"""
+        route = next(self.more_routes, None)
+        if route is None:
+            self.more_routes_button.configure(text="No more routes", state="disabled")
+            return
+        
+        self.more_routes_shown += 1
+        option_frame = ctk.CTkFrame(self.more_routes_list, corner_radius=8)
+        option_frame.pack(fill="x", pady=5)
+        
+        option_text = f"#{self.more_routes_shown + 1}. {' → '.join(route.path)}\n"
+        option_text += f"   📏 {route.distance:.1f} km • ⏱ {route.time:.0f} min • 💰 ₹{route.cost}"
+        
+        ctk.CTkLabel(
+            option_frame,
+            text=option_text,
+            font=ctk.CTkFont(size=12),
+            anchor="w",
+            justify="left",
+            wraplength=700
+        ).pack(fill="x", padx=10, pady=8)
+
     def _create_step_directions(self, parent, route_info: Route):
         """Create step-by-step directions"""
         directions_frame = ctk.CTkFrame(parent, corner_radius=15)
@@ -1833,18 +1882,21 @@ Lowest Temperature: {min_temp}°C
         directions_list = ctk.CTkScrollableFrame(directions_frame, height=200)
         directions_list.pack(fill="both", expand=True, padx=15, pady=10)
         
-        for i in range(len(route_info.path) - 1):
-            current = route_info.path[i]
-            next_place = route_info.path[i + 1]
+        compiled = self.compiled_graph
+        # Route.path spells the stops out on every read, so read it once
+        path = route_info.path
+        for i in range(len(path) - 1):
+            current = path[i]
+            next_place = path[i + 1]
             
-            if next_place in graph.get(current, {}):
-                edge_data = graph[current][next_place]
+            edge = compiled.edge_id(compiled.node_id(current), compiled.node_id(next_place))
+            if edge >= 0:
                 
                 step_frame = ctk.CTkFrame(directions_list, corner_radius=8)
                 step_frame.pack(fill="x", pady=5)
                 
                 step_text = f"{i+1}. From {current} to {next_place}\n"
-                step_text += f"   📏 {edge_data['dist']} km • ⏱ {edge_data['time']} min"
+                step_text += f"   📏 {compiled._dist[edge]:g} km • ⏱ {compiled._time[edge]:g} min"
                 
                 ctk.CTkLabel(
                     step_frame,
@@ -1856,8 +1908,8 @@ Lowest Temperature: {min_temp}°C
 
     def _show_route_on_map(self):
         """Show the calculated route on an interactive map"""
-        start = self.route_start.get()
-        end = self.route_end.get()
+        start = self._resolve_place(self.route_start)
+        end = self._resolve_place(self.route_end)
         
         if not start or not end:
             messagebox.showwarning("Warning", "Please select start and end locations first")
@@ -1932,6 +1984,40 @@ Lowest Temperature: {min_temp}°C
         self.map_cost_filter.pack(side="left", padx=10)
         self.map_cost_filter.set("All Costs")
         
+        # Reachability filters: places within a travel-time budget or a
+        # straight-line distance of a start
+        reach_options = ctk.CTkFrame(filter_frame, fg_color="transparent")
+        reach_options.pack(fill="x", pady=(0, 10))
+        
+        self.map_reach_origin = ctk.CTkComboBox(
+            reach_options,
+            values=["From Anywhere"] + self.place_table.keys,
+            height=35,
+            width=220,
+            corner_radius=8
+        )
+        self.map_reach_origin.pack(side="left", padx=10)
+        self.map_reach_origin.set("From Anywhere")
+        self._enable_place_search(self.map_reach_origin, fixed=("From Anywhere",))
+        
+        self.map_reach_budget = ctk.CTkComboBox(
+            reach_options,
+            values=["Any Travel Time"] + list(REACH_BUDGET_LABELS.keys()),
+            height=35,
+            corner_radius=8
+        )
+        self.map_reach_budget.pack(side="left", padx=10)
+        self.map_reach_budget.set("Any Travel Time")
+        
+        self.map_near_radius = ctk.CTkComboBox(
+            reach_options,
+            values=["Any Distance"] + list(NEAR_RADIUS_LABELS.keys()),
+            height=35,
+            corner_radius=8
+        )
+        self.map_near_radius.pack(side="left", padx=10)
+        self.map_near_radius.set("Any Distance")
+        
         # Map action button (simplified)
         btn_frame = ctk.CTkFrame(controls_frame, fg_color="transparent")
         btn_frame.pack(pady=15)
@@ -1964,56 +2050,70 @@ Lowest Temperature: {min_temp}°C
             category_filter = self.map_category_filter.get()
             rating_filter = self.map_rating_filter.get()
             cost_filter = self.map_cost_filter.get()
+            origin = self.map_reach_origin.get()
+            if origin != "From Anywhere":
+                origin = self._resolve_place(self.map_reach_origin)
+            reach_times = self._get_reach_times(origin, self.map_reach_budget.get())
+            near_km = self._get_near_distances(origin, self.map_near_radius.get())
             
             # Filter places
-            filtered_places = self._apply_map_filters(category_filter, rating_filter, cost_filter)
+            filtered_places = self._apply_map_filters(category_filter, rating_filter, cost_filter,
+                                                      reach_times, near_km)
             
             # Create map
-            self._generate_filtered_map(filtered_places)
+            self._generate_filtered_map(filtered_places, reach_times, near_km)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate map: {str(e)}")
 
-    def _apply_map_filters(self, category_filter: str, rating_filter: str, cost_filter: str) -> Dict[str, Place]:
+    def _get_reach_times(self, origin: str, budget_label: str) -> Optional[Dict[str, float]]:
+        """Travel minutes to every place within the budget of origin; None when not filtering"""
+        if origin not in self.place_table or budget_label not in REACH_BUDGET_LABELS:
+            return None
+        return dict(self.reachability.within(origin, REACH_BUDGET_LABELS[budget_label]))
+
+    def _get_near_distances(self, origin: str, radius_label: str) -> Optional[Dict[str, float]]:
+        """Straight-line km to every place within the radius of origin; None when not filtering"""
+        if origin not in self.place_table or radius_label not in NEAR_RADIUS_LABELS:
+            return None
+        lat, lon = self.place_table.place(origin).coords
+        rows, km = self.place_index.within(lat, lon, NEAR_RADIUS_LABELS[radius_label])
+        return {self.place_table.keys[row]: float(d) for row, d in zip(rows, km)}
+
+    def _apply_map_filters(self, category_filter: str, rating_filter: str, cost_filter: str,
+                           reach_times: Optional[Dict[str, float]] = None,
+                           near_km: Optional[Dict[str, float]] = None) -> Dict[str, Place]:
         """Apply filters to places"""
-        filtered = {}
+        table = self.place_table
+        rows = table.query(
+            category=None if category_filter == "All Categories" else category_filter,
+            rating=MAP_RATING_RANGES.get(rating_filter),
+            cost=MAP_COST_RANGES.get(cost_filter)
+        )
         
-        for name, place in places_data.items():
-            # Category filter
-            if category_filter != "All Categories" and place.category != category_filter:
-                continue
-            
-            # Rating filter
-            if rating_filter == "4.5+ Stars" and place.rating < 4.5:
-                continue
-            elif rating_filter == "4.0+ Stars" and place.rating < 4.0:
-                continue
-            elif rating_filter == "3.5+ Stars" and place.rating < 3.5:
-                continue
-            
-            # Cost filter
-            if cost_filter == "Free" and place.cost > 0:
-                continue
-            elif cost_filter == "Under ₹50" and place.cost >= 50:
-                continue
-            elif cost_filter == "Under ₹100" and place.cost >= 100:
+        filtered = {}
+        for row in rows:
+            name = table.keys[row]
+            # Reachability filter
+            if reach_times is not None and name not in reach_times:
                 continue
-            elif cost_filter == "Under ₹200" and place.cost >= 200:
+            if near_km is not None and name not in near_km:
                 continue
-            
-            filtered[name] = place
+            filtered[name] = table.places[row]
         
         return filtered
 
-    def _generate_filtered_map(self, filtered_places: Dict[str, Place]):
+    def _generate_filtered_map(self, filtered_places: Dict[str, Place],
+                               reach_times: Optional[Dict[str, float]] = None,
+                               near_km: Optional[Dict[str, float]] = None):
         """Generate map with filtered places"""
         if not filtered_places:
             messagebox.showinfo("Info", "No places match the selected filters")
             return
         
-        # Create map centered on Dehradun
+        # Create map centered on the city
         map_obj = folium.Map(
-            location=[30.3256, 78.0437],
+            location=list(self.city.center),
             zoom_start=12,
             tiles="cartodbpositron"
         )
@@ -2028,6 +2128,11 @@ Lowest Temperature: {min_temp}°C
         # Add markers for filtered places
         for name, place in filtered_places.items():
             color = category_colors.get(place.category, "blue")
+            reach_line = ""
+            if reach_times is not None:
+                reach_line = f'<p style="margin: 2px 0;"><b>Travel Time:</b> {reach_times[name]:.0f} min</p>'
+            if near_km is not None:
+                reach_line += f'<p style="margin: 2px 0;"><b>Distance:</b> {near_km[name]:.1f} km</p>'
             
             # Create detailed popup
             popup_html = f"""
@@ -2038,6 +2143,7 @@ Lowest Temperature: {min_temp}°C
                 <p style="margin: 2px 0;"><b>Rating:</b> ⭐ {place.rating}/5.0</p>
                 <p style="margin: 2px 0;"><b>Cost:</b> ₹{place.cost}</p>
                 <p style="margin: 2px 0;"><b>Visit Time:</b> {place.visit_time} hours</p>
+                {reach_line}
                 <hr style="margin: 5px 0;">
                 <p style="margin: 2px 0; font-size: 12px;">{place.description}</p>
             </div>
@@ -2058,12 +2164,13 @@ Lowest Temperature: {min_temp}°C
     def _generate_route_map(self, route_info: Route):
         """Generate route map"""
         try:
-            if len(route_info.path) < 2:
+            path = route_info.path
+            if len(path) < 2:
                 messagebox.showerror("Error", "Route needs at least 2 points")
                 return
             
             # Get coordinates for the route
-            coords = [places_data[location].coords for location in route_info.path]
+            coords = [self.place_table.place(location).coords for location in path]
             
             # Create map centered on the route
             center_lat = sum(coord[0] for coord in coords) / len(coords)
@@ -2076,14 +2183,14 @@ Lowest Temperature: {min_temp}°C
             )
             
             # Add route markers
-            for i, (location, coord) in enumerate(zip(route_info.path, coords)):
-                place = places_data[location]
+            for i, (location, coord) in enumerate(zip(path, coords)):
+                place = self.place_table.place(location)
                 
                 # Different icons for start, end, and waypoints
                 if i == 0:
                     icon_color = "green"
                     icon_symbol = "play"
-                elif i == len(route_info.path) - 1:
+                elif i == len(path) - 1:
                     icon_color = "red"
                     icon_symbol = "stop"
                 else:
@@ -2094,7 +2201,7 @@ Lowest Temperature: {min_temp}°C
                 popup_html = f"""
                 <div style="width: 250px;">
                     <h4>{location}</h4>
-                    <p><b>Step:</b> {i+1} of {len(route_info.path)}</p>
+                    <p><b>Step:</b> {i+1} of {len(path)}</p>
                     <p><b>Category:</b> {place.category}</p>
                     <p><b>Rating:</b> ⭐ {place.rating}</p>
                     <p><b>Cost:</b> ₹{place.cost}</p>
@@ -2229,25 +2336,10 @@ Lowest Temperature: {min_temp}°C
                 "comment": "Perfect for outdoor activities!"
             }
 
-    def _is_good_time(self, place: str, date_str: str) -> bool:
-        """Determine if it's a good time to visit a place"""
-        try:
-            date = datetime.strptime(date_str, "%Y-%m-%d")
-            is_weekend = date.weekday() >= 5
-            place_category = places_data[place].category
-            
-            if is_weekend and place_category in ["Nature", "Landmark", "Adventure", "Market"]:
-                return True
-            if not is_weekend and place_category in ["Cultural", "Institution"]:
-                return True
-            return False
-        except:
-            return True
-
     def _get_best_time(self, place: str) -> str:
         """Get the best time to visit a place"""
-        coords = places_data[place].coords[0]
-        category = places_data[place].category
+        coords = self.place_table.place(place).coords[0]
+        category = self.place_table.place(place).category
         
         if category in ["Nature", "Adventure"]:
             return "Morning (8-11 AM)"
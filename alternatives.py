@@ -0,0 +1,214 @@
+import heapq
+import math
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from routing import CompiledGraph, RoutingProfile, get_profile
+from travel_data import Route
+
+
+def k_shortest_routes(compiled: CompiledGraph, start: str, end: str, k: int = 5,
+                      profile: Union[str, RoutingProfile] = "combined",
+                      stats: Optional[Dict[str, int]] = None) -> List[Route]:
+    """The k cheapest loopless start -> end routes, cheapest first"""
+    routes = []
+    for route in iter_shortest_routes(compiled, start, end, profile, stats):
+        routes.append(route)
+        if len(routes) == k:
+            break
+    return routes
+
+
+def iter_shortest_routes(compiled: CompiledGraph, start: str, end: str,
+                         profile: Union[str, RoutingProfile] = "combined",
+                         stats: Optional[Dict[str, int]] = None) -> Iterator[Route]:
+    """Yield loopless start -> end routes in order of cost (Yen's algorithm)
+
+    Routes are produced lazily, so asking for one more alternative only
+    runs the spur searches for the last route yielded. Every spur search
+    shares one reverse shortest-path tree rooted at end (see _ReverseTree):
+    removing edges and root nodes can only make routes longer, so its costs
+    are an exact, consistent A* potential, and a spur search stops at the
+    first node whose tree path avoids everything removed. Spur nodes start
+    where a route left its parent (Lawler's refinement), since earlier ones
+    were already spurred from the parent.
+    """
+    profile = get_profile(profile)
+    source = compiled.node_id(start)
+    goal = compiled.node_id(end)
+    weights = compiled._layer(profile)[1]
+    targets = compiled._targets
+    if stats is None:
+        stats = {}
+    stats.update(spur_searches=0, expanded=0)
+
+    tree = _ReverseTree(compiled, goal, weights, compiled.potentials(source, profile).tolist(), stats)
+    if source == goal or tree.cost_to_goal(source) == math.inf:
+        return
+
+    # Candidates: (cost, tie-breaker, nodes, edges, index of the spur node they left their parent at)
+    first_edges = tree.path(source)
+    candidates = [(tree.cost_to_goal(source), 0, _path_nodes(source, first_edges, targets), first_edges, 0)]
+    accepted: List[Tuple[List[int], List[int]]] = []
+    seen: Set[Tuple[int, ...]] = {tuple(first_edges)}
+    counter = 1
+
+    while candidates:
+        _, _, nodes, edges, deviation = heapq.heappop(candidates)
+        accepted.append((nodes, edges))
+        yield compiled.to_route(nodes)
+
+        prefix = [0.0]
+        for e in edges:
+            prefix.append(prefix[-1] + weights[e])
+
+        blocked = set(nodes[:deviation])
+        for i in range(deviation, len(nodes) - 1):
+            spur = nodes[i]
+            removed = {other_edges[i] for other_nodes, other_edges in accepted
+                       if len(other_edges) > i and other_nodes[:i + 1] == nodes[:i + 1]}
+            spur_edges = _spur_search(compiled, spur, weights, tree, blocked, removed, stats)
+            blocked.add(spur)
+            if spur_edges is None:
+                continue
+            candidate_edges = edges[:i] + spur_edges
+            key = tuple(candidate_edges)
+            if key in seen:
+                continue
+            seen.add(key)
+            spur_cost = sum(weights[e] for e in spur_edges)
+            heapq.heappush(candidates, (prefix[i] + spur_cost, counter,
+                                        nodes[:i] + _path_nodes(spur, spur_edges, targets), candidate_edges, i))
+            counter += 1
+
+
+class _ReverseTree:
+    """Shortest-path tree toward one goal, grown only as far as it is asked about
+
+    A reverse A* from goal aimed at the route's start settles roughly what a
+    forward A* query would. When a spur search needs the cost to goal from
+    a node that is not settled yet, the same search resumes until it is
+    (Reverse Resumable A*). Settled costs are exact because the potential
+    is consistent.
+    """
+
+    def __init__(self, compiled: CompiledGraph, goal: int, weights: List[float],
+                 potential: List[float], stats: Dict[str, int]):
+        self.goal = goal
+        self.targets = compiled._targets
+        self._offsets = compiled._rev_offsets
+        self._sources = compiled._rev_sources
+        self._edges = compiled._rev_edges
+        self._weights = weights
+        self._potential = potential
+        self._stats = stats
+        self._g = {goal: 0.0}
+        self._closed: Dict[int, float] = {}
+        self.tree_edge: Dict[int, int] = {goal: -1}
+        self._open = [(potential[goal], 0.0, goal)]
+
+    def cost_to_goal(self, node: int) -> float:
+        """Exact cost from node to goal (inf if goal is unreachable from it)"""
+        closed = self._closed
+        if node in closed:
+            return closed[node]
+        open_set, g_scores, potential = self._open, self._g, self._potential
+        while open_set:
+            _, g_score, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            closed[current] = g_score
+            self._stats["expanded"] += 1
+            for i in range(self._offsets[current], self._offsets[current + 1]):
+                neighbor = self._sources[i]
+                if neighbor in closed:
+                    continue
+                e = self._edges[i]
+                tentative_g = g_score + self._weights[e]
+                if tentative_g < g_scores.get(neighbor, math.inf):
+                    g_scores[neighbor] = tentative_g
+                    self.tree_edge[neighbor] = e
+                    heapq.heappush(open_set, (tentative_g + potential[neighbor], tentative_g, neighbor))
+            if current == node:
+                return g_score
+        # Search exhausted: node cannot reach goal
+        closed[node] = math.inf
+        return math.inf
+
+    def path(self, node: int) -> List[int]:
+        """Tree edges from a settled node down to goal"""
+        edges = []
+        while node != self.goal:
+            e = self.tree_edge[node]
+            edges.append(e)
+            node = self.targets[e]
+        return edges
+
+
+def _path_nodes(source: int, edges: List[int], targets: List[int]) -> List[int]:
+    return [source] + [targets[e] for e in edges]
+
+
+def _spur_search(compiled: CompiledGraph, spur: int, weights: List[float], tree: _ReverseTree,
+                 blocked: Set[int], removed: Set[int], stats: Dict[str, int]) -> Optional[List[int]]:
+    """Cheapest spur -> goal edge list avoiding blocked nodes and removed edges; None if cut off
+
+    The first popped node whose tree path is still usable finishes the
+    search: its f-score is exact for that completion and a lower bound for
+    every other one.
+    """
+    targets = compiled._targets
+    stats["spur_searches"] += 1
+    if tree.cost_to_goal(spur) == math.inf:
+        return None
+
+    # clean[u]: the tree path from u avoids blocked nodes and removed edges.
+    # The spur node is always checked first, so a later tree path that runs
+    # back through it (and would close a loop) finds it marked unusable.
+    clean = {tree.goal: True}
+    tree_edge = tree.tree_edge
+
+    def tree_path_usable(node: int) -> bool:
+        walked = []
+        while node not in clean:
+            walked.append(node)
+            if node in blocked or tree_edge[node] in removed:
+                clean[node] = False
+                break
+            node = targets[tree_edge[node]]
+        usable = clean[node]
+        for u in walked:
+            clean[u] = usable
+        return usable
+
+    offsets = compiled._offsets
+    g_scores = {spur: 0.0}
+    parent: Dict[int, Tuple[int, int]] = {}
+    closed = set()
+    open_set = [(tree.cost_to_goal(spur), 0.0, spur)]
+    while open_set:
+        _, g_score, current = heapq.heappop(open_set)
+        if current in closed:
+            continue
+        if tree_path_usable(current):
+            edges = []
+            node = current
+            while node != spur:
+                node, e = parent[node]
+                edges.append(e)
+            edges.reverse()
+            return edges + tree.path(current)
+        closed.add(current)
+        stats["expanded"] += 1
+        for e in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[e]
+            if neighbor in blocked or neighbor in closed or e in removed:
+                continue
+            h = tree.cost_to_goal(neighbor)
+            if h == math.inf:
+                continue
+            tentative_g = g_score + weights[e]
+            if tentative_g < g_scores.get(neighbor, math.inf):
+                g_scores[neighbor] = tentative_g
+                parent[neighbor] = (current, e)
+                heapq.heappush(open_set, (tentative_g + h, tentative_g, neighbor))
+    return None
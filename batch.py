@@ -0,0 +1,85 @@
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from routing import GRAPH_MAGIC, CompiledGraph, find_route
+from snapshot import read_snapshot
+from travel_data import Route
+
+# (start, end, profile name)
+Query = Tuple[str, str, str]
+
+# Queries per task: enough to amortize the round trip to a worker, few
+# enough that results keep streaming back
+BATCH_CHUNK_SIZE = 64
+
+# Each worker process memory-maps the graph once, at startup
+_worker_graph: Optional[CompiledGraph] = None
+
+
+def route_batch(compiled: CompiledGraph, queries: Iterable[Query], workers: Optional[int] = None,
+                mode: str = "astar", chunk_size: int = BATCH_CHUNK_SIZE,
+                snapshot_path: Optional[str] = None) -> Iterator[Tuple[int, Union[Route, Exception]]]:
+    """Route (start, end, profile) queries on a process pool, yielding results as they finish
+
+    Yields ``(position in queries, Route)`` in completion order, not input
+    order. A query naming an unknown place or profile yields the exception
+    in place of its Route, so one bad booking does not stop the batch.
+
+    Tasks never carry the graph: it is written once to a snapshot (named by
+    its fingerprint, so later batches reuse it) that every worker
+    memory-maps when it starts. Queries are consumed lazily with at most two
+    chunks per worker in flight, so ``queries`` can be a generator of any
+    length.
+    """
+    if snapshot_path is None:
+        snapshot_path = os.path.join(tempfile.gettempdir(), f"ttg_graph_{compiled.fingerprint()[:16]}.bin")
+    _ensure_snapshot(compiled, snapshot_path)
+    workers = workers or os.cpu_count() or 1
+
+    chunks = _chunked(enumerate(queries), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker_graph,
+                             initargs=(snapshot_path,)) as pool:
+        pending = {pool.submit(_route_chunk, chunk, mode) for chunk in islice(chunks, 2 * workers)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.add(pool.submit(_route_chunk, chunk, mode))
+                yield from future.result()
+
+
+def _ensure_snapshot(compiled: CompiledGraph, path: str):
+    """Write the graph snapshot unless an up-to-date one is already there"""
+    snapshot = read_snapshot(path, GRAPH_MAGIC)
+    if snapshot is None or snapshot[0].get("fingerprint") != compiled.fingerprint():
+        compiled.save(path)
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _load_worker_graph(path: str):
+    global _worker_graph
+    _worker_graph = CompiledGraph.load(path)
+    if _worker_graph is None:
+        raise RuntimeError(f"Cannot load graph snapshot {path}")
+
+
+def _route_chunk(chunk: List[Tuple[int, Query]], mode: str) -> List[Tuple[int, Union[Route, Exception]]]:
+    results = []
+    for index, (start, end, profile) in chunk:
+        try:
+            results.append((index, find_route(_worker_graph, start, end, profile, mode=mode)))
+        except (KeyError, ValueError) as error:
+            results.append((index, error))
+    return results
@@ -0,0 +1,1206 @@
+"""Micro-benchmarks for the headless routing and planning modules.
+
+Run everything with ``python benchmarks.py`` or a single benchmark with
+``python benchmarks.py <name> [args...]``.
+"""
+import heapq
+import json
+import math
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from travel_data import Place, Route
+import numpy as np
+
+from routing import (PROFILES, CompiledGraph, RoutingProfile, _astar, _reconstruct_path, compile_graph, find_route,
+                     haversine_km, shortest_path_tree)
+from alternatives import k_shortest_routes
+from batch import route_batch
+from catalog import Catalog, write_city
+from catalog_compiler import check_city, compile_city, load_city, snapshot_path
+from contraction import ContractionHierarchy
+from isochrone import Reachability
+from itinerary import CANDIDATE_LIMIT, EXACT_STOP_LIMIT, Candidate, plan_itinerary, recommend_itinerary
+from knapsack import best_selection
+from pareto import pareto_routes
+from place_table import WEEKDAY_CATEGORIES, WEEKEND_CATEGORIES, PlaceTable, recommendation_scores, route_corridor
+from replanning import IncrementalRouter
+from route_cache import RouteCache, RouteStore
+from search import PlaceSearch
+from spatial import SpatialIndex
+from traffic import PEAK_SLOWDOWN, TrafficProfile
+from travel_matrix import TravelMatrix
+
+
+def chain_graph(n: int, spurs: bool = True) -> Tuple[Dict[str, Dict[str, dict]], Dict[str, Place]]:
+    """Build a long two-way chain, optionally with a dead-end spur on every node
+
+    Spurs are long enough that the search queues them but never settles them,
+    so they stay in the heap for the whole query.
+    """
+    places = {}
+    graph = {}
+    for i in range(n):
+        name = f"C{i}"
+        places[name] = Place(name, (30.0, 78.0 + i * 0.01), 0, 4.0, "", 1.0, "Landmark")
+        graph[name] = {}
+        if i:
+            graph[name][f"C{i - 1}"] = {"dist": 1, "time": 3}
+            graph[f"C{i - 1}"][name] = {"dist": 1, "time": 3}
+        if spurs:
+            spur = f"S{i}"
+            places[spur] = Place(spur, (30.01, 78.0 + i * 0.01), 0, 4.0, "", 1.0, "Landmark")
+            graph[name][spur] = {"dist": 10 * n, "time": 30 * n}
+            graph[spur] = {name: {"dist": 10 * n, "time": 30 * n}}
+    return graph, places
+
+
+def grid_graph(rows: int, cols: int, seed: int = 7) -> Tuple[Dict[str, Dict[str, dict]], Dict[str, Place]]:
+    """Build a two-way street grid around Dehradun with ~1 km blocks
+
+    Edge distances add a random detour on top of the straight-line length
+    and times use a random speed per street, like a real road network.
+    """
+    rng = random.Random(seed)
+    places = {}
+    graph = {}
+    for r in range(rows):
+        for c in range(cols):
+            name = f"G{r}_{c}"
+            places[name] = Place(name, (30.20 + r * 0.009, 77.90 + c * 0.0104), 0, 4.0, "", 1.0, "Landmark")
+            graph[name] = {}
+    for r in range(rows):
+        for c in range(cols):
+            for nr, nc in ((r + 1, c), (r, c + 1)):
+                if nr < rows and nc < cols:
+                    dist = round(rng.uniform(1.0, 1.4), 2)
+                    minutes = round(dist / rng.uniform(15, 45) * 60, 1)
+                    graph[f"G{r}_{c}"][f"G{nr}_{nc}"] = {"dist": dist, "time": minutes}
+                    graph[f"G{nr}_{nc}"][f"G{r}_{c}"] = {"dist": dist, "time": minutes}
+    return graph, places
+
+
+def grid_compiled(rows: int, cols: int, arterial_every: int = 0, seed: int = 7) -> CompiledGraph:
+    """Street grid like grid_graph, built straight into CSR arrays for large sizes
+
+    With ``arterial_every`` set, every k-th row and column is a fast arterial
+    road (70-90 km/h against 15-35 km/h side streets), which gives the grid
+    the hierarchy real road networks have.
+    """
+    rng = np.random.default_rng(seed)
+    n = rows * cols
+    ids = np.arange(n).reshape(rows, cols)
+    pairs = np.concatenate([
+        np.stack([ids[:-1, :].ravel(), ids[1:, :].ravel()], axis=1),
+        np.stack([ids[:, :-1].ravel(), ids[:, 1:].ravel()], axis=1),
+    ])
+    dist = rng.uniform(1.0, 1.4, len(pairs)).round(2)
+    if arterial_every:
+        # Vertical edges lie in a column, horizontal edges in a row
+        column = np.tile(np.arange(cols), rows - 1)
+        row = np.repeat(np.arange(rows), cols - 1)
+        arterial = np.concatenate([column % arterial_every == 0, row % arterial_every == 0])
+        speed = np.where(arterial, rng.uniform(70, 90, len(pairs)), rng.uniform(15, 35, len(pairs)))
+    else:
+        speed = rng.uniform(15, 45, len(pairs))
+    minutes = (dist / speed * 60).round(2)
+    sources = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    targets = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    dist = np.concatenate([dist, dist])
+    minutes = np.concatenate([minutes, minutes])
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+    rr, cc = np.divmod(np.arange(n), cols)
+    coords = np.stack([30.20 + rr * 0.009, 77.90 + cc * 0.0104], axis=1)
+    names = [f"G{r}_{c}" for r, c in zip(rr.tolist(), cc.tolist())]
+    return CompiledGraph(names, coords, np.zeros(n, dtype=np.int64), offsets,
+                         targets[order].astype(np.int32), dist[order], minutes[order])
+
+
+def _path_copy_astar(compiled: CompiledGraph, start: str, end: str) -> Route:
+    """The original search: every heap entry carries its own copy of the path"""
+    source, goal = compiled.node_id(start), compiled.node_id(end)
+    lats, lons = compiled.coords[:, 0].tolist(), compiled.coords[:, 1].tolist()
+    open_set = [(0, 0, source, [source])]
+    closed_set = set()
+    g_scores = {source: 0}
+    while open_set:
+        _, g_score, current, path = heapq.heappop(open_set)
+        if current in closed_set:
+            continue
+        if current == goal:
+            return compiled.to_route(path)
+        closed_set.add(current)
+        for neighbor, dist, travel in compiled.neighbors(current):
+            if neighbor in closed_set:
+                continue
+            tentative_g = g_score + dist + travel * 0.1
+            if neighbor not in g_scores or tentative_g < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_g
+                h = math.sqrt((lats[neighbor] - lats[goal]) ** 2 + (lons[neighbor] - lons[goal]) ** 2)
+                heapq.heappush(open_set, (tentative_g + h, tentative_g, neighbor, path + [neighbor]))
+    return Route([start, end], 0, 0, 0)
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    began = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - began
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_path_reconstruction():
+    """Path-copying A* vs parent-pointer A* on long chains with spurs"""
+    print(f"{'nodes':>8} {'copy ms':>10} {'copy peak KiB':>14} {'parent ms':>10} {'parent peak KiB':>16}")
+    for length in (500, 1000, 2000, 4000):
+        compiled = compile_graph(*chain_graph(length))
+        start, end = "C0", f"C{length - 1}"
+        old, old_s, old_peak = _measure(_path_copy_astar, compiled, start, end)
+        new, new_s, new_peak = _measure(find_route, compiled, start, end)
+        assert old.path == new.path and old.distance == new.distance
+        print(f"{compiled.num_nodes:>8} {old_s * 1e3:>10.1f} {old_peak / 1024:>14.0f} "
+              f"{new_s * 1e3:>10.1f} {new_peak / 1024:>16.0f}")
+
+
+def bench_heuristic():
+    """Expanded nodes: legacy degree-Euclidean heuristic vs calibrated haversine"""
+    compiled = compile_graph(*grid_graph(120, 120))
+    rng = random.Random(1)
+    queries = [(rng.randrange(compiled.num_nodes), rng.randrange(compiled.num_nodes)) for _ in range(30)]
+    print(f"{'profile':>10} {'legacy expanded':>16} {'haversine expanded':>19} {'reduction':>10}")
+    for name, profile in PROFILES.items():
+        weights = compiled.edge_weights(profile).tolist()
+        legacy_total = new_total = 0
+        for source, goal in queries:
+            # The old heuristic: Euclidean distance in raw degrees
+            degrees = np.hypot(compiled.coords[:, 0] - compiled.coords[goal, 0],
+                               compiled.coords[:, 1] - compiled.coords[goal, 1]).tolist()
+            legacy_stats, new_stats = {}, {}
+            legacy = _astar(compiled, source, goal, weights, degrees, legacy_stats)
+            new = find_route(compiled, compiled.names[source], compiled.names[goal], profile, stats=new_stats)
+            legacy_cost = profile.dist_weight * legacy.distance + profile.time_weight * legacy.time
+            new_cost = profile.dist_weight * new.distance + profile.time_weight * new.time
+            assert abs(legacy_cost - new_cost) < 1e-6
+            legacy_total += legacy_stats["expanded"]
+            new_total += new_stats["expanded"]
+        print(f"{name:>10} {legacy_total:>16} {new_total:>19} {1 - new_total / legacy_total:>10.1%}")
+
+
+def bench_bidirectional():
+    """Unidirectional vs bidirectional search on a 150x150 street grid"""
+    compiled = compile_graph(*grid_graph(150, 150))
+    rng = random.Random(2)
+    queries = [(compiled.names[rng.randrange(compiled.num_nodes)], compiled.names[rng.randrange(compiled.num_nodes)])
+               for _ in range(30)]
+    print(f"{'mode':>24} {'expanded':>10} {'ms/query':>9}")
+    for mode in ("astar", "bidirectional-astar", "bidirectional-dijkstra"):
+        expanded = 0
+        began = time.perf_counter()
+        for start, end in queries:
+            stats = {}
+            find_route(compiled, start, end, "combined", stats=stats, mode=mode)
+            expanded += stats["expanded"]
+        elapsed = time.perf_counter() - began
+        print(f"{mode:>24} {expanded:>10} {elapsed / len(queries) * 1e3:>9.1f}")
+    expanded = 0
+    began = time.perf_counter()
+    zero = [0.0] * compiled.num_nodes
+    weights = compiled.edge_weights("combined").tolist()
+    for start, end in queries:
+        stats = {}
+        _astar(compiled, compiled.node_id(start), compiled.node_id(end), weights, zero, stats)
+        expanded += stats["expanded"]
+    elapsed = time.perf_counter() - began
+    print(f"{'dijkstra':>24} {expanded:>10} {elapsed / len(queries) * 1e3:>9.1f}")
+
+
+def bench_travel_matrix():
+    """All-pairs matrix: build, snapshot reload and lookup vs per-query A*"""
+    print(f"{'nodes':>6} {'build s':>8} {'file MiB':>9} {'load ms':>8} {'lookup us':>10} {'A* us':>8}")
+    path = os.path.join(tempfile.gettempdir(), "bench_travel_matrix.bin")
+    for side in (10, 20, 24):
+        compiled = compile_graph(*grid_graph(side, side))
+        began = time.perf_counter()
+        matrix = TravelMatrix.build(compiled)
+        build_s = time.perf_counter() - began
+        matrix.save(path)
+
+        began = time.perf_counter()
+        loaded = TravelMatrix.load(path, compiled)
+        load_ms = (time.perf_counter() - began) * 1e3
+
+        rng = random.Random(4)
+        queries = [(rng.choice(compiled.names), rng.choice(compiled.names)) for _ in range(200)]
+        began = time.perf_counter()
+        for start, end in queries:
+            loaded.route(start, end)
+        lookup_us = (time.perf_counter() - began) / len(queries) * 1e6
+        began = time.perf_counter()
+        for start, end in queries:
+            find_route(compiled, start, end)
+        astar_us = (time.perf_counter() - began) / len(queries) * 1e6
+        print(f"{compiled.num_nodes:>6} {build_s:>8.2f} {os.path.getsize(path) / 2 ** 20:>9.2f} "
+              f"{load_ms:>8.2f} {lookup_us:>10.0f} {astar_us:>8.0f}")
+    os.remove(path)
+
+
+def bench_contraction(side: str = "120"):
+    """Contraction Hierarchy preprocessing and query latency vs A* on an arterial grid"""
+    side = int(side)
+    compiled = grid_compiled(side, side, arterial_every=8)
+    began = time.perf_counter()
+    hierarchy = ContractionHierarchy.build(compiled, "time")
+    build_s = time.perf_counter() - began
+
+    path = os.path.join(tempfile.gettempdir(), "bench_hierarchy.bin")
+    hierarchy.save(path)
+    began = time.perf_counter()
+    hierarchy = ContractionHierarchy.load(path, compiled, "time")
+    load_s = time.perf_counter() - began
+    os.remove(path)
+
+    rng = random.Random(5)
+    queries = [(rng.choice(compiled.names), rng.choice(compiled.names)) for _ in range(100)]
+    expanded = 0
+    began = time.perf_counter()
+    for start, end in queries:
+        stats = {}
+        hierarchy.route(start, end, stats)
+        expanded += stats["expanded"]
+    ch_ms = (time.perf_counter() - began) / len(queries) * 1e3
+    sample = queries[:10]
+    began = time.perf_counter()
+    for start, end in sample:
+        find_route(compiled, start, end, "time")
+    astar_ms = (time.perf_counter() - began) / len(sample) * 1e3
+    print(f"nodes {compiled.num_nodes}, edges {compiled.num_edges}, shortcuts {hierarchy.num_shortcuts}")
+    print(f"build {build_s:.1f} s, snapshot load {load_s:.2f} s")
+    print(f"CH query {ch_ms:.2f} ms ({expanded / len(queries):.0f} nodes settled) vs A* {astar_ms:.1f} ms")
+
+
+def _inline_cost_astar(compiled: CompiledGraph, source: int, goal: int, dist_weight: float, time_weight: float,
+                       potential: List[float], stats: Optional[Dict[str, int]] = None) -> Optional[Route]:
+    """_astar as it was before weight layers, costing every edge inside the loop"""
+    n = compiled.num_nodes
+    offsets = compiled._offsets
+    targets = compiled._targets
+    dist = compiled._dist
+    time = compiled._time
+    node_cost = compiled._node_cost
+
+    inf = math.inf
+    g_scores = [inf] * n
+    parent = [-1] * n
+    total_dist = [0.0] * n
+    total_time = [0.0] * n
+    total_cost = [0] * n
+    closed = bytearray(n)
+    expanded = 0
+
+    g_scores[source] = 0.0
+    total_cost[source] = node_cost[source]
+
+    # Priority queue: (f_score, g_score, node)
+    open_set = [(potential[source], 0.0, source)]
+    route = None
+
+    while open_set:
+        f_score, g_score, current = heapq.heappop(open_set)
+
+        if closed[current]:
+            continue
+
+        if current == goal:
+            route = Route(
+                [compiled.names[u] for u in _reconstruct_path(parent, goal)],
+                total_dist[goal],
+                total_time[goal],
+                total_cost[goal],
+            )
+            break
+
+        closed[current] = 1
+        expanded += 1
+
+        for e in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[e]
+            if closed[neighbor]:
+                continue
+
+            cost = dist_weight * dist[e] + time_weight * time[e]
+            if cost <= 0:
+                cost = dist[e]
+            tentative_g = g_score + cost
+
+            if tentative_g < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_g
+                parent[neighbor] = current
+                total_dist[neighbor] = total_dist[current] + dist[e]
+                total_time[neighbor] = total_time[current] + time[e]
+                total_cost[neighbor] = total_cost[current] + node_cost[neighbor]
+                heapq.heappush(open_set, (tentative_g + potential[neighbor], tentative_g, neighbor))
+
+    if stats is not None:
+        stats["expanded"] = expanded
+    return route
+
+
+def _walking_minutes(compiled: CompiledGraph) -> np.ndarray:
+    # 4.5 km/h on foot regardless of road speed
+    return compiled.dist / 4.5 * 60
+
+
+def bench_profiles(side: str = "300"):
+    """Per-profile weight layers: build cost, profile switching and per-query search time"""
+    side = int(side)
+    compiled = grid_compiled(side, side, arterial_every=8)
+    profiles = dict(PROFILES, walking=RoutingProfile("walking", weight_fn=_walking_minutes))
+    rng = random.Random(6)
+    queries = [(rng.choice(compiled.names), rng.choice(compiled.names)) for _ in range(10)]
+    print(f"{'profile':>10} {'layer ms':>9} {'inline ms/q':>12} {'layer ms/q':>11}")
+    for name, profile in profiles.items():
+        began = time.perf_counter()
+        compiled.edge_weights(profile)
+        layer_ms = (time.perf_counter() - began) * 1e3
+        inline_s = layer_s = 0.0
+        for start, end in queries:
+            source, goal = compiled.node_id(start), compiled.node_id(end)
+            potential = compiled.potentials(goal, profile).tolist()
+            if profile.weight_fn is None:
+                began = time.perf_counter()
+                inline = _inline_cost_astar(compiled, source, goal, profile.dist_weight, profile.time_weight, potential)
+                inline_s += time.perf_counter() - began
+            began = time.perf_counter()
+            route = _astar(compiled, source, goal, compiled._layer(profile)[1], potential)
+            layer_s += time.perf_counter() - began
+            if profile.weight_fn is None:
+                assert route.path == inline.path
+        inline_col = f"{inline_s / len(queries) * 1e3:>12.1f}" if profile.weight_fn is None else f"{'-':>12}"
+        print(f"{name:>10} {layer_ms:>9.1f} {inline_col} {layer_s / len(queries) * 1e3:>11.1f}")
+    # Switching back to an existing profile reuses its layer
+    began = time.perf_counter()
+    for name in profiles:
+        compiled.edge_weights(profiles[name])
+    print(f"switching across {len(profiles)} cached profiles: {(time.perf_counter() - began) * 1e6:.0f} us")
+
+
+def bench_pareto():
+    """Pareto frontier size and latency over distance, time and entry cost as the grid grows"""
+    print(f"{'nodes':>6} {'epsilon':>8} {'frontier avg':>13} {'frontier max':>13} {'labels':>8} "
+          f"{'ms/query':>9} {'A* ms':>6}")
+    runs = [(side, 0.0) for side in (10, 20, 30)] + [(side, 0.1) for side in (10, 20, 30, 40, 60)]
+    for side, epsilon in runs:
+        grid = grid_compiled(side, side, arterial_every=4)
+        # Roughly a third of the places charge an entry fee
+        fees = np.random.default_rng(8).choice([0, 0, 0, 0, 20, 50, 100], grid.num_nodes)
+        compiled = CompiledGraph(grid.names, grid.coords, fees, grid.offsets, grid.targets, grid.dist, grid.time)
+        rng = random.Random(9)
+        queries = [tuple(rng.sample(compiled.names, 2)) for _ in range(20)]
+        sizes, labels = [], 0
+        began = time.perf_counter()
+        for start, end in queries:
+            stats = {}
+            sizes.append(len(pareto_routes(compiled, start, end, epsilon, stats)))
+            labels += stats["labels"]
+        pareto_ms = (time.perf_counter() - began) / len(queries) * 1e3
+        began = time.perf_counter()
+        for start, end in queries:
+            find_route(compiled, start, end)
+        astar_ms = (time.perf_counter() - began) / len(queries) * 1e3
+        print(f"{compiled.num_nodes:>6} {epsilon:>8} {sum(sizes) / len(sizes):>13.1f} {max(sizes):>13} "
+              f"{labels // len(queries):>8} {pareto_ms:>9.1f} {astar_ms:>6.1f}")
+
+
+def bench_alternatives():
+    """Yen k-shortest routes with a shared reverse tree vs k independent A* runs"""
+    compiled = grid_compiled(150, 150, arterial_every=8)
+    rng = random.Random(3)
+    queries = [tuple(rng.sample(compiled.names, 2)) for _ in range(10)]
+    began = time.perf_counter()
+    for start, end in queries:
+        find_route(compiled, start, end)
+    astar_ms = (time.perf_counter() - began) / len(queries) * 1e3
+    print(f"{'k':>3} {'yen ms':>7} {'k x A* ms':>10} {'spur searches':>14} {'expanded':>9}")
+    for k in (1, 2, 5, 10):
+        totals = {"spur_searches": 0, "expanded": 0}
+        began = time.perf_counter()
+        for start, end in queries:
+            stats = {}
+            k_shortest_routes(compiled, start, end, k, stats=stats)
+            for name in totals:
+                totals[name] += stats[name]
+        yen_ms = (time.perf_counter() - began) / len(queries) * 1e3
+        print(f"{k:>3} {yen_ms:>7.1f} {k * astar_ms:>10.1f} {totals['spur_searches'] // len(queries):>14} "
+              f"{totals['expanded'] // len(queries):>9}")
+
+
+def bench_traffic():
+    """Time-dependent A* over hourly travel-time profiles vs static A* on a 150x150 grid"""
+    compiled = grid_compiled(150, 150, arterial_every=8)
+    rng = np.random.default_rng(10)
+    print(f"{'slots':>6} {'table MiB':>10} {'build ms':>9} {'static ms':>10} {'9:00 ms':>8} {'18:00 ms':>9} {'changed':>8}")
+    for weekly in (False, True):
+        slots = 168 if weekly else 24
+        began = time.perf_counter()
+        # A third of the roads jam 8-10 AM, another third 5-8 PM
+        hourly = np.ones((compiled.num_edges, 24))
+        kind = rng.integers(0, 3, compiled.num_edges)
+        hourly[kind == 1, 8:11] = PEAK_SLOWDOWN
+        hourly[kind == 2, 17:21] = PEAK_SLOWDOWN
+        traffic = TrafficProfile.from_multipliers(compiled, np.tile(hourly, slots // 24))
+        build_ms = (time.perf_counter() - began) * 1e3
+
+        queries = [tuple(random.Random(seed).sample(compiled.names, 2)) for seed in range(20)]
+        began = time.perf_counter()
+        for start, end in queries:
+            find_route(compiled, start, end, "time")
+        static_ms = (time.perf_counter() - began) / len(queries) * 1e3
+        timings, paths = [], []
+        for hour in (9, 18):
+            began = time.perf_counter()
+            paths.append([traffic.route(start, end, datetime(2026, 10, 19, hour)).path for start, end in queries])
+            timings.append((time.perf_counter() - began) / len(queries) * 1e3)
+        changed = sum(a != b for a, b in zip(*paths))
+        print(f"{slots:>6} {traffic.minutes.nbytes / 2 ** 20:>10.1f} {build_ms:>9.0f} {static_ms:>10.1f} "
+              f"{timings[0]:>8.1f} {timings[1]:>9.1f} {changed:>5}/{len(queries)}")
+
+
+def bench_isochrone(side: str = "300"):
+    """Bounded, resumable reachability vs full Dijkstra and fresh-buffer bounded Dijkstra"""
+    compiled = grid_compiled(int(side), int(side), arterial_every=8)
+    starts = [random.Random(seed).choice(compiled.names) for seed in range(10)]
+    budgets = (10, 20, 40, 80)
+
+    def fresh_buffers(source: int, budget: float) -> int:
+        # Bounded Dijkstra that allocates its cost and closed arrays per query
+        cost = [math.inf] * compiled.num_nodes
+        closed = bytearray(compiled.num_nodes)
+        cost[source] = 0.0
+        heap = [(0.0, source)]
+        reached = 0
+        while heap and heap[0][0] <= budget:
+            c, current = heapq.heappop(heap)
+            if closed[current]:
+                continue
+            closed[current] = 1
+            reached += 1
+            for e in range(compiled._offsets[current], compiled._offsets[current + 1]):
+                neighbor = compiled._targets[e]
+                if c + compiled._time[e] < cost[neighbor]:
+                    cost[neighbor] = c + compiled._time[e]
+                    heapq.heappush(heap, (cost[neighbor], neighbor))
+        return reached
+
+    began = time.perf_counter()
+    for start in starts:
+        shortest_path_tree(compiled, compiled.node_id(start), compiled._time)
+    full_ms = (time.perf_counter() - began) / len(starts) * 1e3
+    print(f"full Dijkstra: {full_ms:.1f} ms over {compiled.num_nodes} nodes")
+
+    # resumed: answering every budget up to this one in turn from the same start
+    print(f"{'budget':>7} {'reached':>8} {'fresh ms':>9} {'stamped ms':>11} {'resumed ms':>11} {'separate ms':>12}")
+    reachability = Reachability(compiled)
+    resumed = {budget: 0.0 for budget in budgets}
+    for start in starts:
+        reachability._source = -1
+        began = time.perf_counter()
+        for budget in budgets:
+            reachability.within(start, budget)
+            resumed[budget] += time.perf_counter() - began
+    separate = 0.0
+    for budget in budgets:
+        fresh = stamped = 0.0
+        reached = 0
+        for start in starts:
+            source = compiled.node_id(start)
+            began = time.perf_counter()
+            reached += fresh_buffers(source, budget)
+            fresh += time.perf_counter() - began
+            reachability._source = -1
+            began = time.perf_counter()
+            reachability.within(start, budget)
+            stamped += time.perf_counter() - began
+        separate += stamped
+        print(f"{budget:>7} {reached // len(starts):>8} {fresh / len(starts) * 1e3:>9.2f} "
+              f"{stamped / len(starts) * 1e3:>11.2f} {resumed[budget] / len(starts) * 1e3:>11.2f} "
+              f"{separate / len(starts) * 1e3:>12.2f}")
+
+
+def bench_route_cache(queries: str = "2000"):
+    """LRU route cache hit rate and time on a skewed query stream over a 100x100 grid"""
+    compiled = grid_compiled(100, 100, arterial_every=8)
+    rng = np.random.default_rng(11)
+    # Popular places dominate, like a tourist town: Zipf-distributed endpoints
+    popular = [compiled.names[i] for i in rng.permutation(compiled.num_nodes)[:200]]
+    ranks = np.minimum(rng.zipf(1.3, size=(int(queries), 2)), len(popular)) - 1
+    stream = [(popular[a], popular[b], "combined") for a, b in ranks if a != b]
+
+    began = time.perf_counter()
+    for start, end, profile in stream:
+        find_route(compiled, start, end, profile)
+    uncached = time.perf_counter() - began
+    print(f"{len(stream)} queries, uncached: {uncached:.2f} s")
+
+    print(f"{'size':>6} {'hit rate':>9} {'evictions':>10} {'s':>6} {'speedup':>8}")
+    for size in (16, 64, 256, 1024):
+        cache = RouteCache(max_size=size)
+        began = time.perf_counter()
+        for start, end, profile in stream:
+            cache.get_or_compute(compiled, start, end, profile, "astar",
+                                 lambda: find_route(compiled, start, end, profile))
+        elapsed = time.perf_counter() - began
+        stats = cache.stats()
+        print(f"{size:>6} {stats['hit_rate']:>9.1%} {stats['evictions']:>10} {elapsed:>6.2f} {uncached / elapsed:>7.1f}x")
+
+    hit = stream[0]
+    began = time.perf_counter()
+    for _ in range(100000):
+        cache.get_or_compute(compiled, *hit, "astar", lambda: None)
+    print(f"hit lookup: {(time.perf_counter() - began) * 10:.2f} us")
+
+
+def bench_route_store(queries: str = "500"):
+    """Cold start vs restart with the SQLite route store on a 100x100 grid"""
+    compiled = grid_compiled(100, 100, arterial_every=8)
+    stream = [tuple(random.Random(seed).sample(compiled.names, 2)) for seed in range(int(queries))]
+    path = os.path.join(tempfile.mkdtemp(), "routes.sqlite")
+
+    def run(label: str):
+        began = time.perf_counter()
+        cache = RouteCache(store=RouteStore(path))
+        opened = time.perf_counter() - began
+        for start, end in stream:
+            cache.get_or_compute(compiled, start, end, "combined", "astar",
+                                 lambda: find_route(compiled, start, end, "combined"))
+        elapsed = time.perf_counter() - began
+        stats = cache.stats()
+        cache.store.close()
+        print(f"{label:>8} {opened * 1e3:>8.1f} {elapsed / len(stream) * 1e3:>10.3f} "
+              f"{stats['disk_hits']:>10} {stats['misses']:>7}")
+
+    print(f"{'run':>8} {'open ms':>8} {'ms/query':>10} {'disk hits':>10} {'misses':>7}")
+    run("cold")
+    run("restart")
+    print(f"store: {os.path.getsize(path) / 2 ** 10:.0f} KiB for {len(stream)} routes")
+
+
+def _day_minutes(compiled: CompiledGraph, start: str, end: str, stops: List[Candidate]) -> float:
+    names = [start] + [c.name for c in stops] + [end]
+    legs = sum(find_route(compiled, a, b, "time").time for a, b in zip(names, names[1:]))
+    return legs + sum(c.visit_minutes for c in stops)
+
+
+def bench_itinerary():
+    """Exact DP vs local search vs score-greedy itineraries across catalog sizes on a 100x100 grid"""
+    compiled = grid_compiled(100, 100, arterial_every=8)
+    print(f"{'stops':>6} {'exact ms':>9} {'search ms':>10} {'search/exact':>13} {'search/bound':>13} "
+          f"{'greedy/search':>14}")
+    for size in (8, 12, 16, 30, 60, 120):
+        rng = random.Random(size)
+        exact_ms = search_ms = 0.0
+        exact_score = search_score = greedy_score = bound = 0.0
+        runs = 5
+        for _ in range(runs):
+            start, end, *names = rng.sample(compiled.names, size + 2)
+            candidates = [Candidate(name, round(rng.uniform(3.5, 5.0), 1), rng.choice([0, 0, 30, 50, 100]),
+                                    rng.choice([45, 60, 90, 120])) for name in names]
+            if size <= 16:
+                began = time.perf_counter()
+                exact_score += plan_itinerary(compiled, start, end, candidates, budget=300).score
+                exact_ms += (time.perf_counter() - began) * 1e3
+            began = time.perf_counter()
+            plan = plan_itinerary(compiled, start, end, candidates, budget=300, exact_limit=0)
+            search_ms += (time.perf_counter() - began) * 1e3
+            search_score += plan.score
+            bound += plan.bound
+
+            # The planner's old rule, with travel counted: best scores first, visited in
+            # the order picked, each kept only if the day still fits
+            picked = []
+            for candidate in sorted(candidates, key=lambda c: -c.score):
+                trial = picked + [candidate]
+                if sum(c.cost for c in trial) <= 300 and _day_minutes(compiled, start, end, trial) <= 600:
+                    picked = trial
+            greedy_score += sum(c.score for c in picked)
+        exact = f"{exact_ms / runs:>9.1f}" if size <= 16 else f"{'-':>9}"
+        ratio = f"{search_score / exact_score:>13.3f}" if size <= 16 else f"{'-':>13}"
+        print(f"{size:>6} {exact} {search_ms / runs:>10.1f} {ratio} {search_score / bound:>13.3f} "
+              f"{greedy_score / search_score:>14.3f}")
+
+
+def bench_recommendations(sides: str = "55,317"):
+    """The planner's full recommendation path (score, keep the best, plan) on ~3k and ~100k-place catalogs"""
+    print(f"{'places':>7} {'limit':>6} {'plan ms':>8} {'score':>7} {'stops':>6}")
+    for side in map(int, sides.split(",")):
+        compiled = grid_compiled(side, side, arterial_every=8)
+        table = PlaceTable(synthetic_places(compiled))
+        table.nodes(compiled)
+        table.spatial()
+        rng = random.Random(9)
+        routes = [find_route(compiled, *rng.sample(compiled.names, 2)).path for _ in range(3)]
+        for limit in (EXACT_STOP_LIMIT, CANDIDATE_LIMIT, 2 * CANDIDATE_LIMIT, 4 * CANDIDATE_LIMIT):
+            plan_ms = score = stops = 0.0
+            for route_path in routes:
+                began = time.perf_counter()
+                itinerary, _ = recommend_itinerary(table, compiled, route_path, 300, "Any", "2026-10-17",
+                                                   candidate_limit=limit)
+                plan_ms += (time.perf_counter() - began) * 1e3
+                score += itinerary.score
+                stops += len(itinerary.stops)
+            print(f"{len(table):>7} {limit:>6} {plan_ms / len(routes):>8.0f} {score / len(routes):>7.2f} "
+                  f"{stops / len(routes):>6.1f}")
+
+
+def bench_knapsack():
+    """Exact and coarsened 2-D knapsack selection vs score-greedy picks across catalog sizes"""
+    print(f"{'items':>6} {'cells':>9} {'exact ms':>9} {'coarse ms':>10} {'coarse/exact':>13} {'greedy/exact':>13}")
+    for size in (50, 100, 200, 500, 1000):
+        rng = random.Random(size)
+        scores = [round(rng.uniform(3.5, 5.0), 2) for _ in range(size)]
+        costs = [5 * rng.randint(0, 60) for _ in range(size)]
+        minutes = [15 * rng.randint(2, 16) for _ in range(size)]
+        budget, day = 1500, 600
+
+        began = time.perf_counter()
+        exact = best_selection(scores, costs, minutes, budget, day, max_cells=10 ** 9)
+        exact_ms = (time.perf_counter() - began) * 1e3
+        began = time.perf_counter()
+        coarse = best_selection(scores, costs, minutes, budget, day, max_cells=2_000_000)
+        coarse_ms = (time.perf_counter() - began) * 1e3
+
+        # The planner's old extraction: best scores first, skipping whatever no longer fits
+        spent = visiting = greedy = 0.0
+        for i in sorted(range(size), key=lambda i: -scores[i]):
+            if spent + costs[i] <= budget and visiting + minutes[i] <= day:
+                spent += costs[i]
+                visiting += minutes[i]
+                greedy += scores[i]
+        cells = size * (budget // 5 + 1) * (day // 15 + 1)
+        print(f"{size:>6} {cells:>9} {exact_ms:>9.1f} {coarse_ms:>10.1f} "
+              f"{coarse.score / exact.score:>13.3f} {greedy / exact.score:>13.3f}")
+
+
+def synthetic_places(compiled: CompiledGraph, seed: int = 5) -> Dict[str, Place]:
+    """A Place for every node of a synthetic graph, with catalog-like attribute mixes"""
+    rng = random.Random(seed)
+    categories = ["Adventure", "Religious", "Market", "Nature", "Cultural", "Landmark", "Institution"]
+    return {
+        name: Place(name, (float(lat), float(lon)), rng.choice([0, 0, 10, 20, 50, 100, 150]),
+                    round(rng.uniform(3.0, 5.0), 1), "", rng.choice([1.0, 1.5, 2.0, 2.5, 3.0]),
+                    rng.choice(categories), round(rng.random(), 2))
+        for name, (lat, lon) in zip(compiled.names, compiled.coords)
+    }
+
+
+def bench_scoring(side: str = "317"):
+    """Columnar vs per-place recommendation scoring over a ~100k-place catalog"""
+    compiled = grid_compiled(int(side), int(side))
+    places = synthetic_places(compiled)
+    began = time.perf_counter()
+    table = PlaceTable(places)
+    table.nodes(compiled)
+    print(f"{len(places)} places, table build {(time.perf_counter() - began) * 1e3:.0f} ms")
+
+    def per_place(route_path: List[str], budget: int, experience_type: str, date_str: str) -> List[float]:
+        # The planner's loop as it was, including re-parsing the date for every
+        # place; the route boost now comes from the corridor, worked out beforehand
+        on_route = set(route_path)
+        scores = []
+        for place in places.values():
+            if not 4.0 <= place.rating <= 5.0 or place.name in on_route:
+                continue
+            if experience_type != "Any" and place.category != experience_type:
+                continue
+            if place.cost > budget:
+                continue
+            route_boost = 1.2 if place.name in corridor else 1.0
+            weekend = datetime.strptime(date_str, "%Y-%m-%d").weekday() >= 5
+            good = place.category in (WEEKEND_CATEGORIES if weekend else WEEKDAY_CATEGORIES)
+            time_boost = 1.1 if good else 0.9
+            scores.append(place.rating * route_boost * time_boost * (1.0 + place.popularity_score * 0.2))
+        return scores
+
+    route_path = find_route(compiled, compiled.names[0], compiled.names[-1]).path
+    corridor = {table.keys[row] for row in np.flatnonzero(route_corridor(table, compiled, route_path))}
+    print(f"{'experience':>11} {'date':>11} {'rows':>7} {'loop ms':>8} {'columns ms':>11} {'identical':>10}")
+    for experience_type, date_str in (("Any", "2026-10-17"), ("Any", "2026-10-19"), ("Nature", "2026-10-17")):
+        began = time.perf_counter()
+        expected = per_place(route_path, 100, experience_type, date_str)
+        loop_ms = (time.perf_counter() - began) * 1e3
+        began = time.perf_counter()
+        rows, scores = recommendation_scores(table, compiled, route_path, 100, experience_type, date_str)
+        columns_ms = (time.perf_counter() - began) * 1e3
+        print(f"{experience_type:>11} {date_str:>11} {len(rows):>7} {loop_ms:>8.1f} {columns_ms:>11.2f} "
+              f"{str(scores.tolist() == expected):>10}")
+
+
+
+class _RatingBST:
+    """The planner's old place index: an unbalanced BST on rating, ties to the right"""
+
+    class Node:
+        def __init__(self, place: Place):
+            self.place = place
+            self.left = None
+            self.right = None
+
+    def __init__(self):
+        self.root = None
+
+    def insert(self, place: Place):
+        if not self.root:
+            self.root = self.Node(place)
+        else:
+            self._insert_recursive(self.root, place)
+
+    def _insert_recursive(self, node, place):
+        if place.rating < node.place.rating:
+            if node.left is None:
+                node.left = self.Node(place)
+            else:
+                self._insert_recursive(node.left, place)
+        else:
+            if node.right is None:
+                node.right = self.Node(place)
+            else:
+                self._insert_recursive(node.right, place)
+
+    def search_by_rating_range(self, min_rating: float, max_rating: float) -> List[Place]:
+        result = []
+        self._search_range_recursive(self.root, min_rating, max_rating, result)
+        return result
+
+    def _search_range_recursive(self, node, min_rating, max_rating, result):
+        if not node:
+            return
+        if min_rating <= node.place.rating <= max_rating:
+            result.append(node.place)
+        if node.place.rating > min_rating:
+            self._search_range_recursive(node.left, min_rating, max_rating, result)
+        if node.place.rating < max_rating:
+            self._search_range_recursive(node.right, min_rating, max_rating, result)
+
+
+
+def bench_corridor(side: str = "200"):
+    """Route corridor (detour minutes or km from the route) vs the per-place neighbor scan"""
+    compiled = grid_compiled(int(side), int(side), arterial_every=10)
+    places = synthetic_places(compiled)
+    table = PlaceTable(places)
+    table.nodes(compiled)
+    table.spatial()
+    neighbors = {name: [compiled.names[v] for v in compiled._targets[compiled._offsets[u]:compiled._offsets[u + 1]]]
+                 for u, name in enumerate(compiled.names)}
+    last = compiled.num_nodes - 1
+    print(f"{len(places)} places")
+    print(f"{'route':>9} {'stops':>6} {'scan ms':>9} {'next to path':>13} {'corridor ms':>12} {'in corridor':>12}")
+    for label, end in (("short", int(side) * 5 + 5), ("half", last // 2), ("corner", last)):
+        route_path = find_route(compiled, compiled.names[0], compiled.names[end]).path
+        began = time.perf_counter()
+        # The planner's old route boost: list membership per neighbor per place
+        next_to_path = sum(1 for name in places if any(n in route_path for n in neighbors[name]))
+        scan_ms = (time.perf_counter() - began) * 1e3
+        began = time.perf_counter()
+        corridor = route_corridor(table, compiled, route_path)
+        corridor_ms = (time.perf_counter() - began) * 1e3
+        print(f"{label:>9} {len(route_path):>6} {scan_ms:>9.0f} {next_to_path:>13} {corridor_ms:>12.1f} "
+              f"{int(corridor.sum()):>12}")
+
+
+
+def bench_catalog(cities: str = "8", side: str = "120"):
+    """Lazy per-city catalog loading: opening the index, one city, every city"""
+    directory = tempfile.mkdtemp()
+    graph, places = grid_graph(int(side), int(side))
+    for i in range(int(cities)):
+        write_city(directory, f"City {i}", places, graph, (30.0, 78.0))
+    size_mb = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory)) / 2 ** 20
+    print(f"{cities} cities of {len(places)} places / {sum(map(len, graph.values()))} roads, {size_mb:.0f} MiB of JSON")
+
+    def measure(label: str, load):
+        tracemalloc.start()
+        began = time.perf_counter()
+        kept = load()
+        elapsed = (time.perf_counter() - began) * 1e3
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{label:>14} {elapsed:>9.0f} {current / 2 ** 20:>10.1f}")
+        return kept
+
+    print(f"{'load':>14} {'ms':>9} {'held MiB':>10}")
+    catalog = measure("index", lambda: Catalog(directory))
+    measure("one city", lambda: catalog.city("City 0"))
+    measure("every city", lambda: [Catalog(directory).city(name) for name in catalog.cities()])
+
+
+
+def bench_city_snapshot(side: str = "120"):
+    """Start-up from catalog JSON (parse, validate, compile) vs mapping the compiled city snapshot"""
+    directory = tempfile.mkdtemp()
+    graph, places = grid_graph(int(side), int(side))
+    center = (30.20 + int(side) * 0.0045, 77.90 + int(side) * 0.0052)
+    write_city(directory, "Grid", places, graph, center)
+    catalog = Catalog(directory)
+
+    began = time.perf_counter()
+    city = Catalog(directory).city("Grid")
+    parse_ms = (time.perf_counter() - began) * 1e3
+    began = time.perf_counter()
+    errors, warnings = check_city(city)
+    check_ms = (time.perf_counter() - began) * 1e3
+    began = time.perf_counter()
+    compiled = compile_graph(city.graph, city.places)
+    PlaceTable(city.places)
+    build_ms = (time.perf_counter() - began) * 1e3
+    began = time.perf_counter()
+    compile_city(catalog, "Grid", snapshot_path(catalog, "Grid", directory))
+    compile_ms = (time.perf_counter() - began) * 1e3
+
+    began = time.perf_counter()
+    loaded = load_city(snapshot_path(catalog, "Grid", directory), catalog, "Grid")
+    load_ms = (time.perf_counter() - began) * 1e3
+    print(f"{len(places)} places, {compiled.num_edges} roads: {len(errors)} errors, {len(warnings)} warnings")
+    print(f"  from JSON: parse {parse_ms:.0f} ms + validate {check_ms:.0f} ms + compile {build_ms:.0f} ms"
+          f" = {parse_ms + check_ms + build_ms:.0f} ms")
+    print(f"  compiler run (all of the above, plus writing the snapshot): {compile_ms:.0f} ms")
+    print(f"  from snapshot: {load_ms:.0f} ms, same graph: {loaded.graph.fingerprint() == compiled.fingerprint()}")
+
+
+
+@dataclass
+class _DictPlace:
+    """Place as it was: a plain dataclass with a per-instance __dict__"""
+    name: str
+    coords: Tuple[float, float]
+    cost: int
+    rating: float
+    description: str
+    visit_time: float
+    category: str
+    popularity_score: float = 0.0
+
+
+@dataclass
+class _ListRoute:
+    """Route as it was: the path as a list of names"""
+    path: List[str]
+    distance: float
+    time: float
+    cost: int
+
+
+def _held_bytes(build) -> Tuple[object, int]:
+    tracemalloc.start()
+    kept = build()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return kept, held
+
+
+def bench_memory(places: str = "200000", routes: str = "20000"):
+    """Memory held by slotted Place and node-id Route vs the plain dataclasses they replace"""
+    rng = random.Random(3)
+    categories = ["Adventure", "Religious", "Market", "Nature", "Cultural", "Landmark", "Institution"]
+    # Field values are made once and shared, so only the objects themselves are measured
+    fields = [(f"P{i}", (30.0 + rng.random(), 78.0 + rng.random()), rng.choice([0, 20, 50]),
+               round(rng.uniform(3, 5), 1), "", 1.5, rng.choice(categories), 0.5) for i in range(int(places))]
+    print(f"{'objects':>28} {'before MiB':>11} {'after MiB':>10} {'saved':>6}")
+
+    def row(label: str, before: int, after: int):
+        print(f"{label:>28} {before / 2 ** 20:>11.1f} {after / 2 ** 20:>10.1f} {1 - after / before:>6.0%}")
+
+    _, before = _held_bytes(lambda: [_DictPlace(*f) for f in fields])
+    _, after = _held_bytes(lambda: [Place(*f) for f in fields])
+    row(f"{places} places", before, after)
+
+    compiled = grid_compiled(100, 100)
+    n = compiled.num_nodes
+    found = [find_route(compiled, compiled.names[rng.randrange(n)], compiled.names[rng.randrange(n)])
+             for _ in range(200)]
+    stops = sum(len(route.path) for route in found) / len(found)
+    picks = [found[rng.randrange(len(found))] for _ in range(int(routes))]
+    _, before = _held_bytes(lambda: [_ListRoute(r.path, r.distance, r.time, r.cost) for r in picks])
+    _, after = _held_bytes(lambda: [compiled.route(list(r.nodes), r.distance, r.time, r.cost) for r in picks])
+    row(f"{routes} routes, ~{stops:.0f} stops", before, after)
+
+    # Routes read back from the route store: decoding JSON gives every route its own name strings
+    rows = [json.dumps(r.path) for r in picks]
+    _, before = _held_bytes(lambda: [_ListRoute(json.loads(text), 0.0, 0.0, 0) for text in rows])
+    _, after = _held_bytes(lambda: [compiled.route([compiled.index[name] for name in json.loads(text)], 0.0, 0.0, 0)
+                                    for text in rows])
+    row(f"{routes} routes from the store", before, after)
+
+
+def bench_place_index(sizes: str = "10000,100000,1000000"):
+    """Sorted column indexes vs the old rating BST for range and compound place queries"""
+    # The BST also undercounts: ties go right, but its search stops going right
+    # at a node rated exactly max_rating, dropping the other places with that
+    # rating. "bst rows" is how many it finds
+    categories = ["Adventure", "Religious", "Market", "Nature", "Cultural", "Landmark", "Institution"]
+    queries = (
+        ("rating 4.0-5.0", (4.0, 5.0), None, None),
+        ("rating 4.5-4.6", (4.5, 4.6), None, None),
+        ("Nature 4.0+ <=50", (4.0, 5.0), "Nature", 50),
+    )
+    print(f"{'places':>8} {'query':>17} {'rows':>7} {'bst rows':>9} {'bst build ms':>13} {'bst ms':>8} "
+          f"{'index build ms':>15} {'index ms':>9} {'same':>5}")
+    for n in map(int, sizes.split(",")):
+        rng = random.Random(n)
+        # Ratings to one decimal, as in the catalog, so most share a value with others
+        places = {
+            f"P{i}": Place(f"P{i}", (30.0, 78.0), rng.choice([0, 0, 10, 20, 50, 100, 150]),
+                           round(rng.uniform(3.0, 5.0), 1), "", rng.choice([1.0, 1.5, 2.0, 2.5, 3.0]),
+                           rng.choice(categories), round(rng.random(), 2))
+            for i in range(n)
+        }
+
+        bst = _RatingBST()
+        began = time.perf_counter()
+        try:
+            for place in places.values():
+                bst.insert(place)
+            bst_build_ms = f"{(time.perf_counter() - began) * 1e3:.0f}"
+        except RecursionError:
+            bst = None
+            bst_build_ms = "recursion"
+
+        began = time.perf_counter()
+        table = PlaceTable(places)
+        for column in ("rating", "cost", "category"):
+            table.range(column)
+        index_build_ms = (time.perf_counter() - began) * 1e3
+
+        for label, rating, category, max_cost in queries:
+            began = time.perf_counter()
+            rows = table.query(category=category, rating=rating, cost=None if max_cost is None else (None, max_cost))
+            index_ms = (time.perf_counter() - began) * 1e3
+            expected = sorted(i for i, place in enumerate(table.places)
+                              if rating[0] <= place.rating <= rating[1]
+                              and (category is None or place.category == category)
+                              and (max_cost is None or place.cost <= max_cost))
+            bst_ms = bst_rows = "-"
+            if bst is not None:
+                began = time.perf_counter()
+                found = [place for place in bst.search_by_rating_range(*rating)
+                         if (category is None or place.category == category)
+                         and (max_cost is None or place.cost <= max_cost)]
+                bst_ms = f"{(time.perf_counter() - began) * 1e3:.2f}"
+                bst_rows = len(found)
+            print(f"{n:>8} {label:>17} {len(rows):>7} {bst_rows:>9} {bst_build_ms:>13} {bst_ms:>8} "
+                  f"{index_build_ms:>15.0f} {index_ms:>9.3f} {str(rows.tolist() == expected):>5}")
+
+
+
+def bench_spatial(points: str = "1000000"):
+    """Grid spatial index vs a full haversine scan for nearest, radius and box queries"""
+    n = int(points)
+    rng = np.random.default_rng(11)
+    # Half spread over the region, half in town-sized clusters, like a real catalog
+    spread = np.column_stack([rng.uniform(29.5, 31.5, n // 2), rng.uniform(77.0, 79.5, n // 2)])
+    centers = np.column_stack([rng.uniform(29.5, 31.5, 200), rng.uniform(77.0, 79.5, 200)])
+    clustered = centers[rng.integers(0, 200, n - n // 2)] + rng.normal(0, 0.02, (n - n // 2, 2))
+    coords = np.vstack([spread, clustered])
+    began = time.perf_counter()
+    index = SpatialIndex(coords)
+    print(f"{n} points, build {(time.perf_counter() - began) * 1e3:.0f} ms, "
+          f"{index.rows}x{index.cols} cells of {index.cell_deg:.4f} deg")
+
+    lat_rad, lon_rad = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    cos_lat = np.cos(lat_rad)
+
+    def scan_km(lat: float, lon: float) -> np.ndarray:
+        return haversine_km(math.radians(lat), math.radians(lon), math.cos(math.radians(lat)), lat_rad, lon_rad, cos_lat)
+
+    queries = coords[rng.integers(0, n, 200)] + rng.normal(0, 0.01, (200, 2))
+    cases = (
+        ("nearest k=1", lambda lat, lon: index.nearest(lat, lon, 1)[0],
+         lambda lat, lon: np.argsort(scan_km(lat, lon), kind="stable")[:1]),
+        ("nearest k=10", lambda lat, lon: index.nearest(lat, lon, 10)[0],
+         lambda lat, lon: np.argsort(scan_km(lat, lon), kind="stable")[:10]),
+        ("within 1 km", lambda lat, lon: np.sort(index.within(lat, lon, 1.0)[0]),
+         lambda lat, lon: np.flatnonzero(scan_km(lat, lon) <= 1.0)),
+        ("box 0.02 deg", lambda lat, lon: index.in_box(lat - 0.01, lon - 0.01, lat + 0.01, lon + 0.01),
+         lambda lat, lon: np.flatnonzero((np.abs(coords[:, 0] - lat) <= 0.01) & (np.abs(coords[:, 1] - lon) <= 0.01))),
+    )
+    print(f"{'query':>13} {'avg rows':>9} {'scan ms':>8} {'index ms':>9} {'speedup':>8} {'same':>5}")
+    for label, query, scan in cases:
+        began = time.perf_counter()
+        found = [query(lat, lon) for lat, lon in queries]
+        index_ms = (time.perf_counter() - began) * 1e3 / len(queries)
+        began = time.perf_counter()
+        expected = [scan(lat, lon) for lat, lon in queries[:20]]
+        scan_ms = (time.perf_counter() - began) * 1e3 / 20
+        # Ties at equal distance may come back in either order
+        same = all(set(a.tolist()) == set(b.tolist()) for a, b in zip(found, expected))
+        rows = sum(len(f) for f in found) / len(found)
+        print(f"{label:>13} {rows:>9.1f} {scan_ms:>8.2f} {index_ms:>9.3f} {scan_ms / index_ms:>7.0f}x {str(same):>5}")
+
+
+def bench_search(places: str = "100000"):
+    """Per-keystroke latency of place search (prefix, full-text, fuzzy) vs a substring scan over ~100k places"""
+    n = int(places)
+    rng = random.Random(17)
+    stems = ["Tapkeshwar", "Sahastra", "Robber", "Mindrolling", "Maldevta", "Rajaji", "Paltan", "Buddha",
+             "Lacchiwala", "Chandrabani", "Kalanga", "Santala", "Jharipani", "Malsi", "Kempty", "Bhatta"]
+    kinds = ["Temple", "Falls", "Cave", "Bazaar", "Park", "Monastery", "Garden", "Fort", "Lake", "Market",
+             "Museum", "View Point", "Ashram", "Ghat", "Trail"]
+    vocabulary = ("ancient cave shiva stream forest waterfall sulphur springs river shopping street food "
+                  "hilltop sunset picnic wildlife elephant tiger birds monastery stupa colonial clock "
+                  "tower market trekking camping rafting lake boating garden heritage museum").split()
+    categories = ["Adventure", "Religious", "Market", "Nature", "Cultural", "Landmark", "Institution"]
+    names = [f"{rng.choice(stems)}{rng.choice(['', 'pur', 'wala', 'dhara', ' Kalan'])} {rng.choice(kinds)} {i}"
+             for i in range(n)]
+    descriptions = [" ".join(rng.choices(vocabulary, k=rng.randint(6, 16))).capitalize() for _ in range(n)]
+    category = [rng.choice(categories) for _ in range(n)]
+    began = time.perf_counter()
+    search = PlaceSearch(names, descriptions, category, np.array([rng.random() for _ in range(n)]))
+    print(f"{n} places, index build {(time.perf_counter() - began) * 1e3:.0f} ms")
+
+    texts = [f"{name} {kind} {description}".lower() for name, kind, description in zip(names, category, descriptions)]
+
+    def scan(query: str) -> List[int]:
+        # Filtering the combobox list as it stands: a substring test per place
+        query = query.lower()
+        return [row for row, text in enumerate(texts) if query in text][:20]
+
+    print(f"{'typed':>18} {'keys':>5} {'scan ms/key':>12} {'search ms/key':>14} {'max ms':>7} {'top hit':>28}")
+    for typed in ("tapkeshwar temple", "waterfall", "shiva cave", "sahastradhra falls", "robbers cav", "mindroling"):
+        prefixes = [typed[:i] for i in range(1, len(typed) + 1)]
+        began = time.perf_counter()
+        for prefix in prefixes[::4]:
+            scan(prefix)
+        scan_ms = (time.perf_counter() - began) * 1e3 / len(prefixes[::4])
+        timings = []
+        for prefix in prefixes:
+            began = time.perf_counter()
+            rows = search.search(prefix)
+            timings.append((time.perf_counter() - began) * 1e3)
+        top = names[rows[0]] if len(rows) else "-"
+        print(f"{typed:>18} {len(prefixes):>5} {scan_ms:>12.1f} {sum(timings) / len(timings):>14.2f} "
+              f"{max(timings):>7.2f} {top:>28}")
+
+
+def bench_replanning():
+    """D* Lite repair after road closures and while driving vs A* from scratch on a 150x150 grid"""
+    compiled = grid_compiled(150, 150, arterial_every=8)
+    profile = PROFILES["combined"]
+    timings = {"initial": [], "closure": [], "drive": [], "scratch": []}
+    expanded = {key: [] for key in timings}
+
+    def scratch(router: IncrementalRouter):
+        # Closures only raise weights, so the static potential stays admissible
+        stats = {}
+        began = time.perf_counter()
+        _astar(compiled, compiled.node_id(router.start), router.goal, router.weights,
+               compiled.potentials(router.goal, profile).tolist(), stats)
+        timings["scratch"].append(time.perf_counter() - began)
+        expanded["scratch"].append(stats["expanded"])
+
+    def repair(router: IncrementalRouter, kind: str) -> Route:
+        stats = {}
+        began = time.perf_counter()
+        route = router.route(stats)
+        timings[kind].append(time.perf_counter() - began)
+        expanded[kind].append(stats["expanded"])
+        scratch(router)
+        return route
+
+    for seed in range(10):
+        start, end = random.Random(seed).sample(compiled.names, 2)
+        router = IncrementalRouter(compiled, start, end, profile)
+        route = repair(router, "initial")
+        # A road halfway along the route closes in both directions
+        middle = len(route.path) // 2
+        u, v = route.path[middle - 1], route.path[middle]
+        router.update_edges([(u, v, math.inf), (v, u, math.inf)])
+        route = repair(router, "closure")
+        # Drive five stops; each time the road just ahead slows to a crawl
+        for _ in range(5):
+            if len(route.path) < 3:
+                break
+            router.advance(route.path[1])
+            u, v = route.path[1], route.path[2]
+            e = compiled.edge_id(compiled.node_id(u), compiled.node_id(v))
+            router.update_edges([(u, v, router.time[e] * 4)])
+            route = repair(router, "drive")
+
+    print(f"{'step':>8} {'runs':>5} {'ms':>8} {'expanded':>9}")
+    for kind in timings:
+        print(f"{kind:>8} {len(timings[kind]):>5} {sum(timings[kind]) / len(timings[kind]) * 1e3:>8.2f} "
+              f"{sum(expanded[kind]) / len(expanded[kind]):>9.0f}")
+
+
+def bench_batch(max_workers: str = ""):
+    """Batch routing throughput on a process pool, 1 to N workers, vs in-process"""
+    max_workers = int(max_workers) if max_workers else os.cpu_count() or 1
+    compiled = grid_compiled(150, 150, arterial_every=8)
+    rng = random.Random(12)
+    queries = [(*rng.sample(compiled.names, 2), rng.choice(list(PROFILES))) for _ in range(400)]
+    print(f"cpus {os.cpu_count()}, graph pickled per task would be "
+          f"{len(pickle.dumps(compiled)) / 2 ** 20:.1f} MiB; a 64-query chunk is "
+          f"{len(pickle.dumps(queries[:64])) / 2 ** 10:.1f} KiB")
+
+    began = time.perf_counter()
+    for start, end, profile in queries:
+        find_route(compiled, start, end, profile)
+    baseline = len(queries) / (time.perf_counter() - began)
+    print(f"{'workers':>8} {'queries/s':>10} {'speedup':>8} {'first result ms':>16}")
+    print(f"{'inline':>8} {baseline:>10.0f} {1.0:>8.2f} {'-':>16}")
+    for workers in range(1, max_workers + 1):
+        began = time.perf_counter()
+        first = None
+        for _ in route_batch(compiled, queries, workers):
+            if first is None:
+                first = time.perf_counter() - began
+        throughput = len(queries) / (time.perf_counter() - began)
+        print(f"{workers:>8} {throughput:>10.0f} {throughput / baseline:>8.2f} {first * 1e3:>16.0f}")
+
+
+BENCHMARKS = {
+    "path_reconstruction": bench_path_reconstruction,
+    "heuristic": bench_heuristic,
+    "bidirectional": bench_bidirectional,
+    "travel_matrix": bench_travel_matrix,
+    "contraction": bench_contraction,
+    "profiles": bench_profiles,
+    "pareto": bench_pareto,
+    "alternatives": bench_alternatives,
+    "traffic": bench_traffic,
+    "replanning": bench_replanning,
+    "isochrone": bench_isochrone,
+    "route_cache": bench_route_cache,
+    "route_store": bench_route_store,
+    "itinerary": bench_itinerary,
+    "recommendations": bench_recommendations,
+    "knapsack": bench_knapsack,
+    "scoring": bench_scoring,
+    "catalog": bench_catalog,
+    "city_snapshot": bench_city_snapshot,
+    "memory": bench_memory,
+    "corridor": bench_corridor,
+    "place_index": bench_place_index,
+    "spatial": bench_spatial,
+    "search": bench_search,
+    "batch": bench_batch,
+}
+
+
+if __name__ == "__main__":
+    # python benchmarks.py [name [args...]]
+    selected = sys.argv[1:2] or list(BENCHMARKS)
+    for name in selected:
+        print(f"== {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name](*sys.argv[2:])
+        print()
@@ -0,0 +1,160 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from travel_data import Place
+
+# Shipped catalog: an index file plus one JSON file per city
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+INDEX_FILE = "catalog.json"
+
+# Layout of the index and city files; readers refuse other formats
+CATALOG_FORMAT = 1
+
+
+@dataclass
+class City:
+    name: str
+    # Data revision from the catalog index
+    version: int
+    center: Tuple[float, float]
+    places: Dict[str, Place]
+    graph: Dict[str, Dict[str, dict]]
+
+
+class Catalog:
+    """Places and roads per city, read from a catalog directory.
+
+    Only the small index is read up front; a city's file is parsed the first
+    time that city is asked for and kept afterwards, so start-up time and
+    memory follow the cities in use rather than the whole dataset. Each
+    city file carries the version the index expects, so a file left over
+    from another revision of the catalog is refused instead of mixed in.
+    """
+
+    def __init__(self, directory: str = CATALOG_DIR):
+        self.directory = directory
+        index = _read_json(os.path.join(directory, INDEX_FILE))
+        self.default_city: Optional[str] = index.get("default")
+        self._entries: Dict[str, dict] = index["cities"]
+        self._loaded: Dict[str, City] = {}
+
+    def cities(self) -> List[str]:
+        return list(self._entries)
+
+    def city_file(self, name: str) -> str:
+        """Path of the city's data file"""
+        try:
+            return os.path.join(self.directory, self._entries[name]["file"])
+        except KeyError:
+            raise KeyError(f"Unknown city: {name}") from None
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def city(self, name: Optional[str] = None) -> City:
+        """The named city (the catalog's default if None), loading it on first use"""
+        if name is None:
+            name = self.default_city
+        if name not in self._loaded:
+            self._loaded[name] = self._load(name)
+        return self._loaded[name]
+
+    def unload(self, name: str):
+        """Forget a loaded city; it is read again if asked for"""
+        self._loaded.pop(name, None)
+
+    def _load(self, name: str) -> City:
+        path = self.city_file(name)
+        entry = self._entries[name]
+        data = _read_json(path)
+        if data.get("city") != name or data.get("version") != entry["version"]:
+            raise ValueError(f"{entry['file']} does not hold version {entry['version']} of {name}")
+
+        places = {
+            record["key"]: Place(record["name"], tuple(record["coords"]), record["cost"], record["rating"],
+                                 record["description"], record["visit_time"], record["category"],
+                                 record["popularity_score"])
+            for record in data["places"]
+        }
+        graph: Dict[str, Dict[str, dict]] = {}
+        for road in data["roads"]:
+            graph.setdefault(road["from"], {})[road["to"]] = {"dist": road["dist"], "time": road["time"]}
+        return City(name, entry["version"], tuple(entry["center"]), places, graph)
+
+
+def write_city(directory: str, name: str, places: Dict[str, Place], graph: Dict[str, Dict[str, dict]],
+               center: Tuple[float, float], version: int = 1, default: bool = False):
+    """Write a city's file and add or update its entry in the directory's index"""
+    os.makedirs(directory, exist_ok=True)
+    index_path = os.path.join(directory, INDEX_FILE)
+    if os.path.exists(index_path):
+        index = _read_json(index_path)
+    else:
+        index = {"format": CATALOG_FORMAT, "default": None, "cities": {}}
+    file_name = _file_name(name)
+
+    _write_json(os.path.join(directory, file_name), {
+        "format": CATALOG_FORMAT,
+        "city": name,
+        "version": version,
+        "places": [
+            {"key": key, "name": place.name, "coords": list(place.coords), "cost": place.cost,
+             "rating": place.rating, "description": place.description, "visit_time": place.visit_time,
+             "category": place.category, "popularity_score": place.popularity_score}
+            for key, place in places.items()
+        ],
+        "roads": [
+            {"from": u, "to": v, "dist": attrs["dist"], "time": attrs["time"]}
+            for u, neighbors in graph.items() for v, attrs in neighbors.items()
+        ],
+    })
+    index["cities"][name] = {"file": file_name, "version": version, "center": list(center)}
+    if default or index["default"] is None:
+        index["default"] = name
+    _write_json(index_path, index)
+
+
+_default_catalog: Optional[Catalog] = None
+
+
+def default_catalog() -> Catalog:
+    """The shipped catalog, opened on first use"""
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = Catalog()
+    return _default_catalog
+
+
+def _file_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name.lower()) + ".json"
+
+
+def _read_json(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format") != CATALOG_FORMAT:
+        raise ValueError(f"{path} is catalog format {data.get('format')}, expected {CATALOG_FORMAT}")
+    return data
+
+
+def _write_json(path: str, data: dict):
+    # One record per line keeps city files readable and their diffs small
+    fields = []
+    for key, value in data.items():
+        if isinstance(value, list) and value:
+            items = ",\n".join(f"  {json.dumps(item, ensure_ascii=False)}" for item in value)
+            text = f"[\n{items}\n ]"
+        elif isinstance(value, dict) and value:
+            items = ",\n".join(f"  {json.dumps(k, ensure_ascii=False)}: {json.dumps(v, ensure_ascii=False)}"
+                                for k, v in value.items())
+            text = f"{{\n{items}\n }}"
+        else:
+            text = json.dumps(value, ensure_ascii=False)
+        fields.append(f" {json.dumps(key, ensure_ascii=False)}: {text}")
+    # Replace atomically so a crash never leaves a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("{\n" + ",\n".join(fields) + "\n}\n")
+    os.replace(tmp_path, path)
@@ -0,0 +1,277 @@
+"""Validate catalog cities and compile them into memory-mappable snapshots.
+
+Run ``python catalog_compiler.py [catalog_dir] [snapshot_dir]`` as a build
+step: it checks every city and writes the snapshots the app maps at start-up,
+exiting non-zero if any city has errors.
+"""
+import hashlib
+import math
+import os
+import sys
+import tempfile
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from catalog import Catalog, City
+from place_table import PlaceTable
+from routing import _GRAPH_FIELDS, EARTH_RADIUS_KM, CompiledGraph, compile_graph
+from snapshot import read_snapshot, write_snapshot
+from travel_data import Place
+
+CITY_MAGIC = b"TTGCTY01"
+
+# Compiled snapshots live with the app's other caches unless told otherwise
+SNAPSHOT_DIR = tempfile.gettempdir()
+
+# A place further than this from its city's centre has bad coordinates
+MAX_CITY_RADIUS_KM = 100.0
+
+# A road shorter than this share of the straight line between its ends
+# means its length or its places' coordinates are off
+MIN_ROAD_STRETCH = 0.9
+
+
+class CatalogError(ValueError):
+    """A city failed validation; problems lists every error found"""
+
+    def __init__(self, city: str, problems: List[str]):
+        self.city = city
+        self.problems = problems
+        super().__init__(f"{city}: {len(problems)} catalog error(s): " + "; ".join(problems[:5]))
+
+
+@dataclass
+class CompiledCity:
+    name: str
+    version: int
+    center: Tuple[float, float]
+    graph: CompiledGraph
+    table: PlaceTable
+    # Problems that do not stop the build (one-way roads, short roads)
+    warnings: List[str] = field(default_factory=list)
+
+
+def check_city(city: City) -> Tuple[List[str], List[str]]:
+    """(errors, warnings) for a city's places and roads
+
+    Errors: catalog keys that differ from place names, roads to unknown
+    places, impossible coordinates or attributes, places far from the
+    centre, non-positive road lengths, the two directions of a road
+    disagreeing, and places that cannot be reached from every other place.
+    Warnings: one-way roads and roads shorter than the straight line.
+    """
+    errors: List[str] = []
+    warnings: List[str] = []
+    places, graph = city.places, city.graph
+
+    seen_names: Dict[str, str] = {}
+    for key, place in places.items():
+        if key != place.name:
+            errors.append(f'Place key "{key}" holds a place named "{place.name}"')
+        if place.name in seen_names:
+            errors.append(f'"{key}" and "{seen_names[place.name]}" are both named "{place.name}"')
+        seen_names.setdefault(place.name, key)
+        errors.extend(_place_problems(key, place, city.center))
+
+    for u, edges in graph.items():
+        for v, attrs in edges.items():
+            road = f"Road {u} -> {v}"
+            unknown = [name for name in (u, v) if name not in places]
+            if unknown:
+                errors.append(f"{road}: no place called {', '.join(unknown)}")
+                continue
+            if u == v:
+                errors.append(f"{road}: road from a place to itself")
+            if not (attrs["dist"] > 0 and attrs["time"] > 0):
+                errors.append(f"{road}: distance and time must be positive")
+            back = graph.get(v, {}).get(u)
+            if back is None:
+                warnings.append(f"{road} is one-way")
+            elif u < v and (back["dist"], back["time"]) != (attrs["dist"], attrs["time"]):
+                errors.append(f"{road}: the way back is {back['dist']} km / {back['time']} min, "
+                              f"not {attrs['dist']} km / {attrs['time']} min")
+            straight = _km(places[u].coords, places[v].coords)
+            if attrs["dist"] < straight * MIN_ROAD_STRETCH:
+                warnings.append(f"{road}: {attrs['dist']} km of road for {straight:.1f} km of straight line")
+
+    if places:
+        first = next(iter(places))
+        forward = {u: [v for v in edges if v in places] for u, edges in graph.items() if u in places}
+        backward: Dict[str, List[str]] = {}
+        for u, targets in forward.items():
+            for v in targets:
+                backward.setdefault(v, []).append(u)
+        reached = _reachable(first, forward)
+        unreached = [name for name in places if name not in reached]
+        if unreached:
+            errors.append(f"{_list(unreached)} cannot be reached from {first}")
+        reaching = _reachable(first, backward)
+        stranded = [name for name in places if name not in reaching]
+        if stranded:
+            errors.append(f"{first} cannot be reached from {_list(stranded)}")
+    return errors, warnings
+
+
+def compile_city(catalog: Catalog, name: str, path: str) -> CompiledCity:
+    """Validate a city and write its snapshot to path; raises CatalogError if it has errors"""
+    city = catalog.city(name)
+    errors, warnings = check_city(city)
+    if errors:
+        raise CatalogError(name, errors)
+    graph = compile_graph(city.graph, city.places)
+    table = PlaceTable(city.places)
+
+    # Names, then descriptions, interned into one UTF-8 pool
+    encoded = [text.encode("utf-8") for text in table.keys + list(table.descriptions)]
+    string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in encoded], out=string_offsets[1:])
+    header = {
+        "city": name,
+        "version": city.version,
+        "center": list(city.center),
+        "source": _source_hash(catalog, name),
+        "fingerprint": graph.fingerprint(),
+        "categories": table.categories,
+        "warnings": warnings,
+    }
+    arrays = {field_name: getattr(graph, field_name) for field_name in _GRAPH_FIELDS}
+    arrays.update(
+        rating=table.rating, place_cost=table.cost, visit_time=table.visit_time, popularity=table.popularity,
+        category=table.category, strings=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        string_offsets=string_offsets,
+    )
+    write_snapshot(path, CITY_MAGIC, header, arrays)
+    return CompiledCity(name, city.version, city.center, graph, table, warnings)
+
+
+def load_city(path: str, catalog: Optional[Catalog] = None, name: Optional[str] = None) -> Optional[CompiledCity]:
+    """Map a city snapshot; None if missing, corrupt, or (given a catalog) built from other data"""
+    snapshot = read_snapshot(path, CITY_MAGIC)
+    if snapshot is None:
+        return None
+    header, arrays = snapshot
+    try:
+        if catalog is not None and (header["city"] != name or header["source"] != _source_hash(catalog, name)):
+            return None
+        pool = arrays["strings"]
+        bounds = arrays["string_offsets"]
+        n = len(arrays["rating"])
+        if len(bounds) != 2 * n + 1:
+            return None
+        # Names are needed to route; descriptions are decoded when a place is shown or searched
+        names = [pool[a:b].tobytes().decode("utf-8") for a, b in zip(bounds[:n].tolist(), bounds[1:n + 1].tolist())]
+        descriptions = _StringPool(pool, bounds[n:])
+
+        graph = CompiledGraph(names, *(arrays[field_name] for field_name in _GRAPH_FIELDS))
+        table = PlaceTable.from_columns(
+            names, descriptions, header["categories"], arrays["rating"], arrays["place_cost"],
+            arrays["visit_time"], arrays["popularity"], arrays["category"], arrays["coords"],
+        )
+        return CompiledCity(header["city"], header["version"], tuple(header["center"]), graph, table,
+                            header["warnings"])
+    except (KeyError, IndexError, TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+
+class _StringPool(Sequence[str]):
+    """UTF-8 strings packed end to end, decoded one at a time when read"""
+
+    def __init__(self, pool: np.ndarray, bounds: np.ndarray):
+        self._pool = pool
+        self._bounds = bounds
+
+    def __len__(self) -> int:
+        return len(self._bounds) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        i %= len(self)
+        return self._pool[int(self._bounds[i]):int(self._bounds[i + 1])].tobytes().decode("utf-8")
+
+
+def load_or_compile_city(catalog: Catalog, name: Optional[str] = None,
+                         directory: str = SNAPSHOT_DIR) -> CompiledCity:
+    """The city's snapshot if it was built from the current data, else validate, compile and save it"""
+    name = name or catalog.default_city
+    path = snapshot_path(catalog, name, directory)
+    compiled = load_city(path, catalog, name)
+    if compiled is None:
+        compiled = compile_city(catalog, name, path)
+    return compiled
+
+
+def snapshot_path(catalog: Catalog, name: str, directory: str = SNAPSHOT_DIR) -> str:
+    stem = os.path.splitext(os.path.basename(catalog.city_file(name)))[0]
+    return os.path.join(directory, f"{stem}.city.bin")
+
+
+def _place_problems(key: str, place: Place, center: Tuple[float, float]) -> List[str]:
+    problems = []
+    lat, lon = place.coords
+    if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+        problems.append(f"{key}: coordinates {place.coords} are not a point on Earth")
+    elif _km(place.coords, center) > MAX_CITY_RADIUS_KM:
+        problems.append(f"{key}: {_km(place.coords, center):.0f} km from the city centre")
+    if not 0 <= place.rating <= 5:
+        problems.append(f"{key}: rating {place.rating} is outside 0-5")
+    if place.cost < 0:
+        problems.append(f"{key}: negative entry fee {place.cost}")
+    if not place.visit_time > 0:
+        problems.append(f"{key}: visit time must be positive")
+    if not 0 <= place.popularity_score <= 1:
+        problems.append(f"{key}: popularity {place.popularity_score} is outside 0-1")
+    return problems
+
+
+def _km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _reachable(start: str, adjacency: Dict[str, List[str]]) -> set:
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        for v in adjacency.get(queue.popleft(), ()):
+            if v not in seen:
+                seen.add(v)
+                queue.append(v)
+    return seen
+
+
+def _list(names: List[str], limit: int = 10) -> str:
+    shown = ", ".join(names[:limit])
+    return shown if len(names) <= limit else f"{shown} and {len(names) - limit} more"
+
+
+def _source_hash(catalog: Catalog, name: str) -> str:
+    with open(catalog.city_file(name), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def main(argv: List[str]) -> int:
+    catalog = Catalog(*argv[:1])
+    directory = argv[1] if len(argv) > 1 else SNAPSHOT_DIR
+    failed = False
+    for name in catalog.cities():
+        try:
+            compiled = compile_city(catalog, name, snapshot_path(catalog, name, directory))
+        except CatalogError as e:
+            failed = True
+            print(f"{name}: FAILED")
+            for problem in e.problems:
+                print(f"  error: {problem}")
+            continue
+        print(f"{name}: {compiled.graph.num_nodes} places, {compiled.graph.num_edges} roads")
+        for warning in compiled.warnings:
+            print(f"  warning: {warning}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
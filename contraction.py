@@ -0,0 +1,369 @@
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from routing import CompiledGraph, RoutingProfile, get_profile
+from snapshot import read_snapshot, write_snapshot
+from travel_data import Route
+
+HIERARCHY_MAGIC = b"TTGCH001"
+
+# Witness searches give up after settling this many nodes; a missed witness
+# only costs an unnecessary shortcut, never a wrong answer
+WITNESS_SETTLE_LIMIT = 50
+
+# (cost, dist, time, middle node or -1 for an original edge)
+Edge = Tuple[float, float, float, int]
+
+
+class ContractionHierarchy:
+    """Contraction Hierarchy over a CompiledGraph for one routing profile.
+
+    Every node has a rank. ``up_*`` is a CSR of edges u -> v with
+    rank[v] > rank[u], indexed by u; ``down_*`` is a CSR of edges u -> v
+    with rank[u] > rank[v], indexed by v. Shortcut edges record the
+    contracted middle node so routes can be unpacked to original edges.
+    """
+
+    def __init__(self, compiled: CompiledGraph, profile: RoutingProfile,
+                 rank: np.ndarray, up: Dict[str, np.ndarray], down: Dict[str, np.ndarray], fingerprint: str):
+        self.compiled = compiled
+        self.profile = profile
+        self.rank = rank
+        self.up = up
+        self.down = down
+        self.fingerprint = fingerprint
+
+        # Plain-list mirrors for the query loops
+        self._rank = rank.tolist()
+        self._up = {name: array.tolist() for name, array in up.items()}
+        self._down = {name: array.tolist() for name, array in down.items()}
+
+    @property
+    def num_shortcuts(self) -> int:
+        return int(np.count_nonzero(self.up["middle"] >= 0) + np.count_nonzero(self.down["middle"] >= 0))
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, profile: Union[str, RoutingProfile] = "combined",
+              settle_limit: int = WITNESS_SETTLE_LIMIT) -> "ContractionHierarchy":
+        """Contract nodes in lazily updated edge-difference order"""
+        profile = get_profile(profile)
+        n = compiled.num_nodes
+        edge_cost = compiled.edge_weights(profile).tolist()
+        out_adj: List[Dict[int, Edge]] = [{} for _ in range(n)]
+        in_adj: List[Dict[int, Edge]] = [{} for _ in range(n)]
+        offsets, targets = compiled._offsets, compiled._targets
+        for u in range(n):
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                if v == u:
+                    continue
+                edge = (edge_cost[e], compiled._dist[e], compiled._time[e], -1)
+                if v not in out_adj[u] or edge[0] < out_adj[u][v][0]:
+                    out_adj[u][v] = edge
+                    in_adj[v][u] = edge
+
+        contracted_neighbors = [0] * n
+        level = [0] * n
+
+        def priority(v: int) -> Tuple[float, List[Tuple[int, int, Edge]]]:
+            # Edge difference keeps the graph sparse; contracted neighbors and
+            # level spread contraction evenly so the hierarchy stays shallow
+            shortcuts = _needed_shortcuts(v, out_adj, in_adj, settle_limit)
+            degree = len(in_adj[v]) + len(out_adj[v])
+            return 2 * (len(shortcuts) - degree) + contracted_neighbors[v] + level[v], shortcuts
+
+        queue = [(priority(v)[0], v) for v in range(n)]
+        heapq.heapify(queue)
+
+        rank = np.zeros(n, dtype=np.int32)
+        up_edges: List[List[Tuple[int, Edge]]] = [[] for _ in range(n)]
+        down_edges: List[List[Tuple[int, Edge]]] = [[] for _ in range(n)]
+        order = 0
+        while queue:
+            _, v = heapq.heappop(queue)
+            # Lazy update: re-evaluate and defer if v is no longer the cheapest
+            current, shortcuts = priority(v)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, v))
+                continue
+
+            rank[v] = order
+            order += 1
+            # Remaining neighbors all end up with a higher rank than v
+            up_edges[v] = list(out_adj[v].items())
+            down_edges[v] = list(in_adj[v].items())
+            for w in out_adj[v]:
+                del in_adj[w][v]
+            for u in in_adj[v]:
+                del out_adj[u][v]
+            for neighbor in out_adj[v].keys() | in_adj[v].keys():
+                contracted_neighbors[neighbor] += 1
+                level[neighbor] = max(level[neighbor], level[v] + 1)
+            out_adj[v] = {}
+            in_adj[v] = {}
+            for u, w, edge in shortcuts:
+                if w not in out_adj[u] or edge[0] < out_adj[u][w][0]:
+                    out_adj[u][w] = edge
+                    in_adj[w][u] = edge
+
+        up = _to_csr(up_edges, "targets")
+        down = _to_csr(down_edges, "sources")
+        return cls(compiled, profile, rank, up, down, compiled.fingerprint())
+
+    def route(self, start: str, end: str, stats: Optional[Dict[str, int]] = None) -> Route:
+        """Best start -> end route via a bidirectional upward search"""
+        compiled = self.compiled
+        source = compiled.node_id(start)
+        goal = compiled.node_id(end)
+
+        up_offsets, up_targets, up_cost = self._up["offsets"], self._up["targets"], self._up["cost"]
+        down_offsets, down_sources, down_cost = self._down["offsets"], self._down["sources"], self._down["cost"]
+
+        inf = math.inf
+        # Search spaces are tiny, so dicts beat allocating per-node arrays
+        g_fwd = {source: 0.0}
+        g_bwd = {goal: 0.0}
+        parent_fwd: Dict[int, int] = {}
+        parent_bwd: Dict[int, int] = {}
+        open_fwd = [(0.0, source)]
+        open_bwd = [(0.0, goal)]
+        best = inf
+        meeting = -1
+        expanded = 0
+
+        while open_fwd or open_bwd:
+            # Each side stops once its frontier cannot beat the best meeting
+            if open_fwd and open_fwd[0][0] >= best:
+                open_fwd = []
+            if open_bwd and open_bwd[0][0] >= best:
+                open_bwd = []
+            if not open_fwd and not open_bwd:
+                break
+
+            forward = bool(open_fwd) and (not open_bwd or open_fwd[0][0] <= open_bwd[0][0])
+            heap, g_this, g_other, parent = (
+                (open_fwd, g_fwd, g_bwd, parent_fwd) if forward else (open_bwd, g_bwd, g_fwd, parent_bwd)
+            )
+            g_score, current = heapq.heappop(heap)
+            if g_score > g_this[current]:
+                continue
+            expanded += 1
+            if current in g_other and g_score + g_other[current] < best:
+                best = g_score + g_other[current]
+                meeting = current
+
+            if forward:
+                offsets, neighbors, costs = up_offsets, up_targets, up_cost
+                stall_offsets, stall_neighbors, stall_costs = down_offsets, down_sources, down_cost
+            else:
+                offsets, neighbors, costs = down_offsets, down_sources, down_cost
+                stall_offsets, stall_neighbors, stall_costs = up_offsets, up_targets, up_cost
+
+            # Stall-on-demand: if a higher-ranked node already reached by this
+            # side offers a cheaper way into current, current is not on a
+            # shortest path and its edges need not be relaxed
+            stalled = False
+            for e in range(stall_offsets[current], stall_offsets[current + 1]):
+                if g_this.get(stall_neighbors[e], inf) + stall_costs[e] < g_score:
+                    stalled = True
+                    break
+            if stalled:
+                continue
+
+            for e in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[e]
+                tentative_g = g_score + costs[e]
+                if tentative_g < g_this.get(neighbor, inf):
+                    g_this[neighbor] = tentative_g
+                    parent[neighbor] = e
+                    heapq.heappush(heap, (tentative_g, neighbor))
+
+        if stats is not None:
+            stats["expanded"] = expanded
+        if meeting < 0:
+            return Route([start, end], 0, 0, 0)
+
+        # Collect the hierarchy edges on both halves, then unpack shortcuts
+        forward_edges = []
+        current = meeting
+        while current != source:
+            e = parent_fwd[current]
+            previous = self._up_source(e)
+            forward_edges.append((previous, current, e, True))
+            current = previous
+        forward_edges.reverse()
+        backward_edges = []
+        current = meeting
+        while current != goal:
+            e = parent_bwd[current]
+            following = self._down["targets"][e]
+            backward_edges.append((current, following, e, False))
+            current = following
+
+        path = [source]
+        total_dist = total_time = 0.0
+        for u, v, e, is_up in forward_edges + backward_edges:
+            edges = self._up if is_up else self._down
+            total_dist += edges["dist"][e]
+            total_time += edges["time"][e]
+            path.extend(self._unpack(u, v, edges["middle"][e]))
+        node_cost = compiled._node_cost
+        return compiled.route(
+            path,
+            total_dist,
+            total_time,
+            sum(node_cost[u] for u in path),
+        )
+
+    def _up_source(self, e: int) -> int:
+        """Tail node of up-edge e"""
+        return self._up["sources"][e]
+
+    def _find_edge(self, u: int, v: int) -> Tuple[Dict[str, list], int]:
+        """Locate hierarchy edge u -> v; it is stored at whichever end ranks lower"""
+        if self._rank[u] < self._rank[v]:
+            edges, anchor, key, other = self._up, u, "targets", v
+        else:
+            edges, anchor, key, other = self._down, v, "sources", u
+        ends = edges[key]
+        for e in range(edges["offsets"][anchor], edges["offsets"][anchor + 1]):
+            if ends[e] == other:
+                return edges, e
+        raise KeyError(f"Missing hierarchy edge {u} -> {v}")
+
+    def _unpack(self, u: int, v: int, middle: int) -> List[int]:
+        """Original nodes after u on the path represented by edge u -> v"""
+        unpacked = []
+        stack = [(u, v, middle)]
+        while stack:
+            a, b, m = stack.pop()
+            if m < 0:
+                unpacked.append(b)
+                continue
+            # Push the second half first so the first half is unpacked first
+            second, e2 = self._find_edge(m, b)
+            first, e1 = self._find_edge(a, m)
+            stack.append((m, b, second["middle"][e2]))
+            stack.append((a, m, first["middle"][e1]))
+        return unpacked
+
+    def save(self, path: str):
+        """Write the hierarchy as a memory-mappable snapshot"""
+        header = {
+            "nodes": self.compiled.num_nodes,
+            "profile": self.profile.name,
+            "weights": self.compiled.layer_fingerprint(self.profile),
+            "fingerprint": self.fingerprint,
+        }
+        arrays = {"rank": self.rank}
+        arrays.update({f"up_{name}": array for name, array in self.up.items()})
+        arrays.update({f"down_{name}": array for name, array in self.down.items()})
+        write_snapshot(path, HIERARCHY_MAGIC, header, arrays)
+
+    @classmethod
+    def load(cls, path: str, compiled: CompiledGraph,
+             profile: Union[str, RoutingProfile] = "combined") -> Optional["ContractionHierarchy"]:
+        """Load a snapshot; None if missing, corrupt or built for another graph/profile"""
+        profile = get_profile(profile)
+        snapshot = read_snapshot(path, HIERARCHY_MAGIC)
+        if snapshot is None:
+            return None
+        header, arrays = snapshot
+        if (header.get("nodes") != compiled.num_nodes
+                or header.get("profile") != profile.name
+                or header.get("weights") != compiled.layer_fingerprint(profile)
+                or header.get("fingerprint") != compiled.fingerprint()):
+            return None
+        try:
+            up = {name[3:]: arrays[name] for name in arrays if name.startswith("up_")}
+            down = {name[5:]: arrays[name] for name in arrays if name.startswith("down_")}
+            return cls(compiled, profile, arrays["rank"], up, down, header["fingerprint"])
+        except KeyError:
+            return None
+
+
+def load_or_build_hierarchy(path: str, compiled: CompiledGraph,
+                            profile: Union[str, RoutingProfile] = "combined") -> ContractionHierarchy:
+    """Reuse the snapshot at path if it still matches the graph, else rebuild and save it"""
+    hierarchy = ContractionHierarchy.load(path, compiled, profile)
+    if hierarchy is None:
+        hierarchy = ContractionHierarchy.build(compiled, profile)
+        try:
+            hierarchy.save(path)
+        except OSError:
+            pass
+    return hierarchy
+
+
+def _needed_shortcuts(v: int, out_adj: List[Dict[int, Edge]], in_adj: List[Dict[int, Edge]],
+                      settle_limit: int) -> List[Tuple[int, int, Edge]]:
+    """Shortcuts u -> w required if v is contracted now"""
+    shortcuts = []
+    outgoing = out_adj[v]
+    if not outgoing:
+        return shortcuts
+    max_out = max(edge[0] for edge in outgoing.values())
+    for u, (cost_in, dist_in, time_in, _) in in_adj[v].items():
+        witness = _witness_search(u, v, cost_in + max_out, outgoing, out_adj, settle_limit)
+        for w, (cost_out, dist_out, time_out, _) in outgoing.items():
+            if w == u:
+                continue
+            via = cost_in + cost_out
+            if witness.get(w, math.inf) <= via:
+                continue
+            shortcuts.append((u, w, (via, dist_in + dist_out, time_in + time_out, v)))
+    return shortcuts
+
+
+def _witness_search(source: int, skip: int, limit: float, targets: Dict[int, Edge],
+                    out_adj: List[Dict[int, Edge]], settle_limit: int) -> Dict[int, float]:
+    """Bounded Dijkstra from source that ignores skip; returns tentative costs
+
+    Stops as soon as every target is settled, the frontier passes limit or
+    settle_limit nodes have been settled.
+    """
+    costs = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = len(targets) - (source in targets)
+    settled = 0
+    while heap and remaining > 0:
+        cost, u = heapq.heappop(heap)
+        if cost > costs[u]:
+            continue
+        if cost > limit or settled >= settle_limit:
+            break
+        settled += 1
+        if u in targets and u != source:
+            remaining -= 1
+        for w, edge in out_adj[u].items():
+            if w == skip:
+                continue
+            candidate = cost + edge[0]
+            if candidate < costs.get(w, math.inf):
+                costs[w] = candidate
+                heapq.heappush(heap, (candidate, w))
+    return costs
+
+
+def _to_csr(edges_by_node: List[List[Tuple[int, Edge]]], ends: str) -> Dict[str, np.ndarray]:
+    """Pack per-node edge lists into CSR arrays; ``ends`` names the far-end column"""
+    counts = [len(edges) for edges in edges_by_node]
+    offsets = np.zeros(len(edges_by_node) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    anchors = np.repeat(np.arange(len(edges_by_node), dtype=np.int32), counts)
+    flat = [(other, *edge) for edges in edges_by_node for other, edge in edges]
+    columns = list(zip(*flat)) if flat else [(), (), (), (), ()]
+    csr = {
+        "offsets": offsets,
+        ends: np.array(columns[0], dtype=np.int32),
+        "cost": np.array(columns[1], dtype=np.float64),
+        "dist": np.array(columns[2], dtype=np.float64),
+        "time": np.array(columns[3], dtype=np.float64),
+        "middle": np.array(columns[4], dtype=np.int32),
+    }
+    # The node each edge is filed under: the tail for up edges, the head for down edges
+    csr["sources" if ends == "targets" else "targets"] = anchors
+    return csr
@@ -0,0 +1,60 @@
+import heapq
+import math
+from typing import List, Sequence
+
+import numpy as np
+
+from routing import CompiledGraph
+
+# A place is on the way when a visit adds at most this much driving, or
+# when it lies within this straight-line distance of the route
+CORRIDOR_MINUTES = 30.0
+CORRIDOR_KM = 1.0
+
+
+def detour_minutes(compiled: CompiledGraph, route_nodes: Sequence[int], limit: float = CORRIDOR_MINUTES) -> np.ndarray:
+    """Fastest minutes to leave the route, reach each node and rejoin the route; inf beyond limit
+
+    Two multi-source Dijkstras seeded with every route node, one over the
+    roads and one over the reversed roads, each stopping at limit. The cost
+    is the same however long the route is, and only the nodes near it are
+    ever touched. Leaving and rejoining may happen at different route nodes.
+    """
+    outbound = _bounded(compiled._offsets, compiled._targets, compiled._time, None,
+                        route_nodes, limit, compiled.num_nodes)
+    inbound = _bounded(compiled._rev_offsets, compiled._rev_sources, compiled._time, compiled._rev_edges,
+                       route_nodes, limit, compiled.num_nodes)
+    detour = np.array(outbound) + np.array(inbound)
+    detour[detour > limit] = np.inf
+    return detour
+
+
+def _bounded(offsets: List[int], heads: List[int], weights: List[float], edge_ids, sources: Sequence[int],
+             limit: float, n: int) -> List[float]:
+    """Multi-source Dijkstra over a CSR, settling nodes up to limit
+
+    edge_ids maps a CSR slot to its weight index (the reverse CSR stores
+    ids into the forward arrays); None when slots index weights directly.
+    """
+    best = [math.inf] * n
+    closed = bytearray(n)
+    heap = []
+    for source in sources:
+        if best[source] > 0.0:
+            best[source] = 0.0
+            heap.append((0.0, source))
+    heapq.heapify(heap)
+    while heap:
+        c, current = heapq.heappop(heap)
+        if c > limit:
+            break
+        if closed[current]:
+            continue
+        closed[current] = 1
+        for slot in range(offsets[current], offsets[current + 1]):
+            neighbor = heads[slot]
+            tentative = c + weights[slot if edge_ids is None else edge_ids[slot]]
+            if tentative < best[neighbor]:
+                best[neighbor] = tentative
+                heapq.heappush(heap, (tentative, neighbor))
+    return best
@@ -0,0 +1,99 @@
+import heapq
+import math
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+from routing import CompiledGraph
+
+# Reachability budgets are in minutes of travel time or in km of road
+METRICS = ("time", "distance")
+
+
+class Reachability:
+    """Places reachable from a start within a time or distance budget (bounded Dijkstra).
+
+    The search stops as soon as the cheapest open node is over budget and
+    keeps its frontier, so a later query from the same start with a larger
+    budget resumes where the last one stopped and a smaller budget is a
+    bisect over the nodes already settled. Searches from a new start reuse
+    the same buffers: each search gets a fresh generation number, a node is
+    reached when marked with it and settled when marked with its negation,
+    so nothing is cleared between queries.
+    """
+
+    def __init__(self, compiled: CompiledGraph, metric: str = "time"):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown reachability metric: {metric}")
+        self.compiled = compiled
+        self.metric = metric
+        self._weights = compiled._time if metric == "time" else compiled._dist
+
+        n = compiled.num_nodes
+        self._cost = [math.inf] * n
+        self._mark = [0] * n
+        self._generation = 0
+
+        # Search state for the current start, kept so queries can resume
+        self._source = -1
+        self._open: List[Tuple[float, int]] = []
+        self._settled: List[int] = []
+        self._settled_cost: List[float] = []
+        # Nodes settled over the object's lifetime
+        self.expanded = 0
+
+    def within(self, start: str, budget: float) -> List[Tuple[str, float]]:
+        """(place, cost from start) for every place within budget, nearest first"""
+        self._search(self.compiled.node_id(start), budget)
+        names = self.compiled.names
+        end = bisect_right(self._settled_cost, budget)
+        return [(names[u], cost) for u, cost in zip(self._settled[:end], self._settled_cost[:end])]
+
+    def isochrones(self, start: str, budgets: Iterable[float]) -> Dict[float, List[Tuple[str, float]]]:
+        """within() for several budgets from one start, sharing a single search"""
+        budgets = sorted(budgets)
+        if budgets:
+            self._search(self.compiled.node_id(start), budgets[-1])
+        return {budget: self.within(start, budget) for budget in budgets}
+
+    def _search(self, source: int, budget: float):
+        if source != self._source:
+            self._restart(source)
+        open_set = self._open
+        if not open_set or open_set[0][0] > budget:
+            return
+
+        generation = self._generation
+        settled_mark = -generation
+        cost, mark = self._cost, self._mark
+        offsets = self.compiled._offsets
+        targets = self.compiled._targets
+        weights = self._weights
+        settled, settled_cost = self._settled, self._settled_cost
+        expanded = len(settled)
+        while open_set and open_set[0][0] <= budget:
+            c, current = heapq.heappop(open_set)
+            if mark[current] == settled_mark:
+                continue
+            mark[current] = settled_mark
+            settled.append(current)
+            settled_cost.append(c)
+            for e in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[e]
+                state = mark[neighbor]
+                if state == settled_mark:
+                    continue
+                tentative = c + weights[e]
+                if state != generation or tentative < cost[neighbor]:
+                    mark[neighbor] = generation
+                    cost[neighbor] = tentative
+                    heapq.heappush(open_set, (tentative, neighbor))
+        self.expanded += len(settled) - expanded
+
+    def _restart(self, source: int):
+        self._generation += 1
+        self._source = source
+        self._mark[source] = self._generation
+        self._cost[source] = 0.0
+        self._open = [(0.0, source)]
+        self._settled = []
+        self._settled_cost = []
@@ -0,0 +1,358 @@
+import heapq
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from knapsack import score_bound
+from place_table import PlaceTable, recommendation_scores, route_corridor
+from routing import CompiledGraph
+from travel_data import Place
+
+# Longest day the planner fills, in minutes of travel plus visits
+DAY_MINUTES = 600.0
+
+# Candidate sets up to this size are solved exactly; the DP table holds
+# 2^n * n floats, so 16 stops is about 8 MiB
+EXACT_STOP_LIMIT = 16
+
+# Only this many of the best-scoring places reach the planner: travel times
+# cost one Dijkstra per candidate and local search grows cubically, while a
+# day holds a handful of stops. Places in the route's corridor go first, so
+# those searches stay near the route however large the catalog is
+CANDIDATE_LIMIT = 2 * EXACT_STOP_LIMIT
+
+
+@dataclass
+class Candidate:
+    name: str
+    score: float
+    cost: int
+    visit_minutes: float
+
+
+@dataclass
+class Itinerary:
+    stops: List[str]
+    score: float
+    cost: int
+    travel_minutes: float
+    visit_minutes: float
+    # No plan can score more: the score itself when solved exactly
+    bound: float
+
+    @property
+    def minutes(self) -> float:
+        return self.travel_minutes + self.visit_minutes
+
+
+def plan_itinerary(compiled: CompiledGraph, start: str, end: str, candidates: Sequence[Candidate],
+                   budget: Optional[int] = None, day_minutes: float = DAY_MINUTES,
+                   exact_limit: int = EXACT_STOP_LIMIT) -> Itinerary:
+    """Choose and order stops between start and end for the highest total score
+
+    Stops are visited in the returned order on the way from start to end.
+    Their entry costs must fit budget (None for no limit), and the travel
+    between consecutive stops plus every visit must fit day_minutes. Travel
+    is the fastest road time. Up to exact_limit candidates the answer is
+    optimal (bitmask DP); beyond that, greedy insertion and local search
+    give a good plan quickly, and Itinerary.bound says how far from optimal
+    it can be at most.
+    """
+    nodes = [compiled.node_id(start), compiled.node_id(end)] + [compiled.node_id(c.name) for c in candidates]
+    if budget is None:
+        budget = math.inf
+
+    # Candidates that cannot fit even on their own are never worth considering
+    from_start = _leg_minutes(compiled, nodes[0], nodes, day_minutes)
+    to_end = _leg_minutes(compiled, nodes[1], nodes, day_minutes, reverse=True)
+    keep = [i for i, c in enumerate(candidates)
+            if c.cost <= budget and from_start[i + 2] + c.visit_minutes + to_end[i + 2] <= day_minutes]
+    candidates = [candidates[i] for i in keep]
+    columns = [0, 1] + [i + 2 for i in keep]
+    travel = _travel_minutes(compiled, [nodes[i] for i in columns], from_start[columns], to_end[columns],
+                             [c.visit_minutes for c in candidates], day_minutes)
+
+    if len(candidates) <= exact_limit:
+        return _itinerary(candidates, travel, _exact_order(candidates, travel, budget, day_minutes))
+    order = _heuristic_order(candidates, travel, budget, day_minutes)
+    # Best fees-and-visits selection with travel ignored (2-D knapsack)
+    bound = score_bound([c.score for c in candidates], [c.cost for c in candidates],
+                        [c.visit_minutes for c in candidates],
+                        None if budget == math.inf else budget, day_minutes)
+    return _itinerary(candidates, travel, order, bound)
+
+
+def recommend_itinerary(table: PlaceTable, compiled: CompiledGraph, route_path: List[str], budget: int,
+                        experience_type: str, date_str: str, strict_budget: bool = True,
+                        candidate_limit: int = CANDIDATE_LIMIT) -> Tuple[Itinerary, List[Place]]:
+    """The planner's recommendations: score the catalog, keep the best candidate_limit, plan the day
+
+    Only places with a graph node can be travelled to. The best-scoring of
+    them in the route's corridor are kept first, and the best of the rest
+    only fill the places the corridor cannot, so no travel is searched
+    before that cut. Returns the itinerary along the route's start and end
+    and its stops as Places, in visiting order.
+    """
+    corridor = route_corridor(table, compiled, route_path)
+    rows, scores = recommendation_scores(table, compiled, route_path, budget, experience_type, date_str,
+                                         corridor=corridor)
+    on_graph = table.nodes(compiled)[rows] >= 0
+    near = np.flatnonzero(on_graph & corridor[rows])
+    best = near[best_candidates(scores[near], candidate_limit)]
+    if len(best) < candidate_limit:
+        far = np.flatnonzero(on_graph & ~corridor[rows])
+        best = np.concatenate([best, far[best_candidates(scores[far], candidate_limit - len(best))]])
+    candidates = []
+    places_by_name = {}
+    for row, score in zip(rows[best].tolist(), scores[best].tolist()):
+        place = table.places[row]
+        candidates.append(Candidate(place.name, score, place.cost, place.visit_time * 60))
+        places_by_name[place.name] = place
+
+    # Choose and order stops between start and end so visits and travel fit the day
+    itinerary = plan_itinerary(compiled, route_path[0], route_path[-1], candidates,
+                               budget if strict_budget else None)
+    return itinerary, [places_by_name[name] for name in itinerary.stops]
+
+
+def best_candidates(scores: np.ndarray, limit: int = CANDIDATE_LIMIT) -> np.ndarray:
+    """Indices of the limit highest scores, best first; equal scores keep index order"""
+    if len(scores) > limit:
+        # Everything scoring at least the limit-th best, so ties at the cut stay in index order
+        threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+        indices = np.flatnonzero(scores >= threshold)
+    else:
+        indices = np.arange(len(scores))
+    return indices[np.argsort(-scores[indices], kind="stable")][:limit]
+
+
+def _travel_minutes(compiled: CompiledGraph, nodes: List[int], from_start: np.ndarray, to_end: np.ndarray,
+                    visit: List[float], day_minutes: float) -> np.ndarray:
+    """Fastest road minutes between start (nodes[0]), end (nodes[1]) and the stops; inf for unusable legs
+
+    Row 0 and column 1 come from the start and end searches. A leg i -> j
+    only matters if start -> i, both visits, the leg and j -> end all fit
+    the day, so each stop's search gives up once no stop it has not reached
+    yet could still fit after it.
+    """
+    travel = np.full((len(nodes), len(nodes)), np.inf)
+    travel[0] = from_start
+    travel[:, 1] = to_end
+    # Least time to finish the day from each stop: its visit and the road to end
+    finish = [v + t for v, t in zip(visit, to_end[2:].tolist())]
+    for row in range(2, len(nodes)):
+        travel[row, 2:] = _leg_minutes(compiled, nodes[row], nodes[2:], day_minutes - from_start[row] - visit[row - 2],
+                                       finish)
+    return travel
+
+
+def _leg_minutes(compiled: CompiledGraph, source: int, nodes: List[int], limit: float,
+                 finish: Optional[List[float]] = None, reverse: bool = False) -> np.ndarray:
+    """Fastest road minutes from source to each of nodes (from each to source if reverse); inf if not needed
+
+    One Dijkstra. Reaching node i is only useful within limit - finish[i]
+    minutes (limit without finish), so the search stops once none of the
+    nodes it has not settled yet could still be used.
+    """
+    if reverse:
+        offsets, heads, edges = compiled._rev_offsets, compiled._rev_sources, compiled._rev_edges
+    else:
+        offsets, heads, edges = compiled._offsets, compiled._targets, None
+    minutes = compiled._time
+    if finish is None:
+        finish = [0.0] * len(nodes)
+    wanted = {}
+    for i, node in enumerate(nodes):
+        wanted.setdefault(node, []).append(i)
+    # Nodes by the latest time they are still useful, latest first, popped as they settle
+    deadlines = sorted(((limit - min(finish[i] for i in indices), node) for node, indices in wanted.items()))
+    settled_wanted = set()
+
+    legs = np.full(len(nodes), np.inf)
+    n = compiled.num_nodes
+    best = [math.inf] * n
+    closed = bytearray(n)
+    best[source] = 0.0
+    heap = [(0.0, source)]
+    while heap and deadlines:
+        c, current = heapq.heappop(heap)
+        if closed[current]:
+            continue
+        while deadlines and deadlines[-1][1] in settled_wanted:
+            deadlines.pop()
+        if not deadlines or c > deadlines[-1][0]:
+            break
+        closed[current] = 1
+        if current in wanted:
+            legs[wanted[current]] = c
+            settled_wanted.add(current)
+        for i in range(offsets[current], offsets[current + 1]):
+            neighbor = heads[i]
+            tentative = c + minutes[i if edges is None else edges[i]]
+            if tentative < best[neighbor]:
+                best[neighbor] = tentative
+                heapq.heappush(heap, (tentative, neighbor))
+    return legs
+
+
+def _exact_order(candidates: List[Candidate], travel: np.ndarray, budget: float, day_minutes: float) -> List[int]:
+    """Optimal stop order by DP over (visited set, last stop), one popcount layer at a time
+
+    best[mask, j] is the least time to leave start, visit exactly the stops
+    in mask and stand at stop j having visited it. A layer is final before
+    the next one is built, so each layer is one vectorized relaxation.
+    """
+    n = len(candidates)
+    if n == 0:
+        return []
+    visit = np.array([c.visit_minutes for c in candidates])
+    score = np.array([c.score for c in candidates])
+    cost = np.array([c.cost for c in candidates], dtype=np.float64)
+    between = travel[2:, 2:]
+    to_end = travel[2:, 1]
+
+    masks = np.arange(1 << n)
+    bits = (masks[:, None] >> np.arange(n)) & 1
+    mask_cost = bits @ cost
+    # Rounded so sets with equal scores tie exactly and the shorter day wins
+    mask_score = np.round(bits @ score, 9)
+    popcount = bits.sum(axis=1)
+
+    best = np.full((1 << n, n), np.inf)
+    singles = 1 << np.arange(n)
+    best[singles, np.arange(n)] = travel[0, 2:] + visit
+    for size in range(1, n):
+        layer = masks[(popcount == size) & (mask_cost <= budget)]
+        times = best[layer]
+        # Arrival plus visit at j from the best last stop i of each mask
+        reach = (times[:, :, None] + between[None, :, :]).min(axis=1) + visit
+        rows, cols = np.nonzero(~bits[layer].astype(bool) & (reach + to_end <= day_minutes))
+        np.minimum.at(best, (layer[rows] | singles[cols], cols), reach[rows, cols])
+
+    finish = best + to_end
+    feasible = (finish <= day_minutes).any(axis=1) & (mask_cost <= budget)
+    if not feasible.any():
+        return []
+    # Highest score, then shortest day
+    shortest = np.where(feasible, finish.min(axis=1), np.inf)
+    candidates_masks = np.flatnonzero(feasible)
+    mask = int(candidates_masks[np.lexsort((shortest[candidates_masks], -mask_score[candidates_masks]))[0]])
+
+    # Walk the DP back from the cheapest finishing stop
+    last = int(np.argmin(finish[mask]))
+    order = [last]
+    while mask != 1 << last:
+        previous = mask ^ (1 << last)
+        arrival = best[previous] + between[:, last] + visit[last]
+        last = int(np.argmin(np.where(bits[previous].astype(bool), arrival, np.inf)))
+        order.append(last)
+        mask = previous
+    order.reverse()
+    return order
+
+
+def _heuristic_order(candidates: List[Candidate], travel: np.ndarray, budget: float, day_minutes: float) -> List[int]:
+    """Greedy insertion by score per added minute, tightened by 2-opt, or-opt and swaps"""
+    visit = [c.visit_minutes for c in candidates]
+    score = [c.score for c in candidates]
+    cost = [c.cost for c in candidates]
+    # Node ids into travel: 0 is start, 1 is end, stop i is i + 2
+    t = travel.tolist()
+
+    def day_length(order: List[int]) -> float:
+        tour = [0] + [i + 2 for i in order] + [1]
+        return sum(t[a][b] for a, b in zip(tour, tour[1:])) + sum(visit[i] for i in order)
+
+    def insert_best(order: List[int], spent: float) -> bool:
+        """Insert the unvisited stop with the best score per added minute, if any fits"""
+        length = day_length(order)
+        tour = [0] + [i + 2 for i in order] + [1]
+        chosen = set(order)
+        best = None
+        for i in range(len(candidates)):
+            if i in chosen or spent + cost[i] > budget:
+                continue
+            node = i + 2
+            for position in range(len(tour) - 1):
+                a, b = tour[position], tour[position + 1]
+                added = t[a][node] + t[node][b] - t[a][b] + visit[i]
+                if length + added > day_minutes:
+                    continue
+                ratio = score[i] / max(added, 1e-9)
+                if best is None or ratio > best[0]:
+                    best = (ratio, i, position)
+        if best is None:
+            return False
+        order.insert(best[2], best[1])
+        return True
+
+    def tighten(order: List[int]):
+        """2-opt and or-opt (moving runs of 1-3 stops) until neither shortens the day"""
+        improved = True
+        while improved:
+            improved = False
+            length = day_length(order)
+            for i in range(len(order) - 1):
+                for j in range(i + 1, len(order)):
+                    trial = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    trial_length = day_length(trial)
+                    if trial_length < length - 1e-9:
+                        order[:], length, improved = trial, trial_length, True
+            for run in (1, 2, 3):
+                for i in range(len(order) - run + 1):
+                    segment = order[i:i + run]
+                    rest = order[:i] + order[i + run:]
+                    for j in range(len(rest) + 1):
+                        if j == i:
+                            continue
+                        trial = rest[:j] + segment + rest[j:]
+                        trial_length = day_length(trial)
+                        if trial_length < length - 1e-9:
+                            order[:], length, improved = trial, trial_length, True
+                            break
+
+    order: List[int] = []
+    spent = 0
+    while insert_best(order, spent):
+        spent = sum(cost[i] for i in order)
+        tighten(order)
+
+    # Swap a stop for a higher-scoring unvisited one where the day still fits
+    by_score = sorted(range(len(candidates)), key=lambda i: -score[i])
+    improved = True
+    while improved:
+        improved = False
+        chosen = set(order)
+        spent = sum(cost[i] for i in order)
+        for position, current in enumerate(order):
+            for i in by_score:
+                if i in chosen or score[i] <= score[current] or spent - cost[current] + cost[i] > budget:
+                    continue
+                trial = order[:position] + [i] + order[position + 1:]
+                tighten(trial)
+                if day_length(trial) <= day_minutes:
+                    order[:] = trial
+                    improved = True
+                    break
+            if improved:
+                break
+        if improved:
+            while insert_best(order, sum(cost[i] for i in order)):
+                tighten(order)
+    return order
+
+
+def _itinerary(candidates: List[Candidate], travel: np.ndarray, order: List[int],
+               bound: Optional[float] = None) -> Itinerary:
+    tour = [0] + [i + 2 for i in order] + [1]
+    score = sum(candidates[i].score for i in order)
+    return Itinerary(
+        [candidates[i].name for i in order],
+        score,
+        sum(candidates[i].cost for i in order),
+        float(sum(travel[a, b] for a, b in zip(tour, tour[1:]))),
+        sum(candidates[i].visit_minutes for i in order),
+        score if bound is None else bound,
+    )
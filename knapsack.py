@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Largest decision table (items x cost cells x time cells) solved as is;
+# bigger instances are solved on a coarser grid
+KNAPSACK_MAX_CELLS = 20_000_000
+
+
+@dataclass
+class Selection:
+    picks: List[int]
+    score: float
+    cost: int
+    visit_minutes: float
+    # True when picks is provably the best set; False when the grid was coarsened
+    exact: bool
+
+
+def best_selection(scores: Sequence[float], costs: Sequence[int], minutes: Sequence[float],
+                   budget: Optional[int], day_minutes: float,
+                   max_cells: int = KNAPSACK_MAX_CELLS) -> Selection:
+    """Highest-scoring set of items whose fees fit budget (None for no limit) and visits fit day_minutes
+
+    A 2-D 0/1 knapsack over integer grids of fee and visit time. Both are
+    divided by the gcd of their values, so catalogs priced in round rupees
+    and half hours solve on small tables exactly. When the table would still
+    exceed max_cells, the grid is coarsened and weights are rounded up:
+    the set stays feasible but may be slightly worse than the best.
+    """
+    cost_units, cost_capacity, time_units, time_capacity, exact = _grid(
+        costs, minutes, budget, day_minutes, max_cells, round_up=True)
+    picks = _solve(scores, cost_units, cost_capacity, time_units, time_capacity)
+    return Selection(
+        picks,
+        sum(scores[i] for i in picks),
+        sum(costs[i] for i in picks),
+        sum(minutes[i] for i in picks),
+        exact,
+    )
+
+
+def score_bound(scores: Sequence[float], costs: Sequence[int], minutes: Sequence[float],
+                budget: Optional[int], day_minutes: float, max_cells: int = KNAPSACK_MAX_CELLS) -> float:
+    """Upper bound on the score of any selection that fits budget and day_minutes
+
+    Same knapsack with weights rounded down, which can only admit more sets,
+    so its optimum bounds every itinerary (travel time only takes away).
+    """
+    cost_units, cost_capacity, time_units, time_capacity, _ = _grid(
+        costs, minutes, budget, day_minutes, max_cells, round_up=False)
+    return sum(scores[i] for i in _solve(scores, cost_units, cost_capacity, time_units, time_capacity))
+
+
+def _grid(costs: Sequence[int], minutes: Sequence[float], budget: Optional[int], day_minutes: float,
+          max_cells: int, round_up: bool) -> Tuple[np.ndarray, int, np.ndarray, int, bool]:
+    """Integer weights and capacities for both dimensions, coarsened to fit max_cells"""
+    costs = np.array(costs, dtype=np.float64)
+    minutes = np.array(minutes, dtype=np.float64)
+    if budget is None:
+        # No budget: the fee dimension collapses to a single cell
+        costs = np.zeros(len(minutes))
+        budget = 0
+
+    cost_step, cost_exact = _step(costs)
+    time_step, time_exact = _step(minutes)
+    n = max(len(minutes), 1)
+    while n * (budget // cost_step + 1) * (day_minutes // time_step + 1) > max_cells:
+        # Coarsen whichever dimension has more cells
+        if budget // cost_step >= day_minutes // time_step:
+            cost_step, cost_exact = cost_step * 2, False
+        else:
+            time_step, time_exact = time_step * 2, False
+
+    cost_units = _units(costs / cost_step, cost_exact, round_up)
+    time_units = _units(minutes / time_step, time_exact, round_up)
+    return (cost_units, int(budget // cost_step), time_units, int(day_minutes // time_step),
+            cost_exact and time_exact)
+
+
+def _step(values: np.ndarray) -> Tuple[float, bool]:
+    """Grid step for values, and whether every value is a whole multiple of it"""
+    if not len(values):
+        return 1.0, True
+    if not np.allclose(values, np.rint(values)):
+        return 1.0, False
+    step = int(np.gcd.reduce(np.rint(values).astype(np.int64)))
+    return float(max(step, 1)), True
+
+
+def _units(scaled: np.ndarray, exact: bool, round_up: bool) -> np.ndarray:
+    # Off-grid weights round up to keep selections feasible, or down to bound them
+    if exact:
+        rounded = np.rint(scaled)
+    elif round_up:
+        rounded = np.ceil(scaled)
+    else:
+        rounded = np.floor(scaled)
+    return rounded.astype(np.int64)
+
+
+def _solve(scores: Sequence[float], cost_units: np.ndarray, cost_capacity: int,
+           time_units: np.ndarray, time_capacity: int) -> List[int]:
+    """0/1 knapsack on the integer grid, one vectorized table update per item"""
+    best = np.zeros((cost_capacity + 1, time_capacity + 1))
+    taken = np.zeros((len(scores), cost_capacity + 1, time_capacity + 1), dtype=bool)
+    for i, score in enumerate(scores):
+        c, t = cost_units[i], time_units[i]
+        if c > cost_capacity or t > time_capacity:
+            continue
+        with_item = best[:cost_capacity + 1 - c, :time_capacity + 1 - t] + score
+        improves = with_item > best[c:, t:]
+        taken[i, c:, t:] = improves
+        np.copyto(best[c:, t:], with_item, where=improves)
+
+    picks = []
+    c, t = cost_capacity, time_capacity
+    for i in range(len(scores) - 1, -1, -1):
+        if taken[i, c, t]:
+            picks.append(i)
+            c -= cost_units[i]
+            t -= time_units[i]
+    picks.reverse()
+    return picks
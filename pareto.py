@@ -0,0 +1,135 @@
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+from routing import CompiledGraph, shortest_path_tree
+from travel_data import Route
+
+# (distance, time, entry cost) accumulated along a route
+Criteria = Tuple[float, float, float]
+
+# Label budget for interactive queries: labels cost ~20 us each, so this
+# keeps a query near 100 ms however large the frontier would grow
+PARETO_LABEL_LIMIT = 5000
+
+
+def pareto_routes(compiled: CompiledGraph, start: str, end: str, epsilon: float = 0.0,
+                  stats: Optional[Dict[str, int]] = None, max_labels: Optional[int] = None) -> List[Route]:
+    """Every start -> end route that no other route beats on distance, time and entry cost
+
+    A multi-label search in the style of NAMOA*: each node keeps a bag of
+    non-dominated (distance, time, cost) labels instead of one g-score.
+    Exact per-criterion lower bounds toward end (one reverse Dijkstra per
+    criterion) order the queue and prune any label that a route already
+    found at end dominates. Labels are popped in lexicographic order of
+    their bounds, so a settled label is never dominated later and the
+    routes come out sorted by distance, then time, then cost. Returns an
+    empty list if end is unreachable.
+
+    Exact frontiers grow quickly on grid-like networks. With ``epsilon`` > 0
+    a label is also dropped when another label at its node, or a route
+    already found, is within a factor of 1 + epsilon of it on every
+    criterion. Each such drop gives up at most that factor, but drops can
+    compound along a route, so treat epsilon as a size/accuracy knob rather
+    than a hard bound.
+
+    With ``max_labels`` the search stops once it has made that many labels.
+    Routes settled before then are still non-dominated, since anything
+    that could dominate them would have been popped first, but the
+    frontier may be cut short at its long-distance end;
+    ``stats["truncated"]`` says whether that happened.
+    """
+    source = compiled.node_id(start)
+    goal = compiled.node_id(end)
+    offsets = compiled._offsets
+    targets = compiled._targets
+    dist = compiled._dist
+    time = compiled._time
+    node_cost = compiled._node_cost
+    # Entering an edge's head pays that place's entry cost
+    entry = [node_cost[v] for v in targets]
+
+    h_dist = shortest_path_tree(compiled, goal, dist, reverse=True)[0]
+    h_time = shortest_path_tree(compiled, goal, time, reverse=True)[0]
+    h_cost = shortest_path_tree(compiled, goal, entry, reverse=True)[0]
+    if h_dist[source] == math.inf:
+        if stats is not None:
+            stats["labels"] = stats["expanded"] = 0
+        return []
+
+    # Labels live in parallel lists; a label's parent is another label id
+    label_node = [source]
+    label_parent = [-1]
+    label_values: List[Criteria] = [(0.0, 0.0, node_cost[source])]
+    bags: Dict[int, List[Criteria]] = {}
+    frontier: List[Criteria] = []
+    slack = 1.0 + epsilon
+    found: List[int] = []
+    expanded = 0
+    truncated = False
+
+    heap = [(h_dist[source], h_time[source], node_cost[source] + h_cost[source], 0)]
+    while heap:
+        _, _, _, label = heapq.heappop(heap)
+        current = label_node[label]
+        values = label_values[label]
+        bag = bags.setdefault(current, [])
+        if _dominated(bag, values, slack):
+            continue
+        d, t, c = values
+        if _dominated(frontier, (d + h_dist[current], t + h_time[current], c + h_cost[current]), slack):
+            continue
+        bag.append(values)
+        if current == goal:
+            frontier.append(values)
+            found.append(label)
+            continue
+        expanded += 1
+
+        for e in range(offsets[current], offsets[current + 1]):
+            if max_labels is not None and len(label_node) >= max_labels:
+                truncated = True
+                break
+            neighbor = targets[e]
+            # Rounding keeps equal sums reached in a different order equal, which
+            # the lexicographic pop order relies on
+            candidate = (round(d + dist[e], 9), round(t + time[e], 9), c + entry[e])
+            if neighbor in bags and _dominated(bags[neighbor], candidate, slack):
+                continue
+            bound = (candidate[0] + h_dist[neighbor], candidate[1] + h_time[neighbor],
+                     candidate[2] + h_cost[neighbor])
+            if _dominated(frontier, bound, slack):
+                continue
+            label_node.append(neighbor)
+            label_parent.append(label)
+            label_values.append(candidate)
+            heapq.heappush(heap, bound + (len(label_node) - 1,))
+        if truncated:
+            break
+
+    if stats is not None:
+        stats["labels"] = len(label_node)
+        stats["expanded"] = expanded
+        stats["truncated"] = truncated
+
+    routes = []
+    for label in found:
+        d, t, c = label_values[label]
+        path = []
+        while label >= 0:
+            path.append(label_node[label])
+            label = label_parent[label]
+        path.reverse()
+        routes.append(compiled.route(path, d, t, c))
+    return routes
+
+
+def _dominated(bag: List[Criteria], values: Criteria, slack: float = 1.0) -> bool:
+    """True if some label in bag is at least as good as values (scaled by slack) on every criterion"""
+    d, t, c = values
+    if slack != 1.0:
+        d, t, c = d * slack, t * slack, c * slack
+    for bd, bt, bc in bag:
+        if bd <= d and bt <= t and bc <= c:
+            return True
+    return False
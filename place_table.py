@@ -0,0 +1,277 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from corridor import CORRIDOR_KM, CORRIDOR_MINUTES, detour_minutes
+from routing import CompiledGraph
+from search import PlaceSearch
+from spatial import SpatialIndex
+from travel_data import Place
+
+# Inclusive (low, high) bounds; None leaves that end open
+Range = Tuple[Optional[float], Optional[float]]
+
+# Columns with a sorted index for range queries
+INDEXED_COLUMNS = ("rating", "cost", "visit_time", "category")
+
+# Categories worth visiting on weekends and on weekdays (the planner's time boost)
+WEEKEND_CATEGORIES = ("Nature", "Landmark", "Adventure", "Market")
+WEEKDAY_CATEGORIES = ("Cultural", "Institution")
+
+
+class PlaceTable:
+    """The place catalog as NumPy columns, one row per place in catalog order.
+
+    Categories are stored as small integer codes into ``categories``. The
+    Place objects stay available in ``places`` for display; a table built
+    from columns makes each one from its row when it is read.
+
+    Each column in INDEXED_COLUMNS gets a sorted index on first use: the
+    row ids ordered by that column (ties in row order) plus the sorted
+    values, so a range is two binary searches and a slice. Being flat
+    arrays, the indexes have no depth to degrade and no recursion.
+    """
+
+    def __init__(self, places: Dict[str, Place]):
+        rows = list(places.values())
+        categories = sorted({place.category for place in rows})
+        codes = {category: code for code, category in enumerate(categories)}
+        self._assign(
+            list(places), rows, [place.name for place in rows], [place.description for place in rows], categories,
+            np.array([place.rating for place in rows], dtype=np.float64),
+            np.array([place.cost for place in rows], dtype=np.int64),
+            np.array([place.visit_time for place in rows], dtype=np.float64),
+            np.array([place.popularity_score for place in rows], dtype=np.float64),
+            np.array([codes[place.category] for place in rows], dtype=np.int16),
+            np.array([place.coords for place in rows], dtype=np.float64).reshape(-1, 2),
+        )
+
+    @classmethod
+    def from_columns(cls, keys: List[str], descriptions: Sequence[str], categories: List[str],
+                     rating: np.ndarray, cost: np.ndarray, visit_time: np.ndarray, popularity: np.ndarray,
+                     category: np.ndarray, coords: np.ndarray) -> "PlaceTable":
+        """A table over columns that already exist, such as a compiled catalog snapshot's
+
+        Keys double as place names, as the catalog requires. No Place is
+        built until one is read from ``places``.
+        """
+        table = cls.__new__(cls)
+        table._assign(keys, _RowPlaces(table), keys, descriptions, categories, rating, cost, visit_time,
+                      popularity, category, coords)
+        return table
+
+    def _assign(self, keys: List[str], places: Sequence[Place], names: List[str], descriptions: Sequence[str],
+                categories: List[str], rating: np.ndarray, cost: np.ndarray, visit_time: np.ndarray,
+                popularity: np.ndarray, category: np.ndarray, coords: np.ndarray):
+        self.keys = keys
+        self.places = places
+        self.names = names
+        self.descriptions = descriptions
+        self.categories = categories
+        self.rating = rating
+        self.cost = cost
+        self.visit_time = visit_time
+        self.popularity = popularity
+        self.category = category
+        self.lat = coords[:, 0]
+        self.lon = coords[:, 1]
+
+        self._rows: Optional[Dict[str, int]] = None
+        self._nodes: Optional[Tuple[CompiledGraph, np.ndarray]] = None
+        self._indexes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._spatial: Optional[SpatialIndex] = None
+        self._search: Optional[PlaceSearch] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._row_index()
+
+    def row(self, key: str) -> int:
+        """Row of the place stored under key"""
+        try:
+            return self._row_index()[key]
+        except KeyError:
+            raise KeyError(f"Unknown place: {key}") from None
+
+    def place(self, key: str) -> Place:
+        """The Place stored under key"""
+        return self.places[self.row(key)]
+
+    def _row_index(self) -> Dict[str, int]:
+        if self._rows is None:
+            self._rows = {key: row for row, key in enumerate(self.keys)}
+        return self._rows
+
+    def range(self, column: str, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """Rows with low <= column <= high, ordered by that column"""
+        order, values = self._index(column)
+        return order[self._bounds(values, low, high)]
+
+    def query(self, category: Optional[str] = None, rating: Optional[Range] = None,
+              cost: Optional[Range] = None, visit_time: Optional[Range] = None) -> np.ndarray:
+        """Rows matching every given filter, in row order
+
+        The filter matching the fewest rows is answered from its sorted
+        index and the others are checked on those rows only, so a narrow
+        compound query never touches the rest of the catalog.
+        """
+        ranges = {column: bounds for column, bounds in
+                  (("rating", rating), ("cost", cost), ("visit_time", visit_time)) if bounds is not None}
+        if category is not None:
+            if category not in self.categories:
+                return np.empty(0, dtype=np.int64)
+            code = self.categories.index(category)
+            ranges["category"] = (code, code)
+        if not ranges:
+            return np.arange(len(self.keys))
+
+        slices = {column: self._bounds(self._index(column)[1], *bounds) for column, bounds in ranges.items()}
+        narrowest = min(slices, key=lambda column: slices[column].stop - slices[column].start)
+        rows = self._index(narrowest)[0][slices[narrowest]]
+        for column, (low, high) in ranges.items():
+            if column == narrowest:
+                continue
+            values = getattr(self, column)[rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+            rows = rows[keep]
+        return np.sort(rows)
+
+    def _index(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        if column not in self._indexes:
+            if column not in INDEXED_COLUMNS:
+                raise ValueError(f"No index on column: {column}")
+            values = getattr(self, column)
+            order = np.argsort(values, kind="stable")
+            self._indexes[column] = (order, values[order])
+        return self._indexes[column]
+
+    @staticmethod
+    def _bounds(values: np.ndarray, low: Optional[float], high: Optional[float]) -> slice:
+        start = 0 if low is None else int(np.searchsorted(values, low, side="left"))
+        stop = len(values) if high is None else int(np.searchsorted(values, high, side="right"))
+        return slice(start, max(start, stop))
+
+    def category_mask(self, categories: Iterable[str]) -> np.ndarray:
+        """Rows whose category is one of categories"""
+        codes = [self.categories.index(c) for c in categories if c in self.categories]
+        return np.isin(self.category, codes)
+
+    def spatial(self) -> SpatialIndex:
+        """Spatial index over the rows' coordinates, built on first use"""
+        if self._spatial is None:
+            self._spatial = SpatialIndex(np.column_stack((self.lat, self.lon)))
+        return self._spatial
+
+    def search(self) -> PlaceSearch:
+        """Text search over the rows' names, categories and descriptions, built on first use
+
+        Ties between equally good matches go to the more popular place.
+        """
+        if self._search is None:
+            self._search = PlaceSearch(self.names, list(self.descriptions),
+                                       [self.categories[code] for code in self.category.tolist()], self.popularity)
+        return self._search
+
+    def nodes(self, compiled: CompiledGraph) -> np.ndarray:
+        """Graph node id of each row (matched on Place.name, as the graph is), -1 if absent"""
+        if self._nodes is None or self._nodes[0] is not compiled:
+            self._nodes = (compiled, np.array([compiled.index.get(name, -1) for name in self.names], dtype=np.int64))
+        return self._nodes[1]
+
+    def node_categories(self, compiled: CompiledGraph) -> List[Optional[str]]:
+        """Category of the place at each graph node, None for nodes with no row"""
+        categories: List[Optional[str]] = [None] * compiled.num_nodes
+        nodes = self.nodes(compiled)
+        has_node = nodes >= 0
+        for node, code in zip(nodes[has_node].tolist(), self.category[has_node].tolist()):
+            categories[node] = self.categories[code]
+        return categories
+
+
+class _RowPlaces(Sequence[Place]):
+    """A column table's rows as Place objects, each built when it is read"""
+
+    def __init__(self, table: PlaceTable):
+        self._table = table
+
+    def __len__(self) -> int:
+        return len(self._table.keys)
+
+    def __getitem__(self, row: int) -> Place:
+        table = self._table
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        return Place(table.names[row], (float(table.lat[row]), float(table.lon[row])), int(table.cost[row]),
+                     float(table.rating[row]), table.descriptions[row], float(table.visit_time[row]),
+                     table.categories[table.category[row]], float(table.popularity[row]))
+
+
+def route_corridor(table: PlaceTable, compiled: CompiledGraph, route_path: List[str],
+                   minutes: float = CORRIDOR_MINUTES, km: float = CORRIDOR_KM) -> np.ndarray:
+    """Rows on the way along a route: a visit adds at most minutes of driving, or the place is within km of it
+
+    The drive is measured on the graph (detour_minutes); the distance is to
+    the route drawn as straight legs between its places, which also covers
+    places that have no node in the graph.
+    """
+    route_nodes = [compiled.index[name] for name in route_path if name in compiled.index]
+    corridor = np.zeros(len(table), dtype=bool)
+    if not route_nodes:
+        return corridor
+    nodes = table.nodes(compiled)
+    has_node = nodes >= 0
+    corridor[has_node] = detour_minutes(compiled, route_nodes, minutes)[nodes[has_node]] <= minutes
+    if km > 0:
+        rows, _ = table.spatial().near_path(compiled.coords[route_nodes], km)
+        corridor[rows] = True
+    return corridor
+
+
+def recommendation_scores(table: PlaceTable, compiled: CompiledGraph, route_path: List[str], budget: int,
+                          experience_type: str, date_str: str,
+                          min_rating: float = 4.0, max_rating: float = 5.0,
+                          corridor: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows the planner may recommend and their scores, in row order
+
+    A row qualifies if its rating is in range, it is not on the route, it
+    matches experience_type ("Any" for all) and its fee fits budget. Its
+    score is rating x 1.2 if it is in the route's corridor (route_corridor)
+    x 1.1 if the date suits its category (else 0.9) x (1 + 0.2 popularity),
+    evaluated in that order so the floats match the per-place formula exactly.
+    corridor is route_corridor's mask when the caller already has it.
+    """
+    nodes = table.nodes(compiled)
+    has_node = nodes >= 0
+    node_index = np.where(has_node, nodes, 0)
+
+    on_route = np.zeros(compiled.num_nodes, dtype=bool)
+    on_route[[compiled.index[name] for name in route_path if name in compiled.index]] = True
+
+    rows = table.query(
+        category=None if experience_type == "Any" else experience_type,
+        rating=(min_rating, max_rating),
+        cost=(None, budget),
+    )
+    rows = rows[~(has_node[rows] & on_route[node_index[rows]])]
+
+    try:
+        weekend = datetime.strptime(date_str, "%Y-%m-%d").weekday() >= 5
+        good_time = table.category_mask(WEEKEND_CATEGORIES if weekend else WEEKDAY_CATEGORIES)[rows]
+    except ValueError:
+        # Unparseable dates count as a good time, as they always have
+        good_time = np.ones(len(rows), dtype=bool)
+
+    if corridor is None:
+        corridor = route_corridor(table, compiled, route_path)
+    route_boost = np.where(corridor[rows], 1.2, 1.0)
+    time_boost = np.where(good_time, 1.1, 0.9)
+    popularity_boost = 1.0 + table.popularity[rows] * 0.2
+    scores = table.rating[rows] * route_boost * time_boost * popularity_boost
+    return rows, scores
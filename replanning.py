@@ -0,0 +1,229 @@
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from routing import EARTH_RADIUS_KM, CompiledGraph, RoutingProfile, get_profile
+from travel_data import Route
+
+# Search key: (min(g, rhs) + h + km, min(g, rhs))
+Key = Tuple[float, float]
+
+
+class IncrementalRouter:
+    """Keeps one start -> end route current under road changes and a moving start (D* Lite).
+
+    The search runs backward from end, so g[u] estimates the cost from u to
+    end and survives the traveler moving. After update_edges() only the
+    nodes whose cost-to-end actually changed are re-expanded, so repairing
+    a route costs roughly the size of the change rather than a full search.
+    The router keeps its own copy of edge weights and times; the
+    CompiledGraph is never modified.
+    """
+
+    def __init__(self, compiled: CompiledGraph, start: str, end: str,
+                 profile: Union[str, RoutingProfile] = "combined"):
+        self.compiled = compiled
+        self.profile = get_profile(profile)
+        self.goal = compiled.node_id(end)
+        self._start = compiled.node_id(start)
+        self.weights = list(compiled._layer(self.profile)[1])
+        self.time = list(compiled._time)
+        self._lat = compiled.lat_rad.tolist()
+        self._lon = compiled.lon_rad.tolist()
+        self._cos_lat = compiled.cos_lat.tolist()
+        self._scale = compiled.heuristic_scale(self.profile)
+        # h(start, u) for the current start, filled as the search touches u
+        self._h_start: Dict[int, float] = {}
+        self.expanded = 0
+        self._reset()
+
+    def _reset(self):
+        n = self.compiled.num_nodes
+        self.g = [math.inf] * n
+        self.rhs = [math.inf] * n
+        self.rhs[self.goal] = 0.0
+        self._km = 0.0
+        self._last = self._start
+        self._queue: List[Tuple[Key, int]] = []
+        self._queued: Dict[int, Key] = {}
+        self._push(self.goal)
+
+    @property
+    def start(self) -> str:
+        return self.compiled.names[self._start]
+
+    def advance(self, place: str):
+        """Move the traveler to place (normally the next stop on the current route)"""
+        self._start = self.compiled.node_id(place)
+        self._h_start.clear()
+
+    def update_edges(self, updates: Iterable[Tuple[str, str, float]]):
+        """Apply new travel times in minutes for roads u -> v; math.inf closes a road
+
+        Raises KeyError, before applying anything, if a place or road is unknown.
+        """
+        compiled = self.compiled
+        profile = self.profile
+        if profile.weight_fn is not None:
+            raise ValueError(f"Profile {profile.name} uses a weight function; its weights cannot follow travel times")
+
+        # Resolve every road first so an unknown one leaves the router untouched
+        resolved = []
+        for u_name, v_name, minutes in updates:
+            u = compiled.node_id(u_name)
+            v = compiled.node_id(v_name)
+            e = compiled.edge_id(u, v)
+            if e < 0:
+                raise KeyError(f"Unknown road: {u_name} -> {v_name}")
+            resolved.append((u, v, e, minutes))
+
+        # Keys already queued were computed from an earlier start; km keeps them lower bounds
+        self._km += self._h(self._last, self._start)
+        self._last = self._start
+        rescale = False
+        for u, v, e, minutes in resolved:
+            old = self.weights[e]
+            if minutes == math.inf:
+                new = math.inf
+            else:
+                new = profile.dist_weight * compiled._dist[e] + profile.time_weight * minutes
+                if new <= 0:
+                    new = compiled._dist[e]
+            self.weights[e] = new
+            self.time[e] = minutes
+            if new < self._scale * compiled.edge_km[e]:
+                # The heuristic would overestimate through this edge
+                rescale = True
+                continue
+
+            if u == self.goal or new == old:
+                continue
+            if new < old:
+                self.rhs[u] = min(self.rhs[u], new + self.g[v])
+            elif self.rhs[u] == old + self.g[v]:
+                self.rhs[u] = self._best_successor(u)[0]
+            self._update_vertex(u)
+
+        if rescale:
+            # Recalibrate as CompiledGraph.heuristic_scale does and search again from scratch
+            weights = np.array(self.weights)
+            positive = compiled.edge_km > 0
+            self._scale = max(float(np.min(weights[positive] / compiled.edge_km[positive])), 0.0)
+            self._h_start.clear()
+            self._reset()
+
+    def route(self, stats: Optional[Dict[str, int]] = None) -> Route:
+        """Current best route from the traveler's position to end"""
+        self.expanded = 0
+        self._compute()
+        if stats is not None:
+            stats["expanded"] = self.expanded
+
+        compiled = self.compiled
+        current = self._start
+        # The search may stop with start overconsistent; rhs is its settled cost
+        if self.rhs[current] == math.inf:
+            # Mirror find_route: unreachable pairs get a direct placeholder
+            return Route([self.start, compiled.names[self.goal]], 0, 0, 0)
+
+        path = [current]
+        distance = travel = 0.0
+        cost = compiled._node_cost[current]
+        while current != self.goal:
+            _, e = self._best_successor(current)
+            current = compiled._targets[e]
+            path.append(current)
+            distance += compiled._dist[e]
+            travel += self.time[e]
+            cost += compiled._node_cost[current]
+        return compiled.route(path, distance, travel, cost)
+
+    def _compute(self):
+        g, rhs = self.g, self.rhs
+        start = self._start
+        rev_offsets = self.compiled._rev_offsets
+        rev_sources = self.compiled._rev_sources
+        rev_edges = self.compiled._rev_edges
+        weights = self.weights
+        while True:
+            top = self._top()
+            if top is None:
+                break
+            key, u = top
+            if not (key < self._key(start) or rhs[start] > g[start]):
+                break
+            heapq.heappop(self._queue)
+            del self._queued[u]
+            new_key = self._key(u)
+            if key < new_key:
+                self._push(u, new_key)
+                continue
+            self.expanded += 1
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+                for i in range(rev_offsets[u], rev_offsets[u + 1]):
+                    p = rev_sources[i]
+                    if p != self.goal:
+                        candidate = weights[rev_edges[i]] + g[u]
+                        if candidate < rhs[p]:
+                            rhs[p] = candidate
+                    self._update_vertex(p)
+            else:
+                g_old = g[u]
+                g[u] = math.inf
+                for i in range(rev_offsets[u], rev_offsets[u + 1]):
+                    p = rev_sources[i]
+                    if p != self.goal and rhs[p] == weights[rev_edges[i]] + g_old:
+                        rhs[p] = self._best_successor(p)[0]
+                    self._update_vertex(p)
+                if u != self.goal and rhs[u] == g_old:
+                    rhs[u] = self._best_successor(u)[0]
+                self._update_vertex(u)
+
+    def _best_successor(self, u: int) -> Tuple[float, int]:
+        """(min over edges u -> v of weight + g[v], that edge)"""
+        offsets, targets = self.compiled._offsets, self.compiled._targets
+        weights, g = self.weights, self.g
+        best, best_edge = math.inf, -1
+        for e in range(offsets[u], offsets[u + 1]):
+            candidate = weights[e] + g[targets[e]]
+            if candidate < best:
+                best, best_edge = candidate, e
+        return best, best_edge
+
+    def _h(self, a: int, b: int) -> float:
+        lat, lon, cos_lat = self._lat, self._lon, self._cos_lat
+        a_hav = (math.sin((lat[b] - lat[a]) / 2) ** 2
+                 + cos_lat[a] * cos_lat[b] * math.sin((lon[b] - lon[a]) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a_hav))) * self._scale
+
+    def _key(self, u: int) -> Key:
+        best = min(self.g[u], self.rhs[u])
+        h = self._h_start.get(u)
+        if h is None:
+            h = self._h_start[u] = self._h(self._start, u)
+        return (best + h + self._km, best)
+
+    def _push(self, u: int, key: Optional[Key] = None):
+        if key is None:
+            key = self._key(u)
+        self._queued[u] = key
+        heapq.heappush(self._queue, (key, u))
+
+    def _update_vertex(self, u: int):
+        if self.g[u] != self.rhs[u]:
+            self._push(u)
+        else:
+            self._queued.pop(u, None)
+
+    def _top(self) -> Optional[Tuple[Key, int]]:
+        """Smallest live queue entry, dropping stale ones"""
+        queue, queued = self._queue, self._queued
+        while queue:
+            key, u = queue[0]
+            if queued.get(u) == key:
+                return key, u
+            heapq.heappop(queue)
+        return None
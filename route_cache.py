@@ -0,0 +1,202 @@
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple, Union
+
+from routing import CompiledGraph, RoutingProfile, get_profile
+from travel_data import Route
+
+ROUTE_CACHE_SIZE = 512
+# Seconds a cached route is served before it is recomputed
+ROUTE_CACHE_TTL = 900.0
+
+# (start, end, profile name, search mode, graph fingerprint)
+CacheKey = Tuple[str, str, str, Hashable, str]
+
+
+class RouteCache:
+    """Least-recently-used route cache with a time-to-live.
+
+    Entries are keyed on the graph's fingerprint, so once a query arrives
+    for a graph with different content every entry from the old one is
+    dropped at once rather than left to age out. The search mode is part of
+    the key because modes may break ties between equal-cost routes
+    differently.
+
+    With a RouteStore, every computed route is also written to disk and a
+    key missing from memory is looked up there before it is computed, so
+    after a restart the routes people actually ask for come back one query
+    at a time instead of in a load step at startup. The TTL only applies in
+    memory: an entry that expires is recomputed, while the store trusts any
+    row computed on the same graph version.
+    """
+
+    def __init__(self, max_size: int = ROUTE_CACHE_SIZE, ttl: Optional[float] = ROUTE_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic, store: Optional["RouteStore"] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.store = store
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Route]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, compiled: CompiledGraph, start: str, end: str,
+                       profile: Union[str, RoutingProfile], mode: Hashable,
+                       compute: Callable[[], Route]) -> Route:
+        """Cached route for the query, calling compute() on a miss"""
+        version = compiled.fingerprint()
+        if version != self._version:
+            self.clear()
+            self._version = version
+            if self.store is not None:
+                self.store.discard_stale(version)
+        key = (start, end, get_profile(profile).name, mode, version)
+
+        entry = self._entries.get(key)
+        now = self.clock()
+        if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        route = None
+        if entry is None and self.store is not None:
+            route = self.store.get(key)
+        if route is not None:
+            self.disk_hits += 1
+            # Rows hold names; keep node ids in memory, as computed routes do
+            route = compiled.route([compiled.index[name] for name in route.path],
+                                   route.distance, route.time, route.cost)
+        else:
+            self.misses += 1
+            route = compute()
+            if self.store is not None:
+                self.store.put(key, route)
+        self._entries[key] = (now, route)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return route
+
+    def clear(self):
+        """Drop every entry; the counters keep running"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+class RouteStore:
+    """Routes persisted in SQLite so the route cache survives restarts.
+
+    Each row carries the fingerprint of the graph it was computed on and
+    lookups include it, so a route from an older graph is never returned;
+    rows for other versions are deleted once a new version is in use. The
+    store is only an accelerator: a corrupt file is replaced with an empty
+    database, a database that cannot be opened (locked, unwritable) makes
+    open() return None, and errors after that make lookups miss and writes
+    no-ops, never a routing error.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            self._conn = self._connect(path)
+        except sqlite3.DatabaseError as error:
+            if not _is_corrupt(error):
+                raise
+            # Not a database (or damaged beyond use): start over, as the snapshots do
+            os.remove(path)
+            self._conn = self._connect(path)
+
+    @classmethod
+    def open(cls, path: str) -> Optional["RouteStore"]:
+        """Open the store at path; None if it cannot be used (locked, unwritable, ...)"""
+        try:
+            return cls(path)
+        except (sqlite3.Error, OSError):
+            return None
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        # Route lookups may come from the UI's worker threads
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS routes ("
+            "version TEXT, start TEXT, end TEXT, profile TEXT, mode TEXT, "
+            "path TEXT, distance REAL, time REAL, cost INTEGER, "
+            "PRIMARY KEY (version, start, end, profile, mode)) WITHOUT ROWID"
+        )
+        return conn
+
+    def get(self, key: CacheKey) -> Optional[Route]:
+        start, end, profile, mode, version = key
+        try:
+            row = self._conn.execute(
+                "SELECT path, distance, time, cost FROM routes "
+                "WHERE version = ? AND start = ? AND end = ? AND profile = ? AND mode = ?",
+                (version, start, end, profile, str(mode)),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return Route(json.loads(row[0]), row[1], row[2], row[3])
+
+    def put(self, key: CacheKey, route: Route):
+        start, end, profile, mode, version = key
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (version, start, end, profile, str(mode), json.dumps(route.path),
+                     route.distance, route.time, route.cost),
+                )
+        except sqlite3.Error:
+            pass
+
+    def discard_stale(self, version: str):
+        """Delete every row computed on a graph other than version"""
+        try:
+            with self._conn:
+                self._conn.execute("DELETE FROM routes WHERE version != ?", (version,))
+        except sqlite3.Error:
+            pass
+
+    def __len__(self) -> int:
+        try:
+            return self._conn.execute("SELECT COUNT(*) FROM routes").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def close(self):
+        self._conn.close()
+
+
+def _is_corrupt(error: sqlite3.DatabaseError) -> bool:
+    """True if error says the file is not a database or is damaged, not merely busy"""
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_CORRUPT, sqlite3.SQLITE_NOTADB)
+    message = str(error)
+    return "not a database" in message or "malformed" in message
@@ -0,0 +1,586 @@
+import hashlib
+import heapq
+import math
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from snapshot import read_snapshot, write_snapshot
+from travel_data import Place, Route
+
+EARTH_RADIUS_KM = 6371.0088
+
+GRAPH_MAGIC = b"TTGGRF01"
+
+# Arrays stored in a graph snapshot, in file order
+_GRAPH_FIELDS = ("coords", "node_cost", "offsets", "targets", "dist", "time")
+
+# Search strategies accepted by find_route
+SEARCH_MODES = ("astar", "bidirectional-astar", "bidirectional-dijkstra")
+
+
+@dataclass(frozen=True)
+class RoutingProfile:
+    """A named edge-weight layer.
+
+    Weighted-sum profiles cost an edge as dist_weight*dist + time_weight*time.
+    Profiles that need more than that (walking or cycling speeds, elevation
+    penalties) pass ``weight_fn``, which maps a CompiledGraph to one weight
+    per edge.
+    """
+    name: str
+    dist_weight: float = 0.0
+    time_weight: float = 0.0
+    weight_fn: Optional[Callable[["CompiledGraph"], np.ndarray]] = None
+
+    def edge_weights(self, compiled: "CompiledGraph") -> np.ndarray:
+        """Weight of every edge; non-positive weights fall back to dist"""
+        if self.weight_fn is not None:
+            weights = np.asarray(self.weight_fn(compiled), dtype=np.float64)
+        else:
+            weights = self.dist_weight * compiled.dist + self.time_weight * compiled.time
+        return np.where(weights <= 0, compiled.dist, weights)
+
+
+# Built-in profiles, matching the Route Optimizer checkboxes
+PROFILES: Dict[str, RoutingProfile] = {
+    "distance": RoutingProfile("distance", dist_weight=1.0),
+    "time": RoutingProfile("time", time_weight=0.1),
+    "combined": RoutingProfile("combined", dist_weight=1.0, time_weight=0.1),
+}
+
+
+def register_profile(profile: RoutingProfile):
+    """Make a profile available by name; its layer is built on first use"""
+    if profile.name in PROFILES and PROFILES[profile.name] != profile:
+        raise ValueError(f"A different profile is already registered as {profile.name}")
+    PROFILES[profile.name] = profile
+
+
+def get_profile(profile: Union[str, RoutingProfile]) -> RoutingProfile:
+    """Resolve a profile name (or pass a RoutingProfile through)"""
+    if isinstance(profile, RoutingProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise KeyError(f"Unknown routing profile: {profile}") from None
+
+
+class CompiledGraph:
+    """Read-only CSR (compressed sparse row) view of the place graph.
+
+    Nodes are integer ids. The outgoing edges of node ``u`` are the slots
+    ``offsets[u]:offsets[u + 1]`` of ``targets``, ``dist`` and ``time``.
+    """
+
+    def __init__(self, names: List[str], coords: np.ndarray, node_cost: np.ndarray,
+                 offsets: np.ndarray, targets: np.ndarray, dist: np.ndarray, time: np.ndarray):
+        self.names = names
+        self.coords = coords
+        self.node_cost = node_cost
+        self.offsets = offsets
+        self.targets = targets
+        self.dist = dist
+        self.time = time
+
+        # Radian coordinates and straight-line edge lengths for the
+        # haversine heuristic
+        self.lat_rad = np.radians(coords[:, 0])
+        self.lon_rad = np.radians(coords[:, 1])
+        self.cos_lat = np.cos(self.lat_rad)
+        sources = np.repeat(np.arange(len(names)), np.diff(offsets))
+        self.edge_km = haversine_km(
+            self.lat_rad[sources], self.lon_rad[sources], self.cos_lat[sources],
+            self.lat_rad[targets], self.lon_rad[targets], self.cos_lat[targets],
+        )
+
+        # Per-profile edge-weight layers (array plus list mirror) and heuristic
+        # calibration, built on first use; the CSR itself never changes
+        self._layers: Dict[RoutingProfile, Tuple[np.ndarray, List[float]]] = {}
+        self._heuristic_scales: Dict[RoutingProfile, float] = {}
+        self._fingerprint: Optional[str] = None
+
+        # Reverse CSR: the incoming edges of v are rev_edges[rev_offsets[v]:rev_offsets[v + 1]],
+        # given as ids into the forward arrays, with their tail node in rev_sources
+        order = np.argsort(targets, kind="stable")
+        self.rev_offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=len(names)), out=self.rev_offsets[1:])
+        self.rev_sources = sources[order].astype(np.int32)
+        self.rev_edges = order.astype(np.int64)
+
+    # The name index and the plain-list mirrors for the search loops are
+    # built on first use, so mapping a snapshot creates no per-node Python
+    # objects; indexing a list is much cheaper than indexing a NumPy array
+    # element by element once a search does run
+
+    @cached_property
+    def index(self) -> Dict[str, int]:
+        return {name: i for i, name in enumerate(self.names)}
+
+    @cached_property
+    def _offsets(self) -> List[int]:
+        return self.offsets.tolist()
+
+    @cached_property
+    def _targets(self) -> List[int]:
+        return self.targets.tolist()
+
+    @cached_property
+    def _dist(self) -> List[float]:
+        return self.dist.tolist()
+
+    @cached_property
+    def _time(self) -> List[float]:
+        return self.time.tolist()
+
+    @cached_property
+    def _node_cost(self) -> List[int]:
+        return self.node_cost.tolist()
+
+    @cached_property
+    def _rev_offsets(self) -> List[int]:
+        return self.rev_offsets.tolist()
+
+    @cached_property
+    def _rev_sources(self) -> List[int]:
+        return self.rev_sources.tolist()
+
+    @cached_property
+    def _rev_edges(self) -> List[int]:
+        return self.rev_edges.tolist()
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._targets)
+
+    def node_id(self, name: str) -> int:
+        """Map a place name to its node id"""
+        try:
+            return self.index[name]
+        except KeyError:
+            raise KeyError(f"Unknown place: {name}") from None
+
+    def edge_id(self, u: int, v: int) -> int:
+        """Return the id of edge u -> v, or -1 if there is none"""
+        targets = self._targets
+        for e in range(self._offsets[u], self._offsets[u + 1]):
+            if targets[e] == v:
+                return e
+        return -1
+
+    def neighbors(self, u: int) -> List[Tuple[int, float, float]]:
+        """List (neighbor, dist, time) for every edge leaving u"""
+        start, end = self._offsets[u], self._offsets[u + 1]
+        return list(zip(self._targets[start:end], self._dist[start:end], self._time[start:end]))
+
+    def edge_weights(self, profile: Union[str, RoutingProfile]) -> np.ndarray:
+        """Edge-weight layer for a profile, parallel to targets"""
+        return self._layer(get_profile(profile))[0]
+
+    def _layer(self, profile: RoutingProfile) -> Tuple[np.ndarray, List[float]]:
+        if profile not in self._layers:
+            weights = profile.edge_weights(self)
+            if weights.shape != self.dist.shape:
+                raise ValueError(f"Profile {profile.name} returned {weights.shape} weights for {self.num_edges} edges")
+            weights.flags.writeable = False
+            self._layers[profile] = (weights, weights.tolist())
+        return self._layers[profile]
+
+    def layer_fingerprint(self, profile: Union[str, RoutingProfile]) -> str:
+        """Content hash of a profile's edge weights, for invalidating per-profile indexes"""
+        return hashlib.sha256(self.edge_weights(profile).tobytes()).hexdigest()
+
+    def fingerprint(self) -> str:
+        """Content hash of the node names, coordinates, entry costs and edges"""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update("\x00".join(self.names).encode("utf-8"))
+            for array in (self.coords, self.node_cost, self.offsets, self.targets, self.dist, self.time):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def save(self, path: str):
+        """Write the graph as a memory-mappable snapshot"""
+        header = {"names": self.names, "fingerprint": self.fingerprint()}
+        write_snapshot(path, GRAPH_MAGIC, header, {name: getattr(self, name) for name in _GRAPH_FIELDS})
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CompiledGraph"]:
+        """Memory-map a snapshot written by save; None if missing or corrupt
+
+        The arrays stay backed by the file, so processes that load the same
+        snapshot share one copy of them through the page cache.
+        """
+        snapshot = read_snapshot(path, GRAPH_MAGIC)
+        if snapshot is None:
+            return None
+        header, arrays = snapshot
+        try:
+            return cls(header["names"], *(arrays[name] for name in _GRAPH_FIELDS))
+        except (KeyError, ValueError):
+            return None
+
+    def heuristic_scale(self, profile: Union[str, RoutingProfile]) -> float:
+        """Largest k such that k * straight-line km never overestimates a path cost
+
+        Every edge satisfies cost >= k * edge_km, so by the triangle inequality
+        k * haversine(u, goal) is a lower bound on the cost of any u -> goal
+        path. The factor is computed once per profile and cached.
+        """
+        profile = get_profile(profile)
+        if profile not in self._heuristic_scales:
+            cost = self.edge_weights(profile)
+            positive = self.edge_km > 0
+            if positive.any():
+                scale = float(np.min(cost[positive] / self.edge_km[positive]))
+            else:
+                scale = 0.0
+            self._heuristic_scales[profile] = max(scale, 0.0)
+        return self._heuristic_scales[profile]
+
+    def potentials(self, goal: int, profile: Union[str, RoutingProfile]) -> np.ndarray:
+        """Admissible heuristic from every node toward goal, in one vectorized pass"""
+        return self.straight_line_km(goal) * self.heuristic_scale(profile)
+
+    def straight_line_km(self, node: int) -> np.ndarray:
+        """Haversine distance in km from every node to node"""
+        return haversine_km(
+            self.lat_rad, self.lon_rad, self.cos_lat,
+            self.lat_rad[node], self.lon_rad[node], self.cos_lat[node],
+        )
+
+    def route(self, path: List[int], distance: float, time: float, cost: int) -> Route:
+        """A Route over node ids that names its stops from this graph on demand"""
+        return Route.from_nodes(path, self.names, distance, time, cost)
+
+    def to_route(self, path: List[int]) -> Route:
+        """Build a Route from a node-id path, summing edge and entry costs"""
+        total_distance = 0
+        total_time = 0
+        for u, v in zip(path, path[1:]):
+            e = self.edge_id(u, v)
+            total_distance += self._dist[e]
+            total_time += self._time[e]
+        total_cost = sum(self._node_cost[u] for u in path)
+        return self.route(path, total_distance, total_time, total_cost)
+
+
+def haversine_km(lat1, lon1, cos_lat1, lat2, lon2, cos_lat2):
+    """Great-circle distance in km between radian coordinates (array friendly)"""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _resolve_place(name: str, places: Dict[str, Place], by_name: Dict[str, Place]) -> Place:
+    # Some catalog keys differ from the spelling used in the graph, so fall
+    # back to the Place's own name
+    place = places.get(name) or by_name.get(name)
+    if place is None:
+        raise KeyError(f"No place data for graph node: {name}")
+    return place
+
+
+def compile_graph(graph: Dict[str, Dict[str, dict]], places: Dict[str, Place]) -> CompiledGraph:
+    """Compile the dict-of-dicts graph and place catalog into a CompiledGraph"""
+    names = list(places)
+    seen = set(names)
+    for node, edges in graph.items():
+        for name in (node, *edges):
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+    index = {name: i for i, name in enumerate(names)}
+
+    by_name = {place.name: place for place in places.values()}
+    resolved = [_resolve_place(name, places, by_name) for name in names]
+    coords = np.array([place.coords for place in resolved], dtype=np.float64).reshape(-1, 2)
+    node_cost = np.array([place.cost for place in resolved], dtype=np.int64)
+
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    targets, dist, time = [], [], []
+    for u, name in enumerate(names):
+        for neighbor, edge_data in graph.get(name, {}).items():
+            targets.append(index[neighbor])
+            dist.append(edge_data["dist"])
+            time.append(edge_data["time"])
+        offsets[u + 1] = len(targets)
+
+    return CompiledGraph(
+        names,
+        coords,
+        node_cost,
+        offsets,
+        np.array(targets, dtype=np.int32),
+        np.array(dist, dtype=np.float64),
+        np.array(time, dtype=np.float64),
+    )
+
+
+def _reconstruct_path(parent: List[int], goal: int) -> List[int]:
+    """Walk predecessor pointers back from goal to the source"""
+    path = [goal]
+    while parent[path[-1]] >= 0:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return path
+
+
+def find_route(compiled: CompiledGraph, start: str, end: str,
+               profile: Union[str, RoutingProfile] = "combined",
+               stats: Optional[Dict[str, int]] = None, mode: str = "astar") -> Route:
+    """Cheapest route under a routing profile (see PROFILES)
+
+    Edge weights come from the profile's precomputed layer, so switching
+    profiles costs nothing once a layer exists. ``mode`` picks the search:
+    forward A* (default), bidirectional A* or bidirectional Dijkstra (see
+    SEARCH_MODES). A* uses the haversine distance
+    to the goal scaled by the cost profile's calibration factor, so it never
+    overestimates and the returned route is optimal for the profile. If
+    ``stats`` is given, the number of settled nodes is stored under
+    ``"expanded"``.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+    profile = get_profile(profile)
+    source = compiled.node_id(start)
+    goal = compiled.node_id(end)
+    weights = compiled._layer(profile)[1]
+    if mode == "astar":
+        potential = compiled.potentials(goal, profile).tolist()
+        route = _astar(compiled, source, goal, weights, potential, stats)
+    else:
+        if mode == "bidirectional-astar":
+            # Average of the forward and backward heuristics: consistent for
+            # both directions, so the two searches can share one stop rule
+            scale = compiled.heuristic_scale(profile)
+            to_goal = compiled.straight_line_km(goal)
+            from_source = compiled.straight_line_km(source)
+            potential = ((to_goal - from_source) * (scale / 2)).tolist()
+        else:
+            potential = [0.0] * compiled.num_nodes
+        route = _bidirectional(compiled, source, goal, weights, potential, stats)
+    if route is None:
+        # Fallback to simple path if A* fails
+        return Route([start, end], 0, 0, 0)
+    return route
+
+
+def _astar(compiled: CompiledGraph, source: int, goal: int, weights: List[float],
+           potential: List[float], stats: Optional[Dict[str, int]] = None) -> Optional[Route]:
+    """A* core over node ids with a precomputed potential list; None if unreachable
+
+    The search keeps one predecessor pointer per node instead of carrying a
+    copy of the path in every heap entry, and accumulates distance, time and
+    entry cost as it relaxes edges, so the route is assembled once at the goal.
+    """
+    n = compiled.num_nodes
+    offsets = compiled._offsets
+    targets = compiled._targets
+    dist = compiled._dist
+    time = compiled._time
+    node_cost = compiled._node_cost
+
+    inf = math.inf
+    g_scores = [inf] * n
+    parent = [-1] * n
+    total_dist = [0.0] * n
+    total_time = [0.0] * n
+    total_cost = [0] * n
+    closed = bytearray(n)
+    expanded = 0
+
+    g_scores[source] = 0.0
+    total_cost[source] = node_cost[source]
+
+    # Priority queue: (f_score, g_score, node)
+    open_set = [(potential[source], 0.0, source)]
+    route = None
+
+    while open_set:
+        f_score, g_score, current = heapq.heappop(open_set)
+
+        if closed[current]:
+            continue
+
+        if current == goal:
+            route = compiled.route(
+                _reconstruct_path(parent, goal),
+                total_dist[goal],
+                total_time[goal],
+                total_cost[goal],
+            )
+            break
+
+        closed[current] = 1
+        expanded += 1
+
+        for e in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[e]
+            if closed[neighbor]:
+                continue
+
+            tentative_g = g_score + weights[e]
+
+            if tentative_g < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_g
+                parent[neighbor] = current
+                total_dist[neighbor] = total_dist[current] + dist[e]
+                total_time[neighbor] = total_time[current] + time[e]
+                total_cost[neighbor] = total_cost[current] + node_cost[neighbor]
+                heapq.heappush(open_set, (tentative_g + potential[neighbor], tentative_g, neighbor))
+
+    if stats is not None:
+        stats["expanded"] = expanded
+    return route
+
+
+def _bidirectional(compiled: CompiledGraph, source: int, goal: int, weights: List[float],
+                   potential: List[float], stats: Optional[Dict[str, int]] = None) -> Optional[Route]:
+    """Bidirectional search meeting in the middle; None if unreachable
+
+    The forward search follows outgoing edges from source and the backward
+    search follows incoming edges (the reverse CSR) from goal, so one-way
+    edges are respected. Forward keys are g + potential and backward keys are
+    g - potential; with a zero potential this is bidirectional Dijkstra. The
+    search stops once the two smallest keys together reach the best meeting
+    cost found so far.
+    """
+    n = compiled.num_nodes
+    offsets = compiled._offsets
+    targets = compiled._targets
+    rev_offsets = compiled._rev_offsets
+    rev_sources = compiled._rev_sources
+    rev_edges = compiled._rev_edges
+    dist = compiled._dist
+    time = compiled._time
+    node_cost = compiled._node_cost
+
+    inf = math.inf
+    g_fwd, g_bwd = [inf] * n, [inf] * n
+    parent_fwd, parent_bwd = [-1] * n, [-1] * n
+    dist_fwd, dist_bwd = [0.0] * n, [0.0] * n
+    time_fwd, time_bwd = [0.0] * n, [0.0] * n
+    cost_fwd, cost_bwd = [0] * n, [0] * n
+    closed_fwd, closed_bwd = bytearray(n), bytearray(n)
+    expanded = 0
+
+    g_fwd[source] = 0.0
+    g_bwd[goal] = 0.0
+    cost_fwd[source] = node_cost[source]
+    cost_bwd[goal] = node_cost[goal]
+    open_fwd = [(potential[source], source)]
+    open_bwd = [(-potential[goal], goal)]
+
+    best = inf
+    meeting = source if source == goal else -1
+    if meeting >= 0:
+        best = 0.0
+
+    while open_fwd and open_bwd:
+        if open_fwd[0][0] + open_bwd[0][0] >= best:
+            break
+
+        # Advance the side with the smaller frontier key
+        if open_fwd[0][0] <= open_bwd[0][0]:
+            _, current = heapq.heappop(open_fwd)
+            if closed_fwd[current]:
+                continue
+            closed_fwd[current] = 1
+            expanded += 1
+            g_score = g_fwd[current]
+            for e in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[e]
+                tentative_g = g_score + weights[e]
+                if tentative_g < g_fwd[neighbor]:
+                    g_fwd[neighbor] = tentative_g
+                    parent_fwd[neighbor] = current
+                    dist_fwd[neighbor] = dist_fwd[current] + dist[e]
+                    time_fwd[neighbor] = time_fwd[current] + time[e]
+                    cost_fwd[neighbor] = cost_fwd[current] + node_cost[neighbor]
+                    heapq.heappush(open_fwd, (tentative_g + potential[neighbor], neighbor))
+                    if tentative_g + g_bwd[neighbor] < best:
+                        best = tentative_g + g_bwd[neighbor]
+                        meeting = neighbor
+        else:
+            _, current = heapq.heappop(open_bwd)
+            if closed_bwd[current]:
+                continue
+            closed_bwd[current] = 1
+            expanded += 1
+            g_score = g_bwd[current]
+            for i in range(rev_offsets[current], rev_offsets[current + 1]):
+                neighbor = rev_sources[i]
+                e = rev_edges[i]
+                tentative_g = g_score + weights[e]
+                if tentative_g < g_bwd[neighbor]:
+                    g_bwd[neighbor] = tentative_g
+                    parent_bwd[neighbor] = current
+                    dist_bwd[neighbor] = dist_bwd[current] + dist[e]
+                    time_bwd[neighbor] = time_bwd[current] + time[e]
+                    cost_bwd[neighbor] = cost_bwd[current] + node_cost[neighbor]
+                    heapq.heappush(open_bwd, (tentative_g - potential[neighbor], neighbor))
+                    if g_fwd[neighbor] + tentative_g < best:
+                        best = g_fwd[neighbor] + tentative_g
+                        meeting = neighbor
+
+    if stats is not None:
+        stats["expanded"] = expanded
+    if meeting < 0:
+        return None
+
+    path = _reconstruct_path(parent_fwd, meeting)
+    current = meeting
+    while parent_bwd[current] >= 0:
+        current = parent_bwd[current]
+        path.append(current)
+    return compiled.route(
+        path,
+        dist_fwd[meeting] + dist_bwd[meeting],
+        time_fwd[meeting] + time_bwd[meeting],
+        cost_fwd[meeting] + cost_bwd[meeting] - node_cost[meeting],
+    )
+
+
+def shortest_path_tree(compiled: CompiledGraph, root: int, weights: List[float],
+                       reverse: bool = False) -> Tuple[List[float], List[int]]:
+    """Dijkstra from root over every reachable node
+
+    Returns the cost to each node (``inf`` if unreachable) and the id of the
+    tree edge that reaches it (``-1`` for root and unreachable nodes). With
+    ``reverse`` the search follows incoming edges, so the costs are *to*
+    root, which makes them exact lower bounds for searches toward it.
+    """
+    n = compiled.num_nodes
+    if reverse:
+        offsets, ends, edge_ids = compiled._rev_offsets, compiled._rev_sources, compiled._rev_edges
+    else:
+        offsets, ends, edge_ids = compiled._offsets, compiled._targets, None
+
+    inf = math.inf
+    cost = [inf] * n
+    tree_edge = [-1] * n
+    closed = bytearray(n)
+    cost[root] = 0.0
+    heap = [(0.0, root)]
+    while heap:
+        c, current = heapq.heappop(heap)
+        if closed[current]:
+            continue
+        closed[current] = 1
+        for i in range(offsets[current], offsets[current + 1]):
+            neighbor = ends[i]
+            e = edge_ids[i] if reverse else i
+            tentative = c + weights[e]
+            if tentative < cost[neighbor]:
+                cost[neighbor] = tentative
+                tree_edge[neighbor] = e
+                heapq.heappush(heap, (tentative, neighbor))
+    return cost, tree_edge
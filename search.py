@@ -0,0 +1,185 @@
+import bisect
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Share of a query word's trigrams a name must contain to count as a
+# typo of it, and the shortest query worth matching that loosely
+FUZZY_THRESHOLD = 0.5
+FUZZY_MIN_CHARS = 3
+
+# Match tiers, best first; a row's score is its tier plus at most TIE_BREAK
+# for its rank, so rank only orders rows within a tier
+NAME_PREFIX, NAME_WORDS, TEXT_WORDS = 3.0, 2.0, 1.0
+TIE_BREAK = 0.001
+
+_WORD = re.compile(r"\w+")
+_APOSTROPHES = re.compile(r"['’]")
+
+
+def words(text: str) -> List[str]:
+    """Lower-case words of text; apostrophes are dropped, so "Robber's" is "robbers" """
+    return _WORD.findall(_APOSTROPHES.sub("", text.lower()))
+
+
+def trigrams(word: str) -> List[str]:
+    """Distinct trigrams of a word padded with two spaces in front and one behind"""
+    padded = f"  {word} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+class InvertedIndex:
+    """Rows per term, CSR style over sorted terms.
+
+    The rows holding ``terms[t]`` are ``rows[offsets[t]:offsets[t + 1]]``,
+    ascending. Terms sharing a prefix are neighbours in sorted order, so
+    every row holding any term that starts with a prefix is one slice.
+    """
+
+    def __init__(self, row_terms: Iterable[Iterable[str]]):
+        term_ids = {}
+        ids: List[int] = []
+        rows: List[int] = []
+        for row, terms in enumerate(row_terms):
+            for term in set(terms):
+                ids.append(term_ids.setdefault(term, len(term_ids)))
+                rows.append(row)
+        self.terms = sorted(term_ids)
+        rank = np.empty(len(term_ids), dtype=np.int64)
+        rank[[term_ids[term] for term in self.terms]] = np.arange(len(self.terms))
+        ranks = rank[np.array(ids, dtype=np.int64)]
+        order = np.lexsort((np.array(rows, dtype=np.int64), ranks))
+        self.rows = np.array(rows, dtype=np.int32)[order]
+        self.offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ranks, minlength=len(self.terms)), out=self.offsets[1:])
+
+    def term(self, term: str) -> np.ndarray:
+        """Rows holding term"""
+        t = bisect.bisect_left(self.terms, term)
+        if t == len(self.terms) or self.terms[t] != term:
+            return self.rows[:0]
+        return self.rows[self.offsets[t]:self.offsets[t + 1]]
+
+    def prefix(self, prefix: str) -> np.ndarray:
+        """Rows holding a term that starts with prefix; a row holding several appears once per term"""
+        first = bisect.bisect_left(self.terms, prefix)
+        last = bisect.bisect_left(self.terms, prefix + "\U0010ffff", first)
+        return self.rows[self.offsets[first]:self.offsets[last]]
+
+
+class PlaceSearch:
+    """Search over place names, categories and descriptions for as-you-type filtering.
+
+    Three indexes answer a query: an inverted index from name words to rows,
+    another from every word of a place (name, category, description) to
+    rows, and a trigram index over name words for typos. The sorted,
+    lower-cased names give whole-name prefix completion by binary search.
+
+    Query words match any indexed word they are a prefix of, and a row must
+    match all of them, so the half-typed last word of a query already
+    narrows the results. Each step is a slice of a sorted array or a NumPy
+    pass over candidate rows, never a loop over the catalog.
+    """
+
+    def __init__(self, names: Sequence[str], descriptions: Sequence[str], categories: Sequence[str],
+                 rank: Optional[np.ndarray] = None):
+        self.names = list(names)
+        name_words = [words(name) for name in self.names]
+        self._name_words = InvertedIndex(name_words)
+        self._text_words = InvertedIndex(
+            name + words(category) + words(description)
+            for name, category, description in zip(name_words, categories, descriptions)
+        )
+        self._trigrams = InvertedIndex(
+            [gram for word in name for gram in trigrams(word)] for name in name_words)
+
+        keyed = sorted((" ".join(name), row) for row, name in enumerate(name_words))
+        self._sorted_names = [key for key, _ in keyed]
+        self._sorted_rows = np.array([row for _, row in keyed], dtype=np.int32)
+
+        # Ties go to the higher rank, then the earlier row
+        n = len(self.names)
+        rank = np.zeros(n) if rank is None else np.asarray(rank, dtype=np.float64)
+        order = np.lexsort((-np.arange(n), rank))
+        self._tie_break = np.empty(n)
+        self._tie_break[order] = np.arange(n) / max(n, 1)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def complete(self, prefix: str, limit: int = 10) -> np.ndarray:
+        """Rows whose name starts with prefix, best ranked first"""
+        return self._best(self._name_prefix(" ".join(words(prefix))), limit)
+
+    def matching(self, query: str, names_only: bool = False) -> np.ndarray:
+        """Rows holding a word starting with each word of query, in row order"""
+        index = self._name_words if names_only else self._text_words
+        # Marking a word's rows in a mask costs one pass over its postings,
+        # where sorting them (np.unique) would dominate for short prefixes
+        matched = np.ones(len(self.names), dtype=bool)
+        for word in set(words(query)):
+            holds = np.zeros(len(self.names), dtype=bool)
+            holds[index.prefix(word)] = True
+            matched &= holds
+        return np.flatnonzero(matched).astype(np.int32)
+
+    def fuzzy(self, query: str, limit: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, similarity) of names close to query despite typos, most similar first
+
+        A query word's similarity to a name is the share of its trigrams
+        found among the name's words; a name's is the mean over query words.
+        Names below FUZZY_THRESHOLD are dropped.
+        """
+        query_words = [word for word in words(query) if len(word) >= FUZZY_MIN_CHARS]
+        if not query_words or not len(self.names):
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        similarity = np.zeros(len(self.names))
+        for word in query_words:
+            grams = trigrams(word)
+            shared = np.bincount(np.concatenate([self._trigrams.term(gram) for gram in grams]),
+                                 minlength=len(self.names))
+            similarity += shared / len(grams)
+        similarity /= len(query_words)
+        rows = np.flatnonzero(similarity >= FUZZY_THRESHOLD)
+        order = np.lexsort((-self._tie_break[rows], -similarity[rows]))[:limit]
+        return rows[order].astype(np.int32), similarity[rows[order]]
+
+    def search(self, query: str, limit: int = 20) -> np.ndarray:
+        """Up to limit rows for query, best first
+
+        Whole-name prefix matches come first, then rows whose name words
+        match every query word, then rows whose name, category or
+        description do. When those leave room, names that look like typos
+        of the query fill it.
+        """
+        key = " ".join(words(query))
+        if not key:
+            return self._best(np.arange(len(self.names), dtype=np.int32), limit)
+        scores = np.zeros(len(self.names))
+        for tier, rows in ((TEXT_WORDS, self.matching(key)), (NAME_WORDS, self.matching(key, names_only=True)),
+                           (NAME_PREFIX, self._name_prefix(key))):
+            scores[rows] = tier
+        found = np.flatnonzero(scores)
+        if len(found) < limit:
+            fuzzy_rows, similarity = self.fuzzy(key, limit + len(found))
+            new = scores[fuzzy_rows] == 0
+            # Below every exact tier, ordered by similarity
+            scores[fuzzy_rows[new]] = similarity[new] * (TEXT_WORDS - TIE_BREAK)
+            found = np.flatnonzero(scores)
+        return self._top(found, scores[found] + self._tie_break[found] * TIE_BREAK, limit)
+
+    def _name_prefix(self, key: str) -> np.ndarray:
+        first = bisect.bisect_left(self._sorted_names, key)
+        last = bisect.bisect_left(self._sorted_names, key + "\U0010ffff", first)
+        return self._sorted_rows[first:last]
+
+    def _best(self, rows: np.ndarray, limit: int) -> np.ndarray:
+        return self._top(rows, self._tie_break[rows], limit)
+
+    @staticmethod
+    def _top(rows: np.ndarray, scores: np.ndarray, limit: int) -> np.ndarray:
+        if len(rows) > limit:
+            keep = np.argpartition(-scores, limit - 1)[:limit]
+            rows, scores = rows[keep], scores[keep]
+        return rows[np.argsort(-scores, kind="stable")]
@@ -0,0 +1,72 @@
+import json
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+_ALIGNMENT = 64
+
+
+def write_snapshot(path: str, magic: bytes, header: dict, arrays: Dict[str, np.ndarray]):
+    """Write a memory-mappable snapshot: magic, JSON header, 64-byte aligned raw arrays
+
+    The header gains an ``"arrays"`` entry describing the dtype, shape and
+    file offset of every array, so readers can map them without parsing data.
+    """
+    specs = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        specs.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+        offset = _align(offset + array.nbytes)
+    header = dict(header, arrays=specs)
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(magic) + 4 + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for spec, array in zip(specs, arrays.values()):
+            f.write(b"\0" * (data_start + spec["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    # Replace atomically so a crash never leaves a half-written snapshot
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str, magic: bytes) -> Optional[Tuple[dict, Dict[str, np.ndarray]]]:
+    """Memory-map a snapshot written by write_snapshot; None if missing or corrupt"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(magic)) != magic:
+                return None
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        size = os.path.getsize(path)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    data_start = _align(len(magic) + 4 + header_len)
+    arrays = {}
+    try:
+        for spec in header.pop("arrays"):
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            offset = data_start + spec["offset"]
+            nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+            if offset + nbytes > size:
+                return None
+            if nbytes == 0:
+                # mmap cannot map an empty range
+                arrays[spec["name"]] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[spec["name"]] = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+    except (KeyError, TypeError, ValueError, OSError):
+        return None
+    return header, arrays
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
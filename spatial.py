@@ -0,0 +1,217 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+from routing import EARTH_RADIUS_KM, haversine_km
+
+# Points per grid cell the index aims for on average
+POINTS_PER_CELL = 8
+
+
+class SpatialIndex:
+    """Grid index over (lat, lon) points for nearest, radius and box queries.
+
+    Points are bucketed into square cells of ``cell_deg`` degrees and stored
+    cell by cell, CSR style: the points of cell ``c`` are
+    ``order[cell_start[c]:cell_start[c + 1]]``. Cells are numbered row by
+    row, so the cells of one grid row between two longitudes are a single
+    slice. A query gathers the slices covering its area and measures only
+    those points, with great-circle (haversine) distances; longitude ranges
+    that cross the antimeridian are split in two.
+    """
+
+    def __init__(self, coords, points_per_cell: int = POINTS_PER_CELL):
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.lat = coords[:, 0]
+        self.lon = coords[:, 1]
+        self.lat_rad = np.radians(self.lat)
+        self.lon_rad = np.radians(self.lon)
+        self.cos_lat = np.cos(self.lat_rad)
+
+        n = len(coords)
+        if n:
+            self.lat0, self.lon0 = float(self.lat.min()), float(self.lon.min())
+            lat_span = float(self.lat.max()) - self.lat0
+            lon_span = float(self.lon.max()) - self.lon0
+        else:
+            self.lat0 = self.lon0 = lat_span = lon_span = 0.0
+        # Square cells sized for points_per_cell on average, doubled until
+        # the grid has no more cells than that would need
+        max_cells = max(n // points_per_cell, 1) * 4
+        self.cell_deg = math.sqrt(max(lat_span, 1e-6) * max(lon_span, 1e-6) * points_per_cell / max(n, 1))
+        while True:
+            self.rows = int(lat_span / self.cell_deg) + 1
+            self.cols = int(lon_span / self.cell_deg) + 1
+            if self.rows * self.cols <= max_cells:
+                break
+            self.cell_deg *= 2
+
+        cells = (self._row(self.lat) * self.cols + self._col(self.lon)).astype(np.int64)
+        self.order = np.argsort(cells, kind="stable")
+        self.cell_start = np.zeros(self.rows * self.cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.rows * self.cols), out=self.cell_start[1:])
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def within(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, km) of every point within radius_km of (lat, lon), nearest first"""
+        angle = radius_km / EARTH_RADIUS_KM
+        lat_band = math.degrees(angle)
+        if math.radians(abs(lat)) + angle >= math.pi / 2:
+            # The circle reaches a pole, so it spans every longitude
+            lon_band = 180.0
+        else:
+            lon_band = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+        rows = self._candidates(lat - lat_band, lat + lat_band, lon - lon_band, lon + lon_band)
+        km = self._distance(lat, lon, rows)
+        keep = km <= radius_km
+        rows, km = rows[keep], km[keep]
+        order = np.argsort(km, kind="stable")
+        return rows[order], km[order]
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, km) of the k points nearest (lat, lon), nearest first
+
+        Searches a circle that doubles in radius until it holds k points;
+        every point outside it is further than every point inside.
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        radius = max(self._cell_km(lat), 1e-3)
+        while True:
+            rows, km = self.within(lat, lon, radius)
+            if len(rows) >= k or radius >= math.pi * EARTH_RADIUS_KM:
+                return rows[:k], km[:k]
+            radius *= 2
+
+    def near_path(self, path, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, km) of every point within radius_km of a polyline of (lat, lon) points, nearest first
+
+        Distances are to the nearest great-circle leg of the path (cross-track
+        distance, or the nearer endpoint when the point lies beyond the leg),
+        so long routes cost one small box lookup per leg rather than a scan.
+        """
+        path = np.radians(np.asarray(path, dtype=np.float64).reshape(-1, 2))
+        if not len(path) or not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        if len(path) == 1:
+            return self.within(*np.degrees(path[0]), radius_km)
+
+        found_rows: List[np.ndarray] = []
+        found_km: List[np.ndarray] = []
+        angle = radius_km / EARTH_RADIUS_KM
+        ends = _unit(path[:, 0], path[:, 1]).tolist()
+        for (lat_a, lon_a), (lat_b, lon_b), a, b in zip(path[:-1].tolist(), path[1:].tolist(), ends[:-1], ends[1:]):
+            # Box round both ends, widened by the radius and by how far the
+            # great circle bulges poleward of the straight lat/lon line
+            leg = 2 * math.asin(min(1.0, math.sqrt(
+                math.sin((lat_b - lat_a) / 2) ** 2
+                + math.cos(lat_a) * math.cos(lat_b) * math.sin((lon_b - lon_a) / 2) ** 2)))
+            top = max(abs(lat_a), abs(lat_b))
+            band = angle + leg * leg / 8 * math.tan(min(top, 1.5))
+            if top + band >= math.pi / 2:
+                lon_band = math.pi
+            else:
+                lon_band = math.asin(min(1.0, math.sin(band) / math.cos(top + band)))
+            rows = self._candidates(
+                math.degrees(min(lat_a, lat_b) - band), math.degrees(max(lat_a, lat_b) + band),
+                math.degrees(min(lon_a, lon_b) - lon_band), math.degrees(max(lon_a, lon_b) + lon_band),
+            )
+            if not len(rows):
+                continue
+            km = np.minimum(self._distance_rad(lat_a, lon_a, rows), self._distance_rad(lat_b, lon_b, rows))
+            normal = _cross(a, b)
+            norm = math.sqrt(sum(x * x for x in normal))
+            if norm > 1e-12:
+                normal = [x / norm for x in normal]
+                points = _unit(self.lat_rad[rows], self.lon_rad[rows])
+                # The foot of p on the great circle lies between a and b when
+                # (a x p).n and (p x b).n are both non-negative
+                inside = (points @ _cross(normal, a) >= 0) & (points @ _cross(b, normal) >= 0)
+                cross_track = EARTH_RADIUS_KM * np.arcsin(np.minimum(np.abs(points @ normal), 1.0))
+                km = np.where(inside, np.minimum(km, cross_track), km)
+            keep = km <= radius_km
+            found_rows.append(rows[keep])
+            found_km.append(km[keep])
+
+        if not found_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        rows, km = np.concatenate(found_rows), np.concatenate(found_km)
+        # Nearest first, keeping each row's first (smallest) distance
+        order = np.lexsort((km, rows))
+        rows, km = rows[order], km[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        rows, km = rows[first], km[first]
+        order = np.argsort(km, kind="stable")
+        return rows[order], km[order]
+
+    def in_box(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """Rows of the points inside a lat/lon box, in row order; west > east crosses the antimeridian"""
+        if west > east:
+            east += 360.0
+        rows = self._candidates(south, north, west, east)
+        lat, lon = self.lat[rows], self.lon[rows]
+        keep = (lat >= south) & (lat <= north) & (
+            ((lon >= west) & (lon <= east)) | ((lon + 360.0 >= west) & (lon + 360.0 <= east)))
+        return np.sort(rows[keep])
+
+    def _candidates(self, south: float, north: float, west: float, east: float) -> np.ndarray:
+        """Rows in every cell overlapping the box (a superset of the points inside it)"""
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        # Longitudes past +-180 wrap round to the other side of the grid
+        spans = [(max(west, -180.0), min(east, 180.0))]
+        if west < -180.0:
+            spans.append((west + 360.0, 180.0))
+        if east > 180.0:
+            spans.append((-180.0, east - 360.0))
+
+        first_row, last_row = self._cell(south, self.lat0, self.rows), self._cell(north, self.lat0, self.rows)
+        slices: List[np.ndarray] = []
+        for low, high in spans:
+            if low > high:
+                continue
+            first_col, last_col = self._cell(low, self.lon0, self.cols), self._cell(high, self.lon0, self.cols)
+            for row in range(first_row, last_row + 1):
+                start = self.cell_start[row * self.cols + first_col]
+                stop = self.cell_start[row * self.cols + last_col + 1]
+                if stop > start:
+                    slices.append(self.order[start:stop])
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(slices)) if len(spans) > 1 else np.concatenate(slices)
+
+    def _cell(self, degrees: float, origin: float, count: int) -> int:
+        # Scalar _row / _col, without NumPy's per-call overhead
+        return min(max(math.floor((degrees - origin) / self.cell_deg), 0), count - 1)
+
+    def _row(self, lat):
+        return np.clip(np.floor((np.asarray(lat) - self.lat0) / self.cell_deg), 0, self.rows - 1).astype(np.int64)
+
+    def _col(self, lon):
+        return np.clip(np.floor((np.asarray(lon) - self.lon0) / self.cell_deg), 0, self.cols - 1).astype(np.int64)
+
+    def _cell_km(self, lat: float) -> float:
+        # Width of a cell at this latitude, the narrower of its two sides
+        return math.radians(self.cell_deg) * EARTH_RADIUS_KM * max(math.cos(math.radians(lat)), 1e-3)
+
+    def _distance(self, lat: float, lon: float, rows: np.ndarray) -> np.ndarray:
+        return self._distance_rad(math.radians(lat), math.radians(lon), rows)
+
+    def _distance_rad(self, lat_rad: float, lon_rad: float, rows: np.ndarray) -> np.ndarray:
+        return haversine_km(lat_rad, lon_rad, math.cos(lat_rad),
+                            self.lat_rad[rows], self.lon_rad[rows], self.cos_lat[rows])
+
+
+def _cross(a: List[float], b: List[float]) -> List[float]:
+    return [a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]]
+
+
+def _unit(lat_rad, lon_rad) -> np.ndarray:
+    """Unit vectors on the sphere for radian coordinates, one row per point"""
+    cos_lat = np.cos(lat_rad)
+    return np.stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)], axis=-1)
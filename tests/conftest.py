@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The engines are top-level modules next to DAA_final.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
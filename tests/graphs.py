@@ -0,0 +1,86 @@
+"""Small random graphs and brute-force references shared by the engine tests"""
+import itertools
+import random
+from typing import Dict, List, Tuple
+
+from routing import CompiledGraph, compile_graph
+from travel_data import Place
+
+
+def random_graph(n: int, seed: int, extra_edges: int = 2) -> Tuple[Dict[str, Dict[str, dict]], Dict[str, Place]]:
+    """A connected directed graph with small integer weights, so equal-cost paths are common"""
+    rng = random.Random(seed)
+    names = [f"P{i}" for i in range(n)]
+    places = {
+        name: Place(name, (30.25 + rng.uniform(0, 0.1), 77.95 + rng.uniform(0, 0.1)),
+                    rng.choice((0, 0, 50, 100)), 4.0, "", 1.0, "Landmark")
+        for name in names
+    }
+    graph = {name: {} for name in names}
+
+    def add(u: str, v: str):
+        if u != v and v not in graph[u]:
+            graph[u][v] = {"dist": rng.randint(1, 6), "time": rng.randint(2, 20)}
+
+    # A random spanning cycle keeps every node reachable from every other
+    order = names[:]
+    rng.shuffle(order)
+    for u, v in zip(order, order[1:] + order[:1]):
+        add(u, v)
+    for _ in range(extra_edges * n):
+        add(rng.choice(names), rng.choice(names))
+    return graph, places
+
+
+def random_compiled(n: int, seed: int, extra_edges: int = 2) -> CompiledGraph:
+    return compile_graph(*random_graph(n, seed, extra_edges))
+
+
+def path_weight(compiled: CompiledGraph, path: List[int], weights: List[float]) -> float:
+    """Sum an edge-weight layer along a node-id path"""
+    total = 0.0
+    for u, v in zip(path, path[1:]):
+        e = compiled.edge_id(u, v)
+        assert e >= 0, f"{compiled.names[u]} -> {compiled.names[v]} is not a road"
+        total += weights[e]
+    return total
+
+
+def simple_paths(compiled: CompiledGraph, source: int, goal: int) -> List[List[int]]:
+    """Every loopless source -> goal path, by depth-first enumeration"""
+    found = []
+    stack = [(source, [source])]
+    while stack:
+        u, path = stack.pop()
+        if u == goal:
+            found.append(path)
+            continue
+        for v, _, _ in compiled.neighbors(u):
+            if v not in path:
+                stack.append((v, path + [v]))
+    return found
+
+
+def shortest_costs(compiled: CompiledGraph, weights: List[float]) -> List[List[float]]:
+    """All-pairs shortest costs by plain Bellman-Ford style relaxation"""
+    n = compiled.num_nodes
+    best = [[float("inf")] * n for _ in range(n)]
+    for s in range(n):
+        best[s][s] = 0.0
+        for _ in range(n):
+            changed = False
+            for u in range(n):
+                if best[s][u] == float("inf"):
+                    continue
+                for e in range(compiled._offsets[u], compiled._offsets[u + 1]):
+                    v = compiled._targets[e]
+                    if best[s][u] + weights[e] < best[s][v] - 1e-9:
+                        best[s][v] = best[s][u] + weights[e]
+                        changed = True
+            if not changed:
+                break
+    return best
+
+
+def pairs(n: int):
+    return itertools.permutations(range(n), 2)
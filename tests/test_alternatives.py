@@ -0,0 +1,28 @@
+import pytest
+
+from alternatives import iter_shortest_routes, k_shortest_routes
+from graphs import path_weight, random_compiled, simple_paths
+
+
+@pytest.mark.parametrize("seed", range(15))
+@pytest.mark.parametrize("profile", ["distance", "combined"])
+def test_yields_every_simple_path_in_cost_order(seed, profile):
+    compiled = random_compiled(8, seed, extra_edges=2)
+    weights = compiled.edge_weights(profile).tolist()
+    for s, g in ((0, 7), (4, 2)):
+        expected = sorted(path_weight(compiled, path, weights) for path in simple_paths(compiled, s, g))
+        routes = list(iter_shortest_routes(compiled, compiled.names[s], compiled.names[g], profile))
+        paths = [[compiled.node_id(name) for name in route.path] for route in routes]
+        assert len({tuple(path) for path in paths}) == len(paths)
+        for path in paths:
+            assert path[0] == s and path[-1] == g
+            assert len(set(path)) == len(path)
+        costs = [path_weight(compiled, path, weights) for path in paths]
+        assert costs == pytest.approx(expected)
+
+
+def test_k_shortest_stops_at_k():
+    compiled = random_compiled(8, 2)
+    routes = k_shortest_routes(compiled, "P0", "P7", k=3)
+    assert len(routes) == 3
+    assert routes == k_shortest_routes(compiled, "P0", "P7", k=5)[:3]
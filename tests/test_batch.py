@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from batch import route_batch
+from graphs import random_compiled
+from routing import SEARCH_MODES, find_route
+
+
+@pytest.mark.parametrize("mode", SEARCH_MODES)
+def test_batch_matches_sequential_routes(tmp_path, mode):
+    compiled = random_compiled(30, 7)
+    rng = random.Random(7)
+    names = compiled.names + ["Nowhere"]
+    queries = [(rng.choice(names), rng.choice(names), rng.choice(["distance", "time", "combined", "scenic"]))
+               for _ in range(150)]
+
+    results = dict(route_batch(compiled, iter(queries), workers=2, mode=mode, chunk_size=16,
+                               snapshot_path=str(tmp_path / "graph.bin")))
+    assert sorted(results) == list(range(len(queries)))
+    for index, (start, end, profile) in enumerate(queries):
+        try:
+            expected = find_route(compiled, start, end, profile, mode=mode)
+        except KeyError as error:
+            # Unknown places and profiles come back as the error, not a route
+            assert isinstance(results[index], KeyError)
+            assert str(results[index]) == str(error)
+            continue
+        route = results[index]
+        assert (route.path, route.distance, route.time, route.cost) == (
+            expected.path, expected.distance, expected.time, expected.cost)
+
+
+def test_batch_reuses_a_current_snapshot_and_replaces_a_stale_one(tmp_path):
+    path = str(tmp_path / "graph.bin")
+    first = random_compiled(10, 1)
+    assert dict(route_batch(first, [("P0", "P1", "time")], workers=1, snapshot_path=path))[0].path == \
+        find_route(first, "P0", "P1", "time").path
+    written = (tmp_path / "graph.bin").stat().st_mtime_ns
+    list(route_batch(first, [("P1", "P2", "time")], workers=1, snapshot_path=path))
+    assert (tmp_path / "graph.bin").stat().st_mtime_ns == written
+
+    second = random_compiled(10, 2)
+    routes = dict(route_batch(second, [("P0", "P1", "time")], workers=1, snapshot_path=path))
+    assert routes[0].path == find_route(second, "P0", "P1", "time").path
+    assert list(route_batch(second, [], workers=1, snapshot_path=path)) == []
@@ -0,0 +1,140 @@
+import json
+import os
+
+import pytest
+
+from catalog import Catalog, write_city
+from catalog_compiler import (CITY_MAGIC, CatalogError, check_city, compile_city, load_city,
+                              load_or_compile_city, snapshot_path)
+from traffic import TrafficProfile
+from travel_data import Place, road_peak_times, weekend_road_peak_times
+
+CENTER = (30.32, 78.03)
+
+
+def _place(name, coords=(30.32, 78.03), **changes):
+    fields = dict(cost=0, rating=4.5, description=f"About {name}", visit_time=1.0, category="Landmark",
+                  popularity_score=0.5)
+    fields.update(changes)
+    return Place(name, coords, fields["cost"], fields["rating"], fields["description"], fields["visit_time"],
+                 fields["category"], fields["popularity_score"])
+
+
+def _small_city():
+    places = {
+        "A": _place("A", (30.320, 78.030)),
+        "B": _place("B", (30.330, 78.040), category="Nature"),
+        "C": _place("C", (30.340, 78.030), cost=50),
+    }
+    graph = {
+        "A": {"B": {"dist": 2, "time": 6}, "C": {"dist": 3, "time": 9}},
+        "B": {"A": {"dist": 2, "time": 6}},
+        "C": {"A": {"dist": 3, "time": 9}},
+    }
+    return places, graph
+
+
+def _catalog(tmp_path, places, graph, version=1):
+    directory = str(tmp_path / "catalog")
+    write_city(directory, "Testville", places, graph, CENTER, version=version)
+    return Catalog(directory)
+
+
+def test_valid_city_has_no_errors(tmp_path):
+    assert check_city(_catalog(tmp_path, *_small_city()).city()) == ([], [])
+
+
+def test_duplicate_names_are_errors(tmp_path):
+    places, graph = _small_city()
+    places["C"] = _place("B", (30.340, 78.030))
+    errors, _ = check_city(_catalog(tmp_path, places, graph).city())
+    assert any('"C" holds a place named "B"' in error for error in errors)
+    assert any('are both named "B"' in error for error in errors)
+
+
+def test_dangling_road_endpoints_are_errors(tmp_path):
+    places, graph = _small_city()
+    graph["A"]["Nowhere"] = {"dist": 1, "time": 2}
+    graph["Ghost"] = {"A": {"dist": 1, "time": 2}}
+    errors, _ = check_city(_catalog(tmp_path, places, graph).city())
+    assert any("Road A -> Nowhere: no place called Nowhere" in error for error in errors)
+    assert any("Road Ghost -> A: no place called Ghost" in error for error in errors)
+
+
+@pytest.mark.parametrize("coords, message", [
+    ((95.0, 78.0), "not a point on Earth"),
+    ((float("nan"), 78.0), "not a point on Earth"),
+    ((28.6, 77.2), "from the city centre"),
+])
+def test_bad_coordinates_are_errors(tmp_path, coords, message):
+    places, graph = _small_city()
+    places["C"] = _place("C", coords)
+    errors, _ = check_city(_catalog(tmp_path, places, graph).city())
+    assert any(error.startswith("C:") and message in error for error in errors)
+    with pytest.raises(CatalogError):
+        compile_city(_catalog(tmp_path, places, graph), "Testville", str(tmp_path / "city.bin"))
+
+
+def test_one_way_road_is_a_warning_and_stranded_place_an_error(tmp_path):
+    places, graph = _small_city()
+    del graph["C"]["A"]
+    errors, warnings = check_city(_catalog(tmp_path, places, graph).city())
+    assert "Road A -> C is one-way" in warnings
+    assert any("cannot be reached from C" in error for error in errors)
+
+
+def test_snapshot_round_trip_builds_places_lazily(tmp_path):
+    catalog = _catalog(tmp_path, *_small_city())
+    path = str(tmp_path / "city.bin")
+    compiled = compile_city(catalog, "Testville", path)
+    loaded = load_city(path, catalog, "Testville")
+    assert loaded is not None
+    assert "index" not in vars(loaded.graph)
+    assert [loaded.table.place(key) for key in loaded.table.keys] == [compiled.table.place(key)
+                                                                       for key in compiled.table.keys]
+    assert list(loaded.table.descriptions) == ["About A", "About B", "About C"]
+    assert loaded.graph.fingerprint() == compiled.graph.fingerprint()
+
+
+def test_bad_snapshot_magic_or_stale_source_is_rejected(tmp_path):
+    catalog = _catalog(tmp_path, *_small_city())
+    path = str(tmp_path / "city.bin")
+    compile_city(catalog, "Testville", path)
+    assert load_city(path, catalog, "Othertown") is None
+
+    with open(path, "r+b") as f:
+        f.write(b"X" * len(CITY_MAGIC))
+    assert load_city(path, catalog, "Testville") is None
+
+    # A changed catalog file no longer matches the snapshot built from it
+    compile_city(catalog, "Testville", path)
+    places, graph = _small_city()
+    places["A"] = _place("A", (30.321, 78.030))
+    newer = _catalog(tmp_path, places, graph, version=2)
+    assert load_city(path, newer, "Testville") is None
+
+
+def test_city_file_from_another_version_is_refused(tmp_path):
+    catalog = _catalog(tmp_path, *_small_city())
+    index_path = os.path.join(catalog.directory, "catalog.json")
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    index["cities"]["Testville"]["version"] = 7
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    with pytest.raises(ValueError):
+        Catalog(catalog.directory).city("Testville")
+
+
+def test_snapshot_start_skips_the_catalog_data(tmp_path):
+    compiled = load_or_compile_city(Catalog(), directory=str(tmp_path))
+    expected = [compiled.table.place(name).category for name in compiled.graph.names]
+
+    catalog = Catalog()
+    city = load_or_compile_city(catalog, directory=str(tmp_path))
+    assert os.path.exists(snapshot_path(catalog, catalog.default_city, str(tmp_path)))
+    categories = city.table.node_categories(city.graph)
+    TrafficProfile.from_peak_times(city.graph, categories, road_peak_times, weekend_road_peak_times)
+    assert not catalog.is_loaded(catalog.default_city)
+    assert categories == expected
+    assert all(key in city.table for key in city.table.keys)
@@ -0,0 +1,33 @@
+import pytest
+
+from contraction import ContractionHierarchy
+from graphs import path_weight, random_compiled, shortest_costs
+
+
+@pytest.mark.parametrize("seed", range(15))
+@pytest.mark.parametrize("settle_limit", [1, 50])
+def test_routes_match_brute_force(seed, settle_limit):
+    compiled = random_compiled(14, seed)
+    weights = compiled.edge_weights("combined").tolist()
+    best = shortest_costs(compiled, weights)
+    hierarchy = ContractionHierarchy.build(compiled, "combined", settle_limit=settle_limit)
+    for s in range(compiled.num_nodes):
+        for g in range(compiled.num_nodes):
+            route = hierarchy.route(compiled.names[s], compiled.names[g])
+            nodes = [compiled.node_id(name) for name in route.path]
+            assert nodes[0] == s and nodes[-1] == g
+            # Unpacked shortcuts are real roads and the path is optimal
+            assert path_weight(compiled, nodes, weights) == pytest.approx(best[s][g])
+            assert route.distance == pytest.approx(path_weight(compiled, nodes, compiled._dist))
+            assert route.time == pytest.approx(path_weight(compiled, nodes, compiled._time))
+
+
+def test_snapshot_round_trip(tmp_path):
+    compiled = random_compiled(12, 3)
+    hierarchy = ContractionHierarchy.build(compiled)
+    path = str(tmp_path / "hierarchy.bin")
+    hierarchy.save(path)
+    loaded = ContractionHierarchy.load(path, compiled)
+    assert loaded is not None
+    assert loaded.route("P0", "P7") == hierarchy.route("P0", "P7")
+    assert ContractionHierarchy.load(path, compiled, "distance") is None
@@ -0,0 +1,64 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from corridor import detour_minutes
+from graphs import random_graph, shortest_costs
+from place_table import PlaceTable, route_corridor
+from routing import compile_graph, find_route
+from travel_data import Place
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("limit", [0.0, 15.0, 40.0, math.inf])
+def test_detour_matches_per_node_searches(seed, limit):
+    compiled = compile_graph(*random_graph(20, seed))
+    costs = shortest_costs(compiled, compiled._time)
+    rng = random.Random(seed)
+    route_nodes = rng.sample(range(compiled.num_nodes), rng.randint(1, 4))
+
+    detour = detour_minutes(compiled, route_nodes, limit)
+    for v in range(compiled.num_nodes):
+        # Leave from the nearest route node, rejoin at the nearest one after
+        expected = min(costs[r][v] for r in route_nodes) + min(costs[v][r] for r in route_nodes)
+        assert detour[v] == (pytest.approx(expected) if expected <= limit else math.inf)
+    assert all(detour[r] == 0.0 for r in route_nodes)
+
+
+def test_corridor_includes_off_graph_places_near_the_route():
+    graph, places = random_graph(15, 2)
+    compiled = compile_graph(graph, places)
+    route_path = find_route(compiled, "P0", "P1").path
+    coords = compiled.coords[[compiled.index[name] for name in route_path]]
+
+    # Places with no road: at the midpoint of each route leg, and well away from the route
+    off_graph = {}
+    for i, (a, b) in enumerate(zip(coords, coords[1:])):
+        off_graph[f"Near{i}"] = Place(f"Near{i}", tuple((a + b) / 2), 0, 4.5, "", 1.0, "Landmark")
+    off_graph["Far"] = Place("Far", (31.5, 79.5), 0, 4.5, "", 1.0, "Landmark")
+    table = PlaceTable({**places, **off_graph})
+
+    corridor = route_corridor(table, compiled, route_path, minutes=0.0, km=0.5)
+    assert all(corridor[table.row(name)] for name in off_graph if name != "Far")
+    assert not corridor[table.row("Far")]
+    assert all(corridor[table.row(name)] for name in route_path)
+    assert not route_corridor(table, compiled, route_path, minutes=0.0, km=0.0)[table.row("Near0")]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_corridor_is_short_detour_or_near_the_legs(seed):
+    graph, places = random_graph(20, seed)
+    compiled = compile_graph(graph, places)
+    table = PlaceTable(places)
+    route_path = find_route(compiled, "P0", "P1").path
+    route_nodes = [compiled.index[name] for name in route_path]
+
+    detour = detour_minutes(compiled, route_nodes, 10.0)
+    near, _ = table.spatial().near_path(compiled.coords[route_nodes], 1.0)
+    expected = {row for row, name in enumerate(table.names) if detour[compiled.index[name]] <= 10.0}
+    expected |= set(near.tolist())
+    corridor = route_corridor(table, compiled, route_path, minutes=10.0, km=1.0)
+    assert set(np.flatnonzero(corridor).tolist()) == expected
+    assert not route_corridor(table, compiled, [], minutes=10.0, km=1.0).any()
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from graphs import random_compiled, shortest_costs
+from isochrone import Reachability
+
+
+def _expected(compiled, costs, source, budget):
+    return {compiled.names[v]: cost for v, cost in enumerate(costs[source]) if cost <= budget}
+
+
+def _check(compiled, costs, result, source, budget):
+    assert dict(result) == pytest.approx(_expected(compiled, costs, source, budget))
+    assert len(result) == len(dict(result))
+    assert [cost for _, cost in result] == sorted(cost for _, cost in result)
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("metric", ["time", "distance"])
+def test_queries_match_bounded_dijkstra_reference(seed, metric):
+    compiled = random_compiled(25, seed)
+    costs = shortest_costs(compiled, compiled._time if metric == "time" else compiled._dist)
+    reach = Reachability(compiled, metric)
+    rng = random.Random(seed)
+    scale = 40 if metric == "time" else 12
+
+    # Growing, then shrinking, budgets from one start, then another start and back
+    for source, budget in [(0, 0.3), (0, 0.6), (0, 1.0), (0, 0.5), (0, 0.0), (7, 0.8), (7, 0.2), (0, 0.7)]:
+        _check(compiled, costs, reach.within(compiled.names[source], budget * scale), source, budget * scale)
+
+    for _ in range(10):
+        source = rng.randrange(compiled.num_nodes)
+        budgets = [rng.uniform(0, 1.5) * scale for _ in range(rng.randint(1, 4))]
+        result = reach.isochrones(compiled.names[source], budgets)
+        assert sorted(result) == sorted(budgets)
+        for budget, places in result.items():
+            _check(compiled, costs, places, source, budget)
+
+
+def test_smaller_budget_does_not_search_again():
+    compiled = random_compiled(30, 4)
+    reach = Reachability(compiled)
+    reach.within("P0", 50)
+    expanded = reach.expanded
+    reach.within("P0", 20)
+    assert reach.expanded == expanded
+    reach.within("P0", 60)
+    assert reach.expanded >= expanded
+    assert reach.isochrones("P0", []) == {}
+
+
+def test_unknown_metric_and_place():
+    compiled = random_compiled(5, 0)
+    with pytest.raises(ValueError):
+        Reachability(compiled, "cost")
+    with pytest.raises(KeyError):
+        Reachability(compiled).within("Nowhere", 10)
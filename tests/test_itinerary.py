@@ -0,0 +1,119 @@
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+import itinerary
+from graphs import random_compiled, random_graph
+from itinerary import Candidate, _exact_order, _heuristic_order, best_candidates, plan_itinerary, recommend_itinerary
+from place_table import PlaceTable, recommendation_scores, route_corridor
+from routing import compile_graph, find_route
+from travel_data import Place
+
+
+def _random_problem(seed, n):
+    rng = random.Random(seed)
+    candidates = [Candidate(f"S{i}", round(rng.uniform(3.5, 5.0), 1), rng.choice([0, 30, 50, 100]),
+                            rng.choice([30, 60, 90])) for i in range(n)]
+    size = n + 2
+    travel = np.array([[0.0 if a == b else float(rng.randint(5, 90)) for b in range(size)] for a in range(size)])
+    return candidates, travel
+
+
+def _day(candidates, travel, order):
+    tour = [0] + [i + 2 for i in order] + [1]
+    return sum(travel[a, b] for a, b in zip(tour, tour[1:])) + sum(candidates[i].visit_minutes for i in order)
+
+
+def _brute_force(candidates, travel, budget, day_minutes):
+    """(best score, shortest day for it) over every ordered subset"""
+    best = (0.0, _day(candidates, travel, []))
+    for size in range(1, len(candidates) + 1):
+        for order in itertools.permutations(range(len(candidates)), size):
+            if sum(candidates[i].cost for i in order) > budget:
+                continue
+            day = _day(candidates, travel, order)
+            if day > day_minutes:
+                continue
+            score = round(sum(candidates[i].score for i in order), 9)
+            if score > best[0] or (score == best[0] and day < best[1]):
+                best = (score, day)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_exact_order_matches_brute_force(seed):
+    candidates, travel = _random_problem(seed, 6)
+    budget = random.Random(seed).choice([math.inf, 100, 150])
+    order = _exact_order(candidates, travel, budget, 360)
+    score, day = _brute_force(candidates, travel, budget, 360)
+    assert len(set(order)) == len(order)
+    assert sum(candidates[i].cost for i in order) <= budget
+    assert round(sum(candidates[i].score for i in order), 9) == pytest.approx(score)
+    if order:
+        assert _day(candidates, travel, order) == pytest.approx(day)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_heuristic_order_is_feasible(seed):
+    candidates, travel = _random_problem(seed, 7)
+    order = _heuristic_order(candidates, travel, 150, 360)
+    assert len(set(order)) == len(order)
+    assert sum(candidates[i].cost for i in order) <= 150
+    assert _day(candidates, travel, order) <= 360
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_plan_itinerary_matches_brute_force_over_road_times(seed):
+    rng = random.Random(seed)
+    compiled = random_compiled(12, seed)
+    candidates = [Candidate(f"P{i}", round(rng.uniform(3.5, 5.0), 1), rng.choice([0, 30, 50]),
+                            rng.choice([10, 20, 30])) for i in range(2, 8)]
+    plan = plan_itinerary(compiled, "P0", "P1", candidates, budget=80, day_minutes=120)
+
+    # Full, unbounded road times between start, end and every candidate
+    nodes = ["P0", "P1"] + [c.name for c in candidates]
+    travel = np.array([[0.0 if a == b else find_route(compiled, a, b, "time").time for b in nodes] for a in nodes])
+    score, day = _brute_force(candidates, travel, 80, 120)
+    assert plan.score == pytest.approx(score)
+    if plan.stops:
+        assert plan.minutes == pytest.approx(day)
+
+
+def test_best_candidates_keeps_top_scores_in_order():
+    scores = np.array([3.0, 5.0, 4.0, 5.0, 1.0, 4.0])
+    assert best_candidates(scores, 3).tolist() == [1, 3, 2]
+    assert best_candidates(scores, 10).tolist() == [1, 3, 2, 5, 0, 4]
+
+
+@pytest.mark.parametrize("limit", [1, 4, 12, 60])
+def test_recommend_itinerary_plans_at_most_the_limit_corridor_first(monkeypatch, limit):
+    rng = random.Random(limit)
+    graph, places = random_graph(40, 5)
+    places = {name: Place(name, place.coords, place.cost, round(rng.uniform(4.0, 5.0), 1), "", 1.0, "Landmark",
+                          rng.random())
+              for name, place in places.items()}
+    # Top-rated places with no road to them can never be planned
+    for i in range(5):
+        places[f"Far{i}"] = Place(f"Far{i}", (31.0, 79.0 + i / 100), 0, 5.0, "", 1.0, "Landmark", 1.0)
+    compiled = compile_graph(graph, places)
+    table = PlaceTable(places)
+    route_path = find_route(compiled, "P0", "P1").path
+
+    planned = []
+
+    def spy(compiled, start, end, candidates, budget):
+        planned.extend(candidates)
+        return plan_itinerary(compiled, start, end, candidates, budget)
+
+    monkeypatch.setattr(itinerary, "plan_itinerary", spy)
+    recommend_itinerary(table, compiled, route_path, 100, "Any", "2026-10-17", candidate_limit=limit)
+
+    rows, scores = recommendation_scores(table, compiled, route_path, 100, "Any", "2026-10-17")
+    corridor = route_corridor(table, compiled, route_path)
+    ranked = sorted((not corridor[row], -score, row) for row, score in zip(rows.tolist(), scores.tolist())
+                    if table.names[row] in compiled.index)
+    assert len(planned) == min(limit, len(ranked))
+    assert [c.name for c in planned] == [table.names[row] for _, _, row in ranked[:limit]]
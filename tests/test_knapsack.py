@@ -0,0 +1,60 @@
+import itertools
+import random
+
+import pytest
+
+from knapsack import best_selection, score_bound
+
+
+def _random_items(seed, n):
+    rng = random.Random(seed)
+    scores = [round(rng.uniform(3.0, 5.0), 2) for _ in range(n)]
+    costs = [rng.choice([0, 10, 25, 50, 75, 100]) for _ in range(n)]
+    minutes = [rng.choice([30, 45, 60, 90, 120]) for _ in range(n)]
+    return scores, costs, minutes
+
+
+def _brute_force(scores, costs, minutes, budget, day_minutes):
+    best = 0.0
+    for size in range(len(scores) + 1):
+        for subset in itertools.combinations(range(len(scores)), size):
+            if budget is not None and sum(costs[i] for i in subset) > budget:
+                continue
+            if sum(minutes[i] for i in subset) > day_minutes:
+                continue
+            best = max(best, sum(scores[i] for i in subset))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_exact_selection_matches_brute_force(seed):
+    scores, costs, minutes = _random_items(seed, 9)
+    budget = random.Random(seed).choice([None, 100, 180])
+    expected = _brute_force(scores, costs, minutes, budget, 300)
+    selection = best_selection(scores, costs, minutes, budget, 300)
+    assert selection.exact
+    assert selection.score == pytest.approx(expected)
+    assert budget is None or selection.cost <= budget
+    assert selection.visit_minutes <= 300
+    assert score_bound(scores, costs, minutes, budget, 300) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_coarsened_selection_stays_feasible_and_bounded(seed):
+    rng = random.Random(seed)
+    scores, _, _ = _random_items(seed, 9)
+    # Off-grid weights and a tiny table force coarsening
+    costs = [rng.randint(0, 97) for _ in scores]
+    minutes = [rng.uniform(20, 130) for _ in scores]
+    expected = _brute_force(scores, costs, minutes, 200, 300)
+    selection = best_selection(scores, costs, minutes, 200, 300, max_cells=500)
+    assert not selection.exact
+    assert selection.cost <= 200 and selection.visit_minutes <= 300
+    assert selection.score <= expected + 1e-9
+    assert score_bound(scores, costs, minutes, 200, 300, max_cells=500) >= expected - 1e-9
+
+
+def test_empty_catalog():
+    selection = best_selection([], [], [], 100, 300)
+    assert selection.picks == [] and selection.score == 0
+    assert score_bound([], [], [], None, 300) == 0
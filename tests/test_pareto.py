@@ -0,0 +1,54 @@
+import pytest
+
+from graphs import path_weight, random_compiled, random_graph, simple_paths
+from pareto import pareto_routes
+from routing import compile_graph
+from travel_data import Place
+
+
+def _criteria(compiled, nodes):
+    return (path_weight(compiled, nodes, compiled._dist),
+            path_weight(compiled, nodes, compiled._time),
+            sum(compiled._node_cost[u] for u in nodes))
+
+
+def _frontier(points):
+    unique = set(points)
+    return {p for p in unique
+            if not any(q != p and all(a <= b for a, b in zip(q, p)) for q in unique)}
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_frontier_matches_enumerated_paths(seed):
+    compiled = random_compiled(9, seed, extra_edges=2)
+    for s, g in ((0, 8), (3, 5), (7, 1)):
+        expected = _frontier(_criteria(compiled, path) for path in simple_paths(compiled, s, g))
+        routes = pareto_routes(compiled, compiled.names[s], compiled.names[g])
+        got = [(r.distance, r.time, r.cost) for r in routes]
+        assert set(got) == expected
+        assert len(got) == len(expected)
+        assert got == sorted(got)
+        for route in routes:
+            nodes = [compiled.node_id(name) for name in route.path]
+            assert nodes[0] == s and nodes[-1] == g
+            assert _criteria(compiled, nodes) == pytest.approx((route.distance, route.time, route.cost))
+
+
+def test_unreachable_end_gives_no_routes():
+    graph, places = random_graph(6, 0)
+    places["Island"] = Place("Island", (30.3, 78.0), 0, 4.0, "", 1.0, "Landmark")
+    graph["Island"] = {}
+    compiled = compile_graph(graph, places)
+    assert pareto_routes(compiled, "P0", "Island") == []
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_label_cap_returns_a_prefix_of_the_frontier(seed):
+    compiled = random_compiled(9, seed, extra_edges=3)
+    full = pareto_routes(compiled, "P0", "P8")
+    stats = {}
+    capped = pareto_routes(compiled, "P0", "P8", stats=stats, max_labels=12)
+    assert stats["labels"] <= 12
+    assert capped == full[:len(capped)]
+    if not stats["truncated"]:
+        assert capped == full
@@ -0,0 +1,68 @@
+import math
+import random
+
+import pytest
+
+from graphs import random_compiled, shortest_costs
+from replanning import IncrementalRouter
+
+
+def _expected_weights(compiled, minutes_by_edge):
+    dist, time = compiled._dist, compiled._time
+    weights = []
+    for e in range(compiled.num_edges):
+        minutes = minutes_by_edge.get(e, time[e])
+        weights.append(math.inf if minutes == math.inf else dist[e] + 0.1 * minutes)
+    return weights
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_replans_match_dijkstra_after_changes(seed):
+    rng = random.Random(seed)
+    compiled = random_compiled(14, seed)
+    names = compiled.names
+    router = IncrementalRouter(compiled, "P0", "P13")
+    minutes_by_edge = {}
+    for _ in range(6):
+        updates = []
+        for _ in range(3):
+            u = rng.randrange(compiled.num_nodes)
+            start, end = compiled._offsets[u], compiled._offsets[u + 1]
+            if start == end:
+                continue
+            e = rng.randrange(start, end)
+            minutes = rng.choice((math.inf, 0.5, rng.randint(1, 60)))
+            minutes_by_edge[e] = minutes
+            updates.append((names[u], names[compiled._targets[e]], minutes))
+        router.update_edges(updates)
+
+        weights = _expected_weights(compiled, minutes_by_edge)
+        best = shortest_costs(compiled, weights)
+        source = compiled.node_id(router.start)
+        route = router.route()
+        nodes = [compiled.node_id(name) for name in route.path]
+        if best[source][router.goal] == math.inf:
+            assert route.distance == 0 and len(nodes) == 2
+            continue
+        assert nodes[0] == source and nodes[-1] == router.goal
+        edges = [compiled.edge_id(u, v) for u, v in zip(nodes, nodes[1:])]
+        assert all(e >= 0 for e in edges)
+        assert sum(weights[e] for e in edges) == pytest.approx(best[source][router.goal])
+        assert route.time == pytest.approx(sum(minutes_by_edge.get(e, compiled._time[e]) for e in edges))
+        # Move one stop along the route before the next round of changes
+        if len(nodes) > 2:
+            router.advance(route.path[1])
+
+
+def test_unknown_road_raises_and_changes_nothing():
+    compiled = random_compiled(8, 0)
+    u = compiled.names[0]
+    missing = next(name for i, name in enumerate(compiled.names)
+                   if i != 0 and compiled.edge_id(0, i) < 0)
+    router = IncrementalRouter(compiled, "P0", "P7")
+    before = router.route()
+    weights = list(router.weights)
+    with pytest.raises(KeyError):
+        router.update_edges([(u, missing, 1.0)])
+    assert router.weights == weights
+    assert router.route() == before
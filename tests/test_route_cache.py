@@ -0,0 +1,41 @@
+import os
+import sqlite3
+
+from route_cache import RouteStore
+from travel_data import Route
+
+KEY = ("P0", "P1", "combined", "astar", "v1")
+
+
+def test_corrupt_file_is_replaced(tmp_path):
+    path = str(tmp_path / "routes.sqlite")
+    with open(path, "wb") as f:
+        f.write(b"definitely not sqlite" * 100)
+    store = RouteStore(path)
+    store.put(KEY, Route(["P0", "P1"], 1.0, 2.0, 0))
+    assert store.get(KEY) == Route(["P0", "P1"], 1.0, 2.0, 0)
+    assert len(store) == 1
+
+
+def test_unopenable_path_runs_without_a_store(tmp_path):
+    # A directory cannot be opened as a database; it must not be deleted either
+    assert RouteStore.open(str(tmp_path)) is None
+    assert os.path.isdir(tmp_path)
+
+
+def test_locked_database_is_kept(tmp_path, monkeypatch):
+    path = str(tmp_path / "routes.sqlite")
+    holder = sqlite3.connect(path)
+    holder.execute("CREATE TABLE keep (x)")
+    holder.execute("BEGIN EXCLUSIVE")
+    # Fail fast instead of waiting out the default busy timeout
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, "connect", lambda *args, **kwargs: connect(*args, **dict(kwargs, timeout=0)))
+    try:
+        assert RouteStore.open(path) is None
+    finally:
+        holder.rollback()
+        holder.close()
+    assert os.path.exists(path)
+    with connect(path) as conn:
+        assert conn.execute("SELECT name FROM sqlite_master").fetchall() == [("keep",)]
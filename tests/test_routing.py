@@ -0,0 +1,98 @@
+import math
+import pickle
+
+import numpy as np
+import pytest
+
+from graphs import path_weight, random_graph, shortest_costs
+from routing import PROFILES, SEARCH_MODES, RoutingProfile, compile_graph, find_route
+from travel_data import Place
+
+# A profile whose weights are not a weighted sum of dist and time
+WALKING = RoutingProfile("walking-test", weight_fn=lambda compiled: compiled.dist * 12.0 + 0.5)
+
+
+def _graph_with_dead_ends(seed):
+    """A random strongly connected graph plus a place you can only leave and one you can only enter"""
+    graph, places = random_graph(18, seed)
+    places["Source"] = Place("Source", (30.30, 78.00), 0, 4.0, "", 1.0, "Landmark")
+    places["Sink"] = Place("Sink", (30.31, 78.01), 50, 4.0, "", 1.0, "Landmark")
+    graph["Source"] = {"P0": {"dist": 2, "time": 5}}
+    graph["Sink"] = {}
+    graph["P1"]["Sink"] = {"dist": 3, "time": 7}
+    return compile_graph(graph, places)
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("profile", ["distance", "time", "combined", WALKING])
+@pytest.mark.parametrize("mode", SEARCH_MODES)
+def test_find_route_matches_dijkstra_reference(seed, profile, mode):
+    compiled = _graph_with_dead_ends(seed)
+    weights = compiled.edge_weights(profile).tolist()
+    costs = shortest_costs(compiled, weights)
+    names = compiled.names
+    for s in range(compiled.num_nodes):
+        for g in range(compiled.num_nodes):
+            if s == g:
+                continue
+            route = find_route(compiled, names[s], names[g], profile, mode=mode)
+            if costs[s][g] == math.inf:
+                # Unreachable pairs get the direct placeholder
+                assert (route.path, route.distance, route.time, route.cost) == ([names[s], names[g]], 0, 0, 0)
+                continue
+            nodes = [compiled.index[name] for name in route.path]
+            assert nodes[0] == s and nodes[-1] == g
+            assert path_weight(compiled, nodes, weights) == pytest.approx(costs[s][g])
+            assert route.distance == pytest.approx(path_weight(compiled, nodes, compiled._dist))
+            assert route.time == pytest.approx(path_weight(compiled, nodes, compiled._time))
+            assert route.cost == sum(compiled._node_cost[u] for u in nodes)
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("profile", ["distance", "time", "combined", WALKING])
+def test_heuristic_never_overestimates(seed, profile):
+    compiled = _graph_with_dead_ends(seed)
+    weights = compiled.edge_weights(profile).tolist()
+    costs = shortest_costs(compiled, weights)
+    scale = compiled.heuristic_scale(profile)
+    assert scale > 0
+    sources = np.repeat(np.arange(compiled.num_nodes), np.diff(compiled.offsets))
+    for goal in range(compiled.num_nodes):
+        potential = compiled.potentials(goal, profile)
+        assert potential[goal] == 0.0
+        for v in range(compiled.num_nodes):
+            assert potential[v] <= costs[v][goal] + 1e-9
+        # Consistent too: no edge costs less than the drop in potential across it
+        assert np.all(potential[sources] <= np.asarray(weights) + potential[compiled.targets] + 1e-9)
+
+
+def test_same_start_and_end():
+    compiled = _graph_with_dead_ends(0)
+    for mode in SEARCH_MODES:
+        route = find_route(compiled, "P3", "P3", mode=mode)
+        assert route.path == ["P3"]
+        assert (route.distance, route.time) == (0, 0)
+
+
+def test_unknown_mode_profile_and_place():
+    compiled = _graph_with_dead_ends(0)
+    with pytest.raises(ValueError):
+        find_route(compiled, "P0", "P1", mode="dfs")
+    with pytest.raises(KeyError):
+        find_route(compiled, "P0", "P1", "scenic")
+    with pytest.raises(KeyError):
+        find_route(compiled, "P0", "Nowhere")
+    assert set(PROFILES) >= {"distance", "time", "combined"}
+
+
+def test_node_backed_route_builds_its_path_once():
+    compiled = _graph_with_dead_ends(1)
+    route = find_route(compiled, "P0", "P5")
+    assert route.nodes is not None
+    path = route.path
+    assert route.path is path
+    assert path == [compiled.names[u] for u in route.nodes]
+    assert pickle.loads(pickle.dumps(route)) == route
+
+    route.path = ["P0", "P5"]
+    assert route.nodes is None and route.path == ["P0", "P5"]
@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+import pytest
+
+from search import PlaceSearch, words
+
+NAMES = ["Robber's Cave", "Rajpur Road", "Forest Research Institute", "Tapkeshwar Temple", "Paltan Bazaar",
+         "Clock Tower", "Mindrolling Monastery", "Sahastradhara", "Malsi Deer Park", "Cave Cafe"]
+CATEGORIES = ["Nature", "Market", "Institution", "Cultural", "Market",
+              "Landmark", "Cultural", "Nature", "Nature", "Food"]
+DESCRIPTIONS = ["A river cave with a hidden stream", "Cafes and shops on the old road",
+                "Colonial campus and museums", "Shiva temple inside a cave", "Busy market near the tower",
+                "Old clock tower in the city centre", "Tibetan monastery with a great stupa",
+                "Sulphur springs and caves", "Small zoo and deer park", "Coffee near the caves"]
+POPULARITY = np.array([0.9, 0.5, 0.8, 0.6, 0.7, 0.4, 0.3, 0.2, 0.1, 0.05])
+
+
+@pytest.fixture
+def search():
+    return PlaceSearch(NAMES, DESCRIPTIONS, CATEGORIES, POPULARITY)
+
+
+def _names(rows):
+    return [NAMES[row] for row in rows]
+
+
+def test_words_drop_apostrophes_and_case():
+    assert words("Robber's CAVE") == ["robbers", "cave"]
+    assert words("Robber’s  cave!") == ["robbers", "cave"]
+    assert words("") == []
+
+
+def test_ranking_tiers(search):
+    # Whole-name prefix, then name words, then any text, popularity breaking ties within a tier
+    assert _names(search.search("cave")) == ["Cave Cafe", "Robber's Cave", "Tapkeshwar Temple", "Sahastradhara"]
+    # Only descriptions hold "caves"; the name that looks like a typo of it comes last
+    assert _names(search.search("caves")) == ["Sahastradhara", "Cave Cafe", "Robber's Cave"]
+    assert _names(search.search("tower")) == ["Clock Tower", "Paltan Bazaar"]
+    assert _names(search.search("market")) == ["Paltan Bazaar", "Rajpur Road"]
+
+
+def test_empty_query_ranks_by_popularity(search):
+    assert search.search("", limit=3).tolist() == [0, 2, 4]
+    assert search.search("  ?! ").tolist() == np.argsort(-POPULARITY, kind="stable").tolist()
+
+
+def test_prefix_completion(search):
+    assert _names(search.complete("r")) == ["Robber's Cave", "Rajpur Road"]
+    assert _names(search.complete("robbers c")) == ["Robber's Cave"]
+    assert _names(search.complete("Robber's")) == ["Robber's Cave"]
+    assert _names(search.complete("ca")) == ["Cave Cafe"]
+    assert _names(search.complete("", limit=2)) == ["Robber's Cave", "Forest Research Institute"]
+    assert search.complete("zz").tolist() == []
+
+
+def test_half_typed_words_must_all_match(search):
+    assert _names(search.matching("for inst")) == ["Forest Research Institute"]
+    assert _names(search.matching("old")) == ["Rajpur Road", "Clock Tower"]
+    assert _names(search.matching("temple cave", names_only=True)) == []
+    assert _names(search.matching("temple cave")) == ["Tapkeshwar Temple"]
+
+
+def test_typos_fill_after_exact_matches(search):
+    assert _names(search.search("monastry")) == ["Mindrolling Monastery"]
+    assert _names(search.search("Sahastradara")) == ["Sahastradhara"]
+    rows, similarity = search.fuzzy("robers cave")
+    assert _names(rows[:1]) == ["Robber's Cave"]
+    assert np.all(similarity[:-1] >= similarity[1:])
+    # Too short to match loosely
+    assert search.fuzzy("xy")[0].tolist() == []
+
+
+def test_apostrophes_match_either_way(search):
+    for query in ("robbers", "robber's", "Robber’s cave", "ROBBERS CA"):
+        assert _names(search.search(query))[0] == "Robber's Cave"
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matching_and_completion_match_a_scan(seed):
+    rng = random.Random(seed)
+    vocabulary = ["ab", "abc", "abd", "b", "ba", "cab", "cd", "d'e"]
+    names = [" ".join(rng.choices(vocabulary, k=rng.randint(1, 3))) for _ in range(60)]
+    descriptions = [" ".join(rng.choices(vocabulary, k=rng.randint(0, 3))) for _ in range(60)]
+    search = PlaceSearch(names, descriptions, ["Cat"] * 60)
+    for query in ("a", "ab", "abc b", "c", "de", "ba ab", "d", "x"):
+        expected = [row for row in range(60)
+                    if all(any(word.startswith(q) for word in words(names[row]) + ["cat"] + words(descriptions[row]))
+                           for q in words(query))]
+        assert search.matching(query).tolist() == expected
+        expected_names = [row for row in range(60) if all(any(word.startswith(q) for word in words(names[row]))
+                                                          for q in words(query))]
+        assert search.matching(query, names_only=True).tolist() == expected_names
+        key = " ".join(words(query))
+        completed = search.complete(query, limit=60).tolist()
+        assert sorted(completed) == [row for row in range(60) if " ".join(words(names[row])).startswith(key)]
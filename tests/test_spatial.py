@@ -0,0 +1,120 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from routing import EARTH_RADIUS_KM
+from spatial import SpatialIndex
+
+# Samples per path leg for the brute-force point-to-leg distance
+LEG_SAMPLES = 400
+
+
+def _km(a, b):
+    """Haversine km from point a to point b, or to each of an array of points b"""
+    (lat1, lon1), b = np.radians(a), np.radians(np.asarray(b, dtype=np.float64))
+    lat2, lon2 = b[..., 0], b[..., 1]
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def _vector(point):
+    lat, lon = np.radians(point)
+    return np.array([math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)])
+
+
+def _leg_points(a, b):
+    """Points along the great-circle leg a -> b, ends included"""
+    u, v = _vector(a), _vector(b)
+    angle = math.acos(min(1.0, float(u @ v)))
+    points = []
+    for t in np.linspace(0.0, 1.0, LEG_SAMPLES + 1):
+        p = u if angle < 1e-12 else (math.sin((1 - t) * angle) * u + math.sin(t * angle) * v) / math.sin(angle)
+        points.append((math.degrees(math.asin(max(-1.0, min(1.0, p[2])))), math.degrees(math.atan2(p[1], p[0]))))
+    return points
+
+
+def _points(seed, n, center, spread):
+    rng = random.Random(seed)
+    points = []
+    for _ in range(n):
+        lat = max(-90.0, min(90.0, center[0] + rng.uniform(-spread, spread)))
+        lon = (center[1] + rng.uniform(-spread, spread) + 180.0) % 360.0 - 180.0
+        points.append((lat, lon))
+    return points
+
+
+# Ordinary city, antimeridian, near the north pole, near the south pole
+AREAS = [((30.3, 78.0), 0.5), ((-17.0, 179.8), 0.6), ((89.5, 40.0), 1.0), ((-89.6, -120.0), 0.8)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("center, spread", AREAS)
+def test_within_and_nearest_match_brute_force(seed, center, spread):
+    points = _points(seed, 300, center, spread)
+    index = SpatialIndex(points)
+    for query in _points(seed + 100, 8, center, spread * 1.2):
+        km = _km(query, points)
+        for radius in (0.5, 5.0, 40.0):
+            rows, got = index.within(*query, radius)
+            assert set(rows.tolist()) == set(np.flatnonzero(km <= radius).tolist())
+            assert got == pytest.approx(km[rows], abs=1e-6)
+            assert got.tolist() == sorted(got.tolist())
+        for k in (1, 7, 300, 500):
+            rows, got = index.nearest(*query, k)
+            assert got == pytest.approx(np.sort(km)[:k], abs=1e-6)
+            assert got == pytest.approx(km[rows], abs=1e-6)
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("center, spread", AREAS)
+def test_in_box_matches_brute_force(seed, center, spread):
+    points = _points(seed, 300, center, spread)
+    index = SpatialIndex(points)
+    rng = random.Random(seed)
+    for _ in range(10):
+        south, north = sorted(rng.uniform(center[0] - spread, center[0] + spread) for _ in range(2))
+        west = (rng.uniform(center[1] - spread, center[1] + spread) + 180.0) % 360.0 - 180.0
+        east = (west + rng.uniform(0.0, spread) + 180.0) % 360.0 - 180.0
+        if west > east:
+            expected = [i for i, (lat, lon) in enumerate(points)
+                        if south <= lat <= north and (lon >= west or lon <= east)]
+        else:
+            expected = [i for i, (lat, lon) in enumerate(points) if south <= lat <= north and west <= lon <= east]
+        assert index.in_box(south, west, north, east).tolist() == expected
+
+
+def test_box_across_the_antimeridian():
+    index = SpatialIndex([(0.0, 179.5), (0.0, -179.5), (0.0, 0.0), (0.0, 178.0), (0.0, -178.0)])
+    assert index.in_box(-1.0, 179.0, 1.0, -179.0).tolist() == [0, 1]
+    assert index.in_box(-1.0, 177.0, 1.0, -177.0).tolist() == [0, 1, 3, 4]
+    assert index.in_box(-1.0, -179.0, 1.0, 179.0).tolist() == [2, 3, 4]
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("center, spread", AREAS)
+def test_near_path_matches_brute_force(seed, center, spread):
+    points = _points(seed, 300, center, spread)
+    index = SpatialIndex(points)
+    path = _points(seed + 50, 4, center, spread)
+    samples = [p for a, b in zip(path, path[1:]) for p in _leg_points(a, b)]
+    km = np.array([_km(p, samples).min() for p in points])
+    # Sampling can overstate a distance by at most half the sample spacing
+    slack = max(_km(a, b) for a, b in zip(path, path[1:])) / LEG_SAMPLES / 2 + 1e-6
+    for radius in (1.0, 10.0):
+        rows, got = index.near_path(path, radius)
+        assert len(set(rows.tolist())) == len(rows)
+        assert set(np.flatnonzero(km <= radius - slack).tolist()) <= set(rows.tolist())
+        assert set(rows.tolist()) <= set(np.flatnonzero(km <= radius + slack).tolist())
+        assert np.all(got <= km[rows] + 1e-6) and np.all(got >= km[rows] - slack)
+        assert got.tolist() == sorted(got.tolist())
+
+
+def test_empty_index():
+    index = SpatialIndex([])
+    assert len(index) == 0
+    assert index.within(30.0, 78.0, 100.0)[0].tolist() == []
+    assert index.nearest(30.0, 78.0, 3)[0].tolist() == []
+    assert index.in_box(-90.0, -180.0, 90.0, 180.0).tolist() == []
+    assert index.near_path([(30.0, 78.0), (31.0, 79.0)], 50.0)[0].tolist() == []
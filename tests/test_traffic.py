@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from graphs import random_compiled
+from traffic import DAY_SLOTS, WEEK_SLOTS, TrafficProfile
+
+
+def _profile(compiled, seed, slots=DAY_SLOTS):
+    # Factors in [1, 3] on 2-20 minute roads change by under an hour per hour
+    rng = np.random.default_rng(seed)
+    return TrafficProfile.from_multipliers(compiled, rng.uniform(1.0, 3.0, (compiled.num_edges, slots)))
+
+
+def _earliest_arrivals(profile, source, depart):
+    """Minutes after depart to reach every node, by relaxing every edge until nothing improves"""
+    compiled = profile.compiled
+    arrival = [float("inf")] * compiled.num_nodes
+    arrival[source] = 0.0
+    changed = True
+    while changed:
+        changed = False
+        for u in range(compiled.num_nodes):
+            if arrival[u] == float("inf"):
+                continue
+            for e in range(compiled._offsets[u], compiled._offsets[u + 1]):
+                v = compiled._targets[e]
+                reached = arrival[u] + profile.travel_time(e, depart + arrival[u])
+                if reached < arrival[v] - 1e-9:
+                    arrival[v] = reached
+                    changed = True
+    return arrival
+
+
+def _path_minutes(profile, path, depart):
+    compiled = profile.compiled
+    elapsed = 0.0
+    for a, b in zip(path, path[1:]):
+        edge = compiled.edge_id(compiled.node_id(a), compiled.node_id(b))
+        assert edge >= 0
+        elapsed += profile.travel_time(edge, depart + elapsed)
+    return elapsed
+
+
+@pytest.mark.parametrize("seed", range(12))
+@pytest.mark.parametrize("slots", [DAY_SLOTS, WEEK_SLOTS])
+def test_route_matches_earliest_arrival_reference(seed, slots):
+    compiled = random_compiled(14, seed)
+    profile = _profile(compiled, seed, slots)
+    departure = datetime(2026, 10, 12 + seed % 7, (5 * seed) % 24, 17)
+    depart = profile.minute_of_cycle(departure)
+    for source in (0, 5, 11):
+        expected = _earliest_arrivals(profile, source, depart)
+        for goal in range(compiled.num_nodes):
+            if goal == source:
+                continue
+            route = profile.route(compiled.names[source], compiled.names[goal], departure)
+            assert route.path[0] == compiled.names[source] and route.path[-1] == compiled.names[goal]
+            assert route.time == pytest.approx(expected[goal], abs=0.006)
+            assert _path_minutes(profile, route.path, depart) == pytest.approx(expected[goal], abs=1e-6)
+
+
+def test_weekend_peaks_apply_on_saturday_and_sunday_only():
+    compiled = random_compiled(6, 1)
+    categories = ["Market"] + [None] * (compiled.num_nodes - 1)
+    profile = TrafficProfile.from_peak_times(compiled, categories, {"Market": [(8, 9)]},
+                                             weekend_peak_times={"Market": [(14, 16)]}, slowdown=2.0)
+    assert profile.slots == WEEK_SLOTS
+
+    for u in range(compiled.num_nodes):
+        for e in range(compiled._offsets[u], compiled._offsets[u + 1]):
+            touches_market = 0 in (u, compiled._targets[e])
+            for day in range(7):
+                hours = profile.minutes[e, day * DAY_SLOTS:(day + 1) * DAY_SLOTS] / compiled.time[e]
+                peaks = ({8, 9} | ({14, 15, 16} if day >= 5 else set())) if touches_market else set()
+                assert np.allclose(hours, [2.0 if hour in peaks else 1.0 for hour in range(DAY_SLOTS)])
+
+
+def test_daily_profile_without_weekend_peaks():
+    compiled = random_compiled(6, 2)
+    profile = TrafficProfile.from_peak_times(compiled, ["Market"] * compiled.num_nodes, {"Market": [(23, 23)]})
+    assert profile.slots == DAY_SLOTS
+    assert np.allclose(profile.minutes[:, 23], compiled.time * 1.8)
+    assert np.allclose(profile.minutes[:, :23], compiled.time[:, None])
+
+
+def test_peak_times_need_one_category_per_node():
+    compiled = random_compiled(6, 3)
+    with pytest.raises(ValueError):
+        TrafficProfile.from_peak_times(compiled, ["Market"], {"Market": [(8, 9)]})
@@ -0,0 +1,46 @@
+import pytest
+
+import travel_matrix
+from graphs import path_weight, random_compiled, shortest_costs
+from travel_matrix import TravelMatrix, load_or_build_matrix
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("profile", ["distance", "time", "combined"])
+def test_route_matches_brute_force_and_its_own_path(seed, profile):
+    compiled = random_compiled(12, seed)
+    weights = compiled.edge_weights(profile).tolist()
+    best = shortest_costs(compiled, weights)
+    matrix = TravelMatrix.build(compiled, profile)
+    for s in range(compiled.num_nodes):
+        for g in range(compiled.num_nodes):
+            if s == g:
+                continue
+            route = matrix.route(compiled.names[s], compiled.names[g])
+            nodes = [compiled.node_id(name) for name in route.path]
+            assert nodes[0] == s and nodes[-1] == g
+            assert path_weight(compiled, nodes, weights) == pytest.approx(best[s][g])
+            assert matrix.cost[s, g] == pytest.approx(best[s][g])
+            # Reported totals describe the path that is returned
+            assert route.distance == pytest.approx(path_weight(compiled, nodes, compiled._dist))
+            assert route.time == pytest.approx(path_weight(compiled, nodes, compiled._time))
+            assert route.cost == sum(compiled._node_cost[u] for u in nodes)
+
+
+def test_snapshot_round_trip(tmp_path):
+    compiled = random_compiled(10, 1)
+    matrix = TravelMatrix.build(compiled)
+    path = str(tmp_path / "matrix.bin")
+    matrix.save(path)
+    loaded = TravelMatrix.load(path, compiled)
+    assert loaded is not None
+    assert loaded.route("P0", "P5") == matrix.route("P0", "P5")
+    assert TravelMatrix.load(path, random_compiled(10, 2)) is None
+
+
+def test_large_graphs_get_no_matrix(tmp_path, monkeypatch):
+    compiled = random_compiled(10, 1)
+    monkeypatch.setattr(travel_matrix, "MATRIX_NODE_LIMIT", 9)
+    assert load_or_build_matrix(str(tmp_path / "matrix.bin"), compiled) is None
+    with pytest.raises(ValueError):
+        TravelMatrix.build(compiled)
@@ -0,0 +1,181 @@
+import heapq
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from routing import CompiledGraph, _reconstruct_path
+from travel_data import Route
+
+DAY_SLOTS = 24
+WEEK_SLOTS = 168
+
+# Travel-time multiplier on a road during one of its peak hours
+PEAK_SLOWDOWN = 1.8
+
+
+class TrafficProfile:
+    """Travel time of every edge for each hour of a day (24 slots) or week (168 slots).
+
+    ``minutes[e, s]`` is the time to cross edge e when entering it in the
+    middle of hour s (slot 0 is midnight, or Monday midnight for weekly
+    profiles). Between slot midpoints the time is interpolated linearly, so
+    as long as no edge speeds up by more than an hour per hour, leaving
+    later never means arriving earlier and a label-setting search is exact.
+    """
+
+    def __init__(self, compiled: CompiledGraph, minutes: np.ndarray):
+        minutes = np.ascontiguousarray(minutes, dtype=np.float32)
+        if minutes.ndim != 2 or minutes.shape[0] != compiled.num_edges or minutes.shape[1] not in (DAY_SLOTS, WEEK_SLOTS):
+            raise ValueError(f"Expected ({compiled.num_edges}, {DAY_SLOTS} or {WEEK_SLOTS}) travel times, got {minutes.shape}")
+        self.compiled = compiled
+        self.minutes = minutes
+        self.slots = minutes.shape[1]
+        # Flat zero-copy view for the search loop (edge e, slot s is e * slots + s);
+        # indexing it is as cheap as a list without boxing the whole table
+        self._minutes = minutes.reshape(-1).data
+
+        # Heuristic scale: fastest minutes per straight-line km over all edges and hours
+        fastest = minutes.min(axis=1).astype(np.float64)
+        positive = compiled.edge_km > 0
+        self.heuristic_scale = max(float(np.min(fastest[positive] / compiled.edge_km[positive])), 0.0) if positive.any() else 0.0
+
+    @classmethod
+    def from_multipliers(cls, compiled: CompiledGraph, multipliers: np.ndarray) -> "TrafficProfile":
+        """Scale each edge's static time by per-hour (slots,) or per-edge-and-hour (edges, slots) factors"""
+        multipliers = np.asarray(multipliers, dtype=np.float64)
+        return cls(compiled, compiled.time[:, None] * multipliers)
+
+    @classmethod
+    def from_peak_times(cls, compiled: CompiledGraph, categories: Sequence[Optional[str]],
+                        peak_times: Dict[str, List[Tuple[int, int]]],
+                        weekend_peak_times: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                        slowdown: float = PEAK_SLOWDOWN) -> "TrafficProfile":
+        """Slow a road down during the peak hours of the places at either end
+
+        ``categories`` holds the place category of each node (None for no
+        place, see PlaceTable.node_categories). ``peak_times`` maps a
+        category to inclusive (start, end) hours. With ``weekend_peak_times``
+        the profile is weekly and those extra peaks apply on Saturday and
+        Sunday; otherwise it covers one day.
+        """
+        if len(categories) != compiled.num_nodes:
+            raise ValueError(f"Expected {compiled.num_nodes} node categories, got {len(categories)}")
+        slots = WEEK_SLOTS if weekend_peak_times else DAY_SLOTS
+
+        # One row of hourly factors per category, then one per node
+        rows = {}
+        for category in set(categories):
+            row = np.ones(slots)
+            for day in range(slots // DAY_SLOTS):
+                peaks = list(peak_times.get(category, []))
+                if weekend_peak_times and day >= 5:
+                    peaks += weekend_peak_times.get(category, [])
+                for start, end in peaks:
+                    row[day * DAY_SLOTS + start:day * DAY_SLOTS + end + 1] = slowdown
+            rows[category] = row
+        node_factor = np.stack([rows[category] for category in categories])
+
+        sources = np.repeat(np.arange(compiled.num_nodes), np.diff(compiled.offsets))
+        multipliers = np.maximum(node_factor[sources], node_factor[compiled.targets])
+        return cls.from_multipliers(compiled, multipliers)
+
+    def minute_of_cycle(self, when: datetime) -> float:
+        """Minutes since the start of the day (or of the week, for weekly profiles)"""
+        minute = when.hour * 60 + when.minute + when.second / 60
+        if self.slots == WEEK_SLOTS:
+            minute += when.weekday() * DAY_SLOTS * 60
+        return minute
+
+    def travel_time(self, edge: int, minute: float) -> float:
+        """Minutes to cross edge when entering it at minute of the cycle"""
+        slots = self.slots
+        position = (minute / 60 - 0.5) % slots
+        slot = int(position)
+        base = edge * slots
+        before = self._minutes[base + slot]
+        after = self._minutes[base + (slot + 1) % slots]
+        return before + (after - before) * (position - slot)
+
+    def route(self, start: str, end: str, departure: datetime,
+              stats: Optional[Dict[str, int]] = None) -> Route:
+        """Earliest-arrival route leaving start at departure
+
+        Time-dependent A*: an edge's time depends on when the search reaches
+        it, and the potential is straight-line distance at the fastest
+        minutes per km any edge reaches at any hour.
+        """
+        compiled = self.compiled
+        source = compiled.node_id(start)
+        goal = compiled.node_id(end)
+        potential = (compiled.straight_line_km(goal) * self.heuristic_scale).tolist()
+        depart = self.minute_of_cycle(departure)
+
+        n = compiled.num_nodes
+        offsets = compiled._offsets
+        targets = compiled._targets
+        dist = compiled._dist
+        node_cost = compiled._node_cost
+        table = self._minutes
+        slots = self.slots
+
+        inf = math.inf
+        g_scores = [inf] * n
+        parent = [-1] * n
+        total_dist = [0.0] * n
+        total_cost = [0] * n
+        closed = bytearray(n)
+        expanded = 0
+
+        g_scores[source] = 0.0
+        total_cost[source] = node_cost[source]
+        open_set = [(potential[source], 0.0, source)]
+        route = None
+
+        while open_set:
+            f_score, g_score, current = heapq.heappop(open_set)
+
+            if closed[current]:
+                continue
+
+            if current == goal:
+                route = compiled.route(
+                    _reconstruct_path(parent, goal),
+                    total_dist[goal],
+                    # Slots are float32; keep the two decimals the data has
+                    round(g_score, 2),
+                    total_cost[goal],
+                )
+                break
+
+            closed[current] = 1
+            expanded += 1
+
+            # Every edge out of current is entered at the same moment
+            position = ((depart + g_score) / 60 - 0.5) % slots
+            slot = int(position)
+            next_slot = (slot + 1) % slots
+            fraction = position - slot
+
+            for e in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[e]
+                if closed[neighbor]:
+                    continue
+
+                before = table[e * slots + slot]
+                tentative_g = g_score + before + (table[e * slots + next_slot] - before) * fraction
+
+                if tentative_g < g_scores[neighbor]:
+                    g_scores[neighbor] = tentative_g
+                    parent[neighbor] = current
+                    total_dist[neighbor] = total_dist[current] + dist[e]
+                    total_cost[neighbor] = total_cost[current] + node_cost[neighbor]
+                    heapq.heappush(open_set, (tentative_g + potential[neighbor], tentative_g, neighbor))
+
+        if stats is not None:
+            stats["expanded"] = expanded
+        if route is None:
+            # Mirror find_route: unreachable pairs get a direct placeholder
+            return Route([start, end], 0, 0, 0)
+        return route
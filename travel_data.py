@@ -0,0 +1,102 @@
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+# Enhanced data structures for better performance; slotted, so a Place
+# carries no per-instance __dict__
+@dataclass(slots=True)
+class Place:
+    name: str
+    coords: Tuple[float, float]
+    cost: int
+    rating: float
+    description: str
+    visit_time: float
+    category: str
+    popularity_score: float = 0.0
+
+class Route:
+    """A path with its total distance, time and entry cost.
+
+    Routes found on a compiled graph keep the path as int32 node ids plus a
+    reference to the graph's shared name list, and spell out ``path`` the
+    first time it is read, so a cached route nobody has displayed costs four
+    bytes per stop. Routes built from a list of names keep that list, as
+    they always have.
+    """
+    __slots__ = ("_path", "_nodes", "_names", "distance", "time", "cost")
+
+    def __init__(self, path: List[str], distance: float, time: float, cost: int):
+        self._path = path
+        self._nodes = None
+        self._names = None
+        self.distance = distance
+        self.time = time
+        self.cost = cost
+
+    @classmethod
+    def from_nodes(cls, nodes: Sequence[int], names: Sequence[str], distance: float, time: float,
+                   cost: int) -> "Route":
+        """A route over node ids, named through names (not copied) on demand"""
+        route = cls.__new__(cls)
+        route._path = None
+        route._nodes = array("i", nodes)
+        route._names = names
+        route.distance = distance
+        route.time = time
+        route.cost = cost
+        return route
+
+    @property
+    def path(self) -> List[str]:
+        """The stops by name; node-backed routes build the list on first read and keep it"""
+        if self._path is None:
+            names = self._names
+            self._path = [names[u] for u in self._nodes]
+        return self._path
+
+    @path.setter
+    def path(self, path: List[str]):
+        self._path, self._nodes, self._names = path, None, None
+
+    @property
+    def nodes(self) -> Optional[array]:
+        """The path as int32 node ids, or None for a route built from names"""
+        return self._nodes
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.path, self.distance, self.time, self.cost) == (other.path, other.distance, other.time, other.cost)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Route(path={self.path!r}, distance={self.distance!r}, time={self.time!r}, cost={self.cost!r})"
+
+    def __reduce__(self):
+        # Pickle by name, or the graph's whole name list would travel with every route
+        return Route, (self.path, self.distance, self.time, self.cost)
+
+# Hours (inclusive) when roads touching each kind of place slow down, in the
+# same form as the parking peak_times; weekend peaks apply on Saturday and Sunday
+road_peak_times = {
+    "Market": [(17, 20)],
+    "Institution": [(8, 9), (16, 17)],
+    "Religious": [(5, 7)],
+}
+
+weekend_road_peak_times = {
+    "Adventure": [(9, 15)],
+    "Nature": [(9, 15)],
+}
+
+
+def __getattr__(name: str):
+    # places_data and graph are the catalog's default city (see catalog.py),
+    # read from its data files the first time either is used
+    if name in ("places_data", "graph"):
+        from catalog import default_catalog
+        city = default_catalog().city()
+        return city.places if name == "places_data" else city.graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
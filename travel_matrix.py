@@ -0,0 +1,132 @@
+from typing import Optional, Union
+
+import numpy as np
+
+from routing import CompiledGraph, RoutingProfile, get_profile
+from snapshot import read_snapshot, write_snapshot
+from travel_data import Route
+
+MATRIX_MAGIC = b"TTGMAT02"
+
+# Floyd-Warshall is O(n^3) time and O(n^2) memory; above this many nodes
+# (about a second to build) routes are searched per query instead
+MATRIX_NODE_LIMIT = 600
+
+# Arrays stored in a snapshot, in file order
+_MATRIX_FIELDS = (("cost", np.float64), ("next_hop", np.int32))
+
+
+class TravelMatrix:
+    """All-pairs shortest cost and next hop for one routing profile.
+
+    ``next_hop[i, j]`` is the node that follows ``i`` on the best ``i -> j``
+    route (``-1`` if ``j`` is unreachable), so a route is read back in
+    O(path length) without searching. Distance and time are summed along
+    that hop chain rather than stored, since ties in cost would otherwise
+    let them describe a different path than the one returned.
+    """
+
+    def __init__(self, compiled: CompiledGraph, profile: RoutingProfile,
+                 cost: np.ndarray, next_hop: np.ndarray, fingerprint: str):
+        self.compiled = compiled
+        self.profile = profile
+        self.cost = cost
+        self.next_hop = next_hop
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, compiled: CompiledGraph, profile: Union[str, RoutingProfile] = "combined") -> "TravelMatrix":
+        """Vectorized Floyd-Warshall over the compiled graph; ValueError above MATRIX_NODE_LIMIT nodes"""
+        profile = get_profile(profile)
+        n = compiled.num_nodes
+        if n > MATRIX_NODE_LIMIT:
+            raise ValueError(f"{n} nodes is too many for an all-pairs matrix (limit {MATRIX_NODE_LIMIT})")
+        cost = np.full((n, n), np.inf)
+        next_hop = np.full((n, n), -1, dtype=np.int32)
+
+        sources = np.repeat(np.arange(n), np.diff(compiled.offsets))
+        targets = compiled.targets
+        edge_cost = compiled.edge_weights(profile)
+        # Graph dicts cannot hold parallel edges, so plain assignment is safe
+        cost[sources, targets] = edge_cost
+        next_hop[sources, targets] = targets
+
+        diagonal = np.arange(n)
+        cost[diagonal, diagonal] = 0.0
+        next_hop[diagonal, diagonal] = diagonal
+
+        # Row k and column k never improve during round k, so updating the
+        # matrices in place is safe and avoids reallocating them every round
+        via = np.empty((n, n))
+        better = np.empty((n, n), dtype=bool)
+        for k in range(n):
+            np.add(cost[:, k, None], cost[None, k, :], out=via)
+            np.less(via, cost, out=better)
+            if not better.any():
+                continue
+            np.copyto(cost, via, where=better)
+            np.copyto(next_hop, np.broadcast_to(next_hop[:, k, None], (n, n)), where=better)
+
+        return cls(compiled, profile, cost, next_hop, compiled.fingerprint())
+
+    def route(self, start: str, end: str) -> Route:
+        """Read the best start -> end route out of the matrix"""
+        source = self.compiled.node_id(start)
+        goal = self.compiled.node_id(end)
+        if self.next_hop[source, goal] < 0:
+            return Route([start, end], 0, 0, 0)
+
+        path = [source]
+        while path[-1] != goal:
+            path.append(int(self.next_hop[path[-1], goal]))
+        return self.compiled.to_route(path)
+
+    def save(self, path: str):
+        """Write the matrices as a memory-mappable snapshot"""
+        header = {
+            "nodes": self.compiled.num_nodes,
+            "profile": self.profile.name,
+            "weights": self.compiled.layer_fingerprint(self.profile),
+            "fingerprint": self.fingerprint,
+        }
+        arrays = {name: np.asarray(getattr(self, name), dtype=dtype) for name, dtype in _MATRIX_FIELDS}
+        write_snapshot(path, MATRIX_MAGIC, header, arrays)
+
+    @classmethod
+    def load(cls, path: str, compiled: CompiledGraph,
+             profile: Union[str, RoutingProfile] = "combined") -> Optional["TravelMatrix"]:
+        """Memory-map a snapshot; None if missing, corrupt or built for another graph/profile"""
+        profile = get_profile(profile)
+        snapshot = read_snapshot(path, MATRIX_MAGIC)
+        if snapshot is None:
+            return None
+        header, arrays = snapshot
+
+        n = compiled.num_nodes
+        if (header.get("nodes") != n
+                or header.get("profile") != profile.name
+                or header.get("weights") != compiled.layer_fingerprint(profile)
+                or header.get("fingerprint") != compiled.fingerprint()):
+            return None
+        if any(name not in arrays or arrays[name].shape != (n, n) for name, _ in _MATRIX_FIELDS):
+            return None
+        return cls(compiled, profile, fingerprint=header["fingerprint"],
+                   **{name: arrays[name] for name, _ in _MATRIX_FIELDS})
+
+
+def load_or_build_matrix(path: str, compiled: CompiledGraph,
+                         profile: Union[str, RoutingProfile] = "combined") -> Optional[TravelMatrix]:
+    """Reuse the snapshot at path if it still matches the graph, else rebuild and save it
+
+    None if the graph has more than MATRIX_NODE_LIMIT nodes.
+    """
+    if compiled.num_nodes > MATRIX_NODE_LIMIT:
+        return None
+    matrix = TravelMatrix.load(path, compiled, profile)
+    if matrix is None:
+        matrix = TravelMatrix.build(compiled, profile)
+        try:
+            matrix.save(path)
+        except OSError:
+            pass
+    return matrix